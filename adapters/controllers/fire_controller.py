@@ -1,22 +1,32 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for, send_file, abort, Response, jsonify
+from flask import Blueprint, render_template, request, flash, redirect, url_for, send_file, abort, Response, jsonify, \
+    make_response, stream_with_context
 from flask_login import login_required, current_user, login_user, logout_user
 from functools import wraps
+from werkzeug.http import is_resource_modified
 from werkzeug.utils import secure_filename
-from datetime import datetime
+from datetime import datetime, date
+from dataclasses import fields
 import os
 import csv
 import io
+import base64
+import hashlib
 import logging
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception_type
 from config import Config
-from core.entities import FireEntity, AuditLogEntity
+from core.entities import FireEntity, AuditLogEntity, FIRE_ENTITY_FIELDS
 from core.models import AuditLog, User
 from use_cases.fire_analysis import FireAnalysis
 from use_cases.region_operations import RegionOperations
-from adapters.repositories.fire_repository import SQLAlchemyFireRepository
+from use_cases.fire_import import FireImport
+from use_cases.result_cache import ResultCache
+from adapters.repositories.fire_repository import SQLAlchemyFireRepository, ConcurrentUpdateError
 from adapters.repositories.region_repository import SQLAlchemyRegionRepository
+from adapters.repositories.audit_repository import AuditLogRepository
+from adapters.services.spreadsheet_reader import read_rows
+from adapters.services.fire_json import json_with_fires, iter_json_array, iter_ndjson
 from forms import FireForm, LoginForm
-from infrastructure.database import db
+from infrastructure.database import db, pool_metrics
 
 # Настройка логирования только для нашего приложения
 logger = logging.getLogger(__name__)
@@ -51,6 +61,60 @@ logger.addFilter(UserFilter())
 
 fire_bp = Blueprint('fire', __name__)
 
+# Размер страницы таблицы пожаров и верхняя граница для параметра limit
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+# Потоковая выгрузка пожаров: размер пачки чтения и типы ответа по формату
+STREAM_BATCH_SIZE = 2000
+STREAM_FORMATS = {'json': 'application/json', 'ndjson': 'application/x-ndjson'}
+
+# Верхняя граница числа id в одном запросе массового удаления
+MAX_BULK_DELETE = 50000
+
+# Порядок столбцов таблиц admin_dashboard.html для сортировки DataTables
+# (столбцы «Файл» и «Действия» идут последними и не сортируются)
+FIRE_TABLE_COLUMNS = [field.name for field in fields(FireEntity)
+                      if field.name not in ('file_path', 'edited_by_engineer', 'version')]
+AUDIT_TABLE_COLUMNS = ['timestamp', 'username', 'action', 'table_name', 'record_id', 'changes']
+
+def _encode_cursor(fire: FireEntity) -> str:
+    """Непрозрачный курсор keyset-пагинации по (date, id) последней записи страницы."""
+    raw = f"{fire.date.isoformat()}|{fire.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def _decode_cursor(cursor: str):
+    """Разбор курсора в кортеж (date, id); ValueError при некорректном значении."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        cursor_date, cursor_id = raw.split('|')
+        return date.fromisoformat(cursor_date), int(cursor_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Некорректный курсор: {cursor}") from e
+
+def conditional_json(fire_analysis: FireAnalysis, build, *variant) -> Response:
+    """Ответ build() с ETag и Last-Modified по версии данных; 304 без вызова build(), если не изменился.
+
+    ETag зависит от версии данных (FireAnalysis.data_version) и variant — всего, кроме URL,
+    от чего зависит ответ (например, регионов, видимых пользователю). Ответ кэшируется только
+    браузером и проверяется при каждом запросе (private, no-cache).
+    """
+    version, last_modified = fire_analysis.data_version()
+    etag = hashlib.sha256(repr((version, variant)).encode('utf-8')).hexdigest()[:20]
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = make_response(build())
+        if response.status_code != 200:
+            return response
+    else:
+        response = Response(status=304)
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
 def roles_required(*roles):
     """Декоратор для проверки ролей пользователя."""
     def decorator(func):
@@ -67,11 +131,34 @@ def roles_required(*roles):
         return wrapper
     return decorator
 
+def _datatable_request(columns):
+    """Разбор параметров серверной обработки DataTables (draw/start/length/search/order)."""
+    args = request.args
+    length = args.get('length', PAGE_SIZE, type=int)
+    if length < 0 or length > MAX_PAGE_SIZE:
+        length = MAX_PAGE_SIZE
+    order = []
+    i = 0
+    while f'order[{i}][column]' in args:
+        index = args.get(f'order[{i}][column]', type=int)
+        if index is not None and 0 <= index < len(columns):
+            order.append((columns[index], args.get(f'order[{i}][dir]') == 'desc'))
+        i += 1
+    return {
+        'draw': args.get('draw', 0, type=int),
+        'start': max(args.get('start', 0, type=int), 0),
+        'length': length,
+        'search': (args.get('search[value]') or '').strip() or None,
+        'order': order,
+    }
+
 class FireController:
-    def __init__(self, fire_repository: SQLAlchemyFireRepository, region_repository: SQLAlchemyRegionRepository):
+    def __init__(self, fire_repository: SQLAlchemyFireRepository, region_repository: SQLAlchemyRegionRepository,
+                 result_cache: ResultCache = None):
         """Инициализация контроллера с репозиториями пожаров и регионов."""
-        self.fire_analysis = FireAnalysis(fire_repository)
+        self.fire_analysis = FireAnalysis(fire_repository, result_cache)
         self.region_ops = RegionOperations(region_repository)
+        self.fire_import = FireImport(fire_repository, region_repository, self.fire_analysis)
         logger.info("FireController initialized")
 
     @staticmethod
@@ -183,6 +270,36 @@ class FireController:
                 flash(f'Ошибка при добавлении данных: {str(e)}', 'danger')
         return render_template('add_fire.html', form=form, regions_and_locations=self.region_ops.region_repository.get_region_location_mapping())
 
+    @roles_required('admin', 'engineer')
+    def import_fires(self):
+        """Массовый импорт пожаров из CSV/XLSX с отчётом об ошибках по строкам."""
+        file = request.files.get('file')
+        if not file or not file.filename:
+            return jsonify({'error': 'Файл не передан'}), 400
+        if file.filename.rsplit('.', 1)[-1].lower() not in Config.IMPORT_EXTENSIONS:
+            return jsonify({'error': 'Допустимы только файлы CSV и XLSX'}), 400
+
+        allowed_regions = [current_user.region] if 'engineer' in (current_user.roles or '').split(',') else None
+        try:
+            report = self.fire_import.import_rows(
+                read_rows(file.stream, file.filename),
+                chunk_size=Config.IMPORT_CHUNK_SIZE,
+                allowed_regions=allowed_regions
+            )
+        except (ValueError, RuntimeError) as e:
+            logger.error(f"Error importing fires from {file.filename}: {str(e)}")
+            return jsonify({'error': str(e)}), 400
+
+        self._log_event(
+            current_user.username,
+            "Импорт",
+            "Fire",
+            0,
+            f"Импорт из {secure_filename(file.filename)}: добавлено {report['imported']} из {report['total']}"
+        )
+        logger.info(f"Imported {report['imported']} of {report['total']} fires, {report['failed']} failed")
+        return jsonify(report)
+
     @roles_required('admin', 'engineer')
     def edit_fire(self, fire_id):
         """Редактирование существующего пожара."""
@@ -198,7 +315,6 @@ class FireController:
             flash('У вас нет прав редактировать этот пожар.', 'danger')
             return redirect(url_for('fire.admin_dashboard'))
 
-        old_data = vars(fire).copy()
         form = FireForm(obj=fire)
         self._populate_form_choices(form)
 
@@ -213,14 +329,13 @@ class FireController:
                     fire.file_path = filename
                     logger.debug(f"New file uploaded: {filename}")
 
-                form.populate_obj(fire)
-                updated_fire = self.fire_analysis.update_fire(fire)
-                changes = [
-                    f"{key}: {old_data[key]} -> {getattr(updated_fire, key)}"
-                    for key in old_data
-                    if old_data[key] != getattr(updated_fire, key) and key != '_sa_instance_state'
-                ]
+                # В сущность (со слотами) переносятся только её поля, без file и csrf_token
+                for field in form:
+                    if field.name in FIRE_ENTITY_FIELDS:
+                        field.populate_obj(fire, field.name)
+                updated_fire, changes = self.fire_analysis.update_fire(fire)
                 if changes:
+                    changes = [f"{key}: {old} -> {new}" for key, (old, new) in changes.items()]
                     self._log_event(
                         current_user.username,
                         "Обновление",
@@ -231,6 +346,10 @@ class FireController:
                     logger.info(f"Fire {fire_id} updated: {changes}")
                 flash('Данные успешно обновлены!', 'success')
                 return redirect(url_for('fire.admin_dashboard'))
+            except ConcurrentUpdateError as e:
+                logger.warning(str(e))
+                flash('Запись уже изменена другим пользователем. Проверьте актуальные данные и повторите правку.', 'warning')
+                return redirect(url_for('fire.edit_fire', fire_id=fire_id))
             except Exception as e:
                 db.session.rollback()
                 logger.error(f"Error updating fire {fire_id}: {str(e)}")
@@ -246,45 +365,202 @@ class FireController:
     def delete_fire(self, fire_id):
         """Удаление пожара."""
         logger.debug(f"Processing delete_fire request for fire_id: {fire_id}")
-        fire = self.fire_analysis.fire_repository.get_by_id(fire_id)
-        if fire:
-            try:
-                self.fire_analysis.delete_fire(fire_id)
-                self._log_event(
-                    current_user.username,
-                    "Удаление",
-                    "Fire",
-                    fire_id,
-                    f"Удалена запись о пожаре с ID {fire_id}"
-                )
-                flash(f'Запись о пожаре с ID {fire_id} успешно удалена.', 'success')
-                logger.info(f"Fire {fire_id} deleted")
-            except Exception as e:
-                db.session.rollback()
-                logger.error(f"Error deleting fire {fire_id}: {str(e)}")
-                flash(f'Ошибка при удалении: {str(e)}', 'danger')
+        try:
+            deleted = self.fire_analysis.delete_fire(fire_id)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error deleting fire {fire_id}: {str(e)}")
+            flash(f'Ошибка при удалении: {str(e)}', 'danger')
+            return redirect(url_for('fire.admin_dashboard'))
+
+        if deleted:
+            self._log_event(
+                current_user.username,
+                "Удаление",
+                "Fire",
+                fire_id,
+                f"Удалена запись о пожаре с ID {fire_id}"
+            )
+            flash(f'Запись о пожаре с ID {fire_id} успешно удалена.', 'success')
+            logger.info(f"Fire {fire_id} deleted")
         else:
             logger.warning(f"Fire with ID {fire_id} not found")
             flash(f'Пожар с ID {fire_id} не найден.', 'danger')
         return redirect(url_for('fire.admin_dashboard'))
 
+    @roles_required('admin')
+    def delete_fires(self):
+        """Массовое удаление пожаров по списку id (JSON {"ids": [...]}) с одной записью аудита."""
+        ids = (request.get_json(silent=True) or {}).get('ids')
+        if not isinstance(ids, list) or not ids or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            return jsonify({'error': 'Ожидается непустой список целых id в поле ids'}), 400
+        if len(ids) > MAX_BULK_DELETE:
+            return jsonify({'error': f'Не более {MAX_BULK_DELETE} id за один запрос'}), 400
+
+        try:
+            deleted = self.fire_analysis.delete_many(ids)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error deleting {len(ids)} fires: {str(e)}")
+            return jsonify({'error': 'Ошибка при удалении', 'details': str(e)}), 500
+
+        if deleted:
+            self._log_event(
+                current_user.username,
+                "Удаление",
+                "Fire",
+                0,
+                f"Удалено записей о пожарах: {len(deleted)}; ID: {', '.join(map(str, deleted))}"
+            )
+        not_found = sorted(set(ids) - set(deleted))
+        logger.info(f"Bulk delete: {len(deleted)} fires deleted, {len(not_found)} not found")
+        return jsonify({'deleted': deleted, 'not_found': not_found})
+
     @roles_required('admin', 'engineer', 'analyst')
     def admin_dashboard(self):
         """Отображение админ-панели с данными о пожарах и логами."""
         logger.debug("Rendering admin_dashboard")
+        # Строки таблиц загружаются через fires_datatable и audit_logs_datatable
         if 'engineer' in (current_user.roles or '').split(','):
-            fires = self.fire_analysis.get_fires_by_region(current_user.region)
+            regions = [current_user.region]
         else:
-            fires = self.fire_analysis.fire_repository.get_all()
-        audit_logs = db.session.query(AuditLog).order_by(AuditLog.timestamp.desc()).all() if 'admin' in (current_user.roles or '').split(',') else []
-        logger.info(f"Fires count: {len(fires)}, Audit logs count: {len(audit_logs)}")
+            regions = self.region_ops.get_all_regions()
         return render_template(
             'admin_dashboard.html',
-            fires=fires,
-            audit_logs=audit_logs,
+            regions=regions,
             current_role=current_user.roles if current_user.is_authenticated else None
         )
 
+    @roles_required('admin', 'engineer', 'analyst')
+    def fires_datatable(self):
+        """Серверная обработка DataTables для таблицы пожаров."""
+        params = _datatable_request(FIRE_TABLE_COLUMNS)
+        filters = self._request_filters()
+        min_damage_area = request.args.get('min_damage_area', type=float)
+        if min_damage_area:
+            filters['min_damage_area'] = min_damage_area
+        page = self.fire_analysis.fire_repository.datatable_page(
+            params['start'], params['length'], params['search'], params['order'],
+            scope=self._region_scope(), filters=filters
+        )
+        logger.debug(f"Fires datatable: {len(page['fires'])} of {page['filtered']}/{page['total']}")
+        body = json_with_fires({
+            'draw': params['draw'],
+            'recordsTotal': page['total'],
+            'recordsFiltered': page['filtered'],
+        }, 'data', page['fires'])
+        return Response(body, mimetype='application/json')
+
+    @roles_required('admin')
+    def audit_logs_datatable(self):
+        """Серверная обработка DataTables для журнала аудита."""
+        params = _datatable_request(AUDIT_TABLE_COLUMNS)
+        page = AuditLogRepository.datatable_page(params['start'], params['length'], params['search'], params['order'])
+        return jsonify({
+            'draw': params['draw'],
+            'recordsTotal': page['total'],
+            'recordsFiltered': page['filtered'],
+            'data': [{
+                'timestamp': log.timestamp.isoformat(sep=' ', timespec='seconds'),
+                'username': log.username,
+                'action': log.action,
+                'table_name': log.table_name,
+                'record_id': log.record_id,
+                'changes': log.changes
+            } for log in page['logs']]
+        })
+
+    @roles_required('admin', 'engineer', 'analyst')
+    def fires_page(self):
+        """Страница пожаров в JSON с непрозрачным курсором для догрузки таблицы."""
+        try:
+            cursor = _decode_cursor(request.args.get('cursor'))
+        except ValueError as e:
+            logger.warning(str(e))
+            return jsonify({'error': 'Некорректный курсор'}), 400
+        limit = max(1, min(request.args.get('limit', PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+        fires = self.fire_analysis.fire_repository.page_after(cursor, limit, self._scope_filters())
+        next_cursor = _encode_cursor(fires[-1]) if len(fires) == limit else None
+        logger.debug(f"Fires page: {len(fires)} rows, next_cursor={next_cursor}")
+        return Response(json_with_fires({'next_cursor': next_cursor}, 'fires', fires), mimetype='application/json')
+
+    @roles_required('admin', 'engineer', 'analyst')
+    def aggregate_fires(self):
+        """Сводка пожаров по измерениям из параметра by через запятую (например, by=region,month)."""
+        by = [dimension.strip() for dimension in request.args.get('by', 'region').split(',') if dimension.strip()]
+        filters = self._request_filters()
+        scope = self._region_scope()
+
+        def build():
+            try:
+                result = self.fire_analysis.aggregate(by, filters.get('start_date'), filters.get('end_date'),
+                                                      filters.get('regions'), scope=scope)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            return jsonify(result)
+        return conditional_json(self.fire_analysis, build, scope)
+
+    @roles_required('admin', 'engineer', 'analyst')
+    def cube_fires(self):
+        """Срез куба ресурсов: keep — оставляемые оси (region, month, group, kind) через запятую,
+        фильтры region (можно несколько), start и end ('ГГГГ-ММ'), month (номера 1..12), group, kind."""
+        def listed(name):
+            value = request.args.get(name)
+            return [item.strip() for item in value.split(',') if item.strip()] if value else None
+
+        scope = self._region_scope()
+
+        def build():
+            try:
+                months = listed('month')
+                result = self.fire_analysis.slice_cube(
+                    keep=listed('keep') or [],
+                    regions=request.args.getlist('region'),
+                    start=request.args.get('start'),
+                    end=request.args.get('end'),
+                    months_of_year=[int(month) for month in months] if months else None,
+                    groups=listed('group'),
+                    kinds=listed('kind'),
+                    scope=scope,
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            return jsonify(result)
+        return conditional_json(self.fire_analysis, build, scope)
+
+    @roles_required('admin', 'engineer', 'analyst')
+    def stream_fires(self):
+        """Потоковая выгрузка пожаров: JSON-массив (format=json) или NDJSON (format=ndjson).
+
+        Пожары читаются пачками по STREAM_BATCH_SIZE и отправляются по мере чтения,
+        поэтому память не зависит от размера выгрузки.
+        """
+        output = request.args.get('format', 'json')
+        if output not in STREAM_FORMATS:
+            return jsonify({'error': 'Допустимые форматы: json, ndjson'}), 400
+        batches = self.fire_analysis.fire_repository.stream(self._scope_filters(), STREAM_BATCH_SIZE)
+        if output == 'ndjson':
+            chunks = iter_ndjson(batches)
+        else:
+            chunks = iter_json_array(batches)
+        logger.debug(f"Streaming fires as {output}")
+        return Response(stream_with_context(chunks), mimetype=STREAM_FORMATS[output])
+
+    @roles_required('admin')
+    def cache_stats(self):
+        """Счётчики кэша результатов аналитики (попадания, промахи, версия данных)."""
+        return jsonify(self.fire_analysis.cache.stats())
+
+    @roles_required('admin')
+    def pool_stats(self):
+        """Состояние пула соединений и время ожидания соединения при checkout."""
+        pool = db.engine.pool
+        stats = pool_metrics.snapshot()
+        stats['pool'] = pool.__class__.__name__
+        if hasattr(pool, 'checkedout'):
+            stats.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow())
+        return jsonify(stats)
+
     @staticmethod
     @login_required
     def download_file(filename):
@@ -302,7 +578,7 @@ class FireController:
     def export_audit(self):
         """Экспорт журнала аудита в CSV."""
         logger.debug("Processing export_audit request")
-        audit_logs = db.session.query(AuditLog).order_by(AuditLog.timestamp.desc()).all()
+        audit_logs = AuditLogRepository.get_all()
         output = io.StringIO()
         writer = csv.writer(output)
         writer.writerow(['Timestamp', 'Username', 'Action', 'Table Name', 'Record ID', 'Changes'])
@@ -344,14 +620,38 @@ class FireController:
             form.location.choices = []
             logger.debug("No region selected, location choices empty")
 
+    def _scope_filters(self) -> dict:
+        """Фильтры выборки пожаров: инженер видит только свой регион, остальные — по параметрам запроса."""
+        return {**self._request_filters(), **self._region_scope()}
+
+    def _region_scope(self) -> dict:
+        """Ограничение видимых пожаров по роли: инженер видит только свой регион."""
+        if 'engineer' in (current_user.roles or '').split(','):
+            return {'regions': [current_user.region]}
+        return {}
+
+    def _request_filters(self) -> dict:
+        """Фильтры пожаров из параметров запроса (start_date, end_date, region)."""
+        filters = {}
+        for key in ('start_date', 'end_date'):
+            value = request.args.get(key)
+            if value:
+                try:
+                    filters[key] = datetime.strptime(value, '%Y-%m-%d').date()
+                except ValueError:
+                    logger.warning(f"Invalid {key}: {value}")
+        if request.args.get('region'):
+            filters['regions'] = [request.args.get('region')]
+        return filters
+
     def _allowed_file(self, filename):
         """Проверка допустимого расширения файла."""
         allowed = '.' in filename and filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
         logger.debug(f"Checking file {filename}: Allowed={allowed}")
         return allowed
 
-    @retry(stop_after_attempt(3), wait_fixed(1), retry_if_exception_type(Exception))
     @staticmethod
+    @retry(stop_after_attempt(3), wait_fixed(1), retry_if_exception_type(Exception))
     def _log_event(username: str, action: str, table_name: str, record_id: int, changes: str = None):
         """Запись события в лог аудита с повторными попытками."""
         logger.debug(f"Logging event: {action} on {table_name} ID {record_id}")
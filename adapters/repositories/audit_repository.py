@@ -0,0 +1,39 @@
+from typing import List, Optional, Tuple, Dict
+from sqlalchemy import func, or_
+from infrastructure.database import db, read_only
+from core.models import AuditLog
+
+# Текстовые колонки, по которым выполняется поиск в журнале аудита
+SEARCH_COLUMNS = ('username', 'action', 'table_name', 'changes')
+
+class AuditLogRepository:
+    @staticmethod
+    @read_only
+    def get_all():
+        """Получить все записи журнала аудита, новые первыми"""
+        return db.session.query(AuditLog).order_by(AuditLog.timestamp.desc()).all()
+
+    @staticmethod
+    @read_only
+    def get_for_record(table_name: str, record_id: int) -> List[AuditLog]:
+        """История изменений одной записи (индекс table_name, record_id), новые первыми"""
+        return db.session.query(AuditLog).filter(AuditLog.table_name == table_name, AuditLog.record_id == record_id) \
+            .order_by(AuditLog.id.desc()).all()
+
+    @staticmethod
+    @read_only
+    def datatable_page(start: int, length: int, search: Optional[str] = None,
+                       order: Optional[List[Tuple[str, bool]]] = None) -> Dict:
+        """Страница журнала аудита для серверной обработки DataTables"""
+        query = db.session.query(AuditLog)
+        total = query.with_entities(func.count(AuditLog.id)).scalar()
+        filtered = total
+        if search:
+            pattern = f"%{search}%"
+            query = query.filter(or_(*(getattr(AuditLog, column).ilike(pattern) for column in SEARCH_COLUMNS)))
+            filtered = query.with_entities(func.count(AuditLog.id)).scalar()
+
+        order_by = [getattr(AuditLog, column).desc() if descending else getattr(AuditLog, column).asc()
+                    for column, descending in (order or [('timestamp', True)])]
+        logs = query.order_by(*order_by, AuditLog.id.desc()).offset(start).limit(length).all()
+        return {'total': total, 'filtered': filtered, 'logs': logs}
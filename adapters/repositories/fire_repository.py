@@ -1,9 +1,45 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
-from datetime import datetime
-from core.entities import FireEntity
-from infrastructure.database import db
-from core.models import Fire
+from typing import List, Optional, Dict, Tuple, Iterator, Sequence
+from dataclasses import fields
+from functools import lru_cache
+from datetime import datetime, date
+from decimal import Decimal
+import csv
+import io
+from sqlalchemy import Date, Float, cast, extract, func, or_, and_, select, insert, update, delete, tuple_, type_coerce
+from core.entities import FireEntity, FIRE_ENTITY_FIELDS
+from core.fire_metrics import SOURCE_COLUMNS, summary_row, summary_totals
+from core.time_buckets import BUCKETS, truncate
+from infrastructure.database import db, read_only, replica_reads
+from core.models import AuditLog, Fire, FireDailyRegionRollup
+
+# Колонки таблицы fires, заполняемые из FireEntity при вставке (version задаётся по умолчанию в БД)
+INSERT_COLUMNS = tuple(field.name for field in fields(FireEntity) if field.name not in ('id', 'version'))
+
+# Поля FireEntity, которые может изменить update
+UPDATE_COLUMNS = INSERT_COLUMNS
+
+# Максимум id в одном DELETE ... WHERE id IN (...) (ниже лимита параметров SQLite и PostgreSQL)
+DELETE_CHUNK_SIZE = 10000
+# Максимум ключей (date, region) в одном запросе очистки опустевших строк дневной сводки
+ROLLUP_KEYS_CHUNK_SIZE = 1000
+
+# Колонки Numeric, читаемые сразу как float (без промежуточного Decimal)
+FLOAT_COLUMNS = ('damage_area', 'damage_les', 'damage_les_lesopokryt', 'damage_les_verh', 'damage_not_les')
+
+# Текстовые колонки, по которым выполняется поиск в таблице пожаров
+SEARCH_COLUMNS = ('region', 'location', 'branch', 'forestry', 'quarter', 'allotment', 'description')
+
+# Суммируемые колонки дневной сводки fire_daily_region_rollup и исходные колонки fires
+ROLLUP_SUMS = SOURCE_COLUMNS
+ROLLUP_COLUMNS = ('fire_count',) + tuple(ROLLUP_SUMS)
+
+# Измерения группировки aggregate; для region, month и year достаточно дневной сводки
+GROUP_DIMENSIONS = ('region', 'location', 'branch', 'forestry', 'month', 'year')
+ROLLUP_DIMENSIONS = {'region', 'month', 'year'}
+
+class ConcurrentUpdateError(ValueError):
+    """Запись изменена другим пользователем после того, как была открыта на редактирование."""
 
 class FireRepository(ABC):
     @abstractmethod
@@ -18,152 +54,525 @@ class FireRepository(ABC):
     def get_by_region(self, region: str, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> List[FireEntity]:
         pass
 
+    @abstractmethod
+    def stream(self, filters: Optional[Dict] = None, batch_size: int = 1000) -> Iterator[List[FireEntity]]:
+        pass
+
+    @abstractmethod
+    def page_after(self, cursor: Optional[Tuple[date, int]] = None, limit: int = 50,
+                   filters: Optional[Dict] = None) -> List[FireEntity]:
+        pass
+
+    @abstractmethod
+    def datatable_page(self, start: int, length: int, search: Optional[str] = None,
+                       order: Optional[List[Tuple[str, bool]]] = None, scope: Optional[Dict] = None,
+                       filters: Optional[Dict] = None) -> Dict:
+        pass
+
     @abstractmethod
     def add(self, fire: FireEntity) -> FireEntity:
         pass
 
     @abstractmethod
-    def update(self, fire: FireEntity) -> FireEntity:
+    def add_many(self, fires: List[FireEntity]) -> int:
+        pass
+
+    @abstractmethod
+    def update(self, fire: FireEntity) -> Tuple[FireEntity, Dict[str, Tuple]]:
+        pass
+
+    @abstractmethod
+    def delete(self, fire_id: int) -> bool:
         pass
 
     @abstractmethod
-    def delete(self, fire_id: int) -> None:
+    def delete_many(self, fire_ids: List[int]) -> List[int]:
+        pass
+
+    @abstractmethod
+    def project(self, columns: Sequence[str], filters: Optional[Dict] = None) -> List[Tuple]:
         pass
 
     @abstractmethod
     def get_all_regions(self) -> List[str]:
         pass
 
+    @abstractmethod
+    def aggregate(self, by: Sequence[str], start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                  regions: Optional[List[str]] = None) -> List[Dict]:
+        pass
+
+    @abstractmethod
+    def timeseries(self, bucket: str, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                   regions: Optional[List[str]] = None) -> List[Tuple[date, str, int, float]]:
+        pass
+
+    @abstractmethod
+    def aggregate_by_region(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                            regions: Optional[List[str]] = None) -> Dict:
+        pass
+
+    @abstractmethod
+    def rebuild_rollup(self) -> int:
+        pass
+
+    @abstractmethod
+    def data_stamp(self) -> Tuple[int, int, int, Optional[datetime]]:
+        pass
+
 class SQLAlchemyFireRepository(FireRepository):
+    @read_only
     def get_all(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> List[FireEntity]:
-        query = db.session.query(Fire)
-        if start_date:
-            query = query.filter(Fire.date >= start_date)
-        if end_date:
-            query = query.filter(Fire.date <= end_date)
-        fires = query.order_by(Fire.date.desc()).all()
-        return [self._to_entity(fire) for fire in fires]
+        query = self._filter(_select_entities(), start_date, end_date)
+        return _fetch_entities(query.order_by(Fire.date.desc()))
 
     def get_by_id(self, fire_id: int) -> Optional[FireEntity]:
-        fire = db.session.query(Fire).get(fire_id)
-        return self._to_entity(fire) if fire else None
+        fires = _fetch_entities(_select_entities().where(Fire.id == fire_id))
+        return fires[0] if fires else None
 
+    @read_only
     def get_by_region(self, region: str, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> List[FireEntity]:
-        query = db.session.query(Fire).filter_by(region=region)
-        if start_date:
-            query = query.filter(Fire.date >= start_date)
-        if end_date:
-            query = query.filter(Fire.date <= end_date)
-        fires = query.order_by(Fire.date.desc()).all()
-        return [self._to_entity(fire) for fire in fires]
+        query = self._filter(_select_entities().where(Fire.region == region), start_date, end_date)
+        return _fetch_entities(query.order_by(Fire.date.desc()))
+
+    def stream(self, filters: Optional[Dict] = None, batch_size: int = 1000) -> Iterator[List[FireEntity]]:
+        """Потоковое чтение пожаров пачками по batch_size (date desc, id desc).
+
+        Использует yield_per (серверный курсор на PostgreSQL), поэтому в памяти одновременно
+        находится не более одной пачки строк и сущностей.
+        filters: необязательные start_date, end_date и regions.
+        """
+        query = self._filter(_select_entities(), **(filters or {})).order_by(Fire.date.desc(), Fire.id.desc())
+        to_entities = _row_mapper(FIRE_ENTITY_FIELDS, True)
+        with replica_reads():
+            result = db.session.execute(query.execution_options(yield_per=batch_size))
+        try:
+            for rows in result.partitions():
+                yield to_entities(rows)
+        finally:
+            result.close()
+
+    @read_only
+    def page_after(self, cursor: Optional[Tuple[date, int]] = None, limit: int = 50,
+                   filters: Optional[Dict] = None) -> List[FireEntity]:
+        """Страница пожаров после курсора (date, id) в порядке убывания даты (keyset-пагинация).
+
+        filters: необязательные start_date, end_date и regions.
+        """
+        query = self._filter(_select_entities(), **(filters or {}))
+        if cursor:
+            cursor_date, cursor_id = cursor
+            query = query.filter(or_(
+                Fire.date < cursor_date,
+                and_(Fire.date == cursor_date, Fire.id < cursor_id)
+            ))
+        return _fetch_entities(query.order_by(Fire.date.desc(), Fire.id.desc()).limit(limit))
+
+    @read_only
+    def datatable_page(self, start: int, length: int, search: Optional[str] = None,
+                       order: Optional[List[Tuple[str, bool]]] = None, scope: Optional[Dict] = None,
+                       filters: Optional[Dict] = None) -> Dict:
+        """Страница таблицы пожаров для серверной обработки DataTables.
+
+        scope ограничивает видимые записи (например, регион инженера) и учитывается в total,
+        filters и search — пользовательские фильтры, учитываются только в filtered.
+        order — список пар (имя колонки Fire, по убыванию).
+        """
+        base = self._filter(_select_entities(), **(scope or {}))
+        total = db.session.execute(base.with_only_columns(func.count(Fire.id))).scalar()
+
+        filters = dict(filters or {})
+        min_damage_area = filters.pop('min_damage_area', None)
+        query = self._filter(base, **filters)
+        if min_damage_area:
+            query = query.filter(Fire.damage_area >= min_damage_area)
+        if search:
+            pattern = f"%{search}%"
+            query = query.filter(or_(*(getattr(Fire, column).ilike(pattern) for column in SEARCH_COLUMNS)))
+        filtered = db.session.execute(query.with_only_columns(func.count(Fire.id))).scalar() \
+            if (filters or min_damage_area or search) else total
+
+        order_by = [getattr(Fire, column).desc() if descending else getattr(Fire, column).asc()
+                    for column, descending in (order or [('date', True)])]
+        fires = _fetch_entities(query.order_by(*order_by, Fire.id.desc()).offset(start).limit(length))
+        return {'total': total, 'filtered': filtered, 'fires': fires}
 
     def add(self, fire: FireEntity) -> FireEntity:
-        db_fire = Fire(
-            date=fire.date,
-            region=fire.region,
-            location=fire.location,
-            branch=fire.branch,
-            forestry=fire.forestry,
-            quarter=fire.quarter,
-            allotment=fire.allotment,
-            damage_area=fire.damage_area,
-            damage_les=fire.damage_les,
-            damage_les_lesopokryt=fire.damage_les_lesopokryt,
-            damage_les_verh=fire.damage_les_verh,
-            damage_not_les=fire.damage_not_les,
-            lo_flag=fire.lo_flag,
-            lo_people_count=fire.lo_people_count,
-            lo_technic_count=fire.lo_technic_count,
-            aps_flag=fire.aps_flag,
-            aps_people_count=fire.aps_people_count,
-            aps_technic_count=fire.aps_technic_count,
-            aps_aircraft_count=fire.aps_aircraft_count,
-            kps_flag=fire.kps_flag,
-            kps_people_count=fire.kps_people_count,
-            kps_technic_count=fire.kps_technic_count,
-            kps_aircraft_count=fire.kps_aircraft_count,
-            mio_flag=fire.mio_flag,
-            mio_people_count=fire.mio_people_count,
-            mio_technic_count=fire.mio_technic_count,
-            mio_aircraft_count=fire.mio_aircraft_count,
-            other_org_flag=fire.other_org_flag,
-            other_org_people_count=fire.other_org_people_count,
-            other_org_technic_count=fire.other_org_technic_count,
-            other_org_aircraft_count=fire.other_org_aircraft_count,
-            description=fire.description,
-            damage_tenge=fire.damage_tenge,
-            firefighting_costs=fire.firefighting_costs,
-            kpo=fire.kpo,
-            file_path=fire.file_path,
-            edited_by_engineer=False
-        )
-        db.session.add(db_fire)
-        db.session.commit()
-        return self._to_entity(db_fire)
+        try:
+            fire_id = db.session.execute(insert(Fire).values(self._to_row(fire))).inserted_primary_key[0]
+            self._apply_rollup([(fire.date, fire.region, _rollup_delta(fire, 1))])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return self.get_by_id(fire_id)
+
 
-    def update(self, fire: FireEntity) -> FireEntity:
-        db_fire = db.session.query(Fire).get(fire.id)
-        if not db_fire:
+    def add_many(self, fires: List[FireEntity]) -> int:
+        """Пакетная вставка пожаров в одной транзакции вместе с обновлением дневной сводки.
+
+        На PostgreSQL с psycopg2 используется COPY, на остальных СУБД — многострочный INSERT.
+        """
+        if not fires:
+            return 0
+        rows = [self._to_row(fire) for fire in fires]
+        try:
+            bind = db.session.get_bind()
+            if bind.dialect.name == 'postgresql' and bind.dialect.driver == 'psycopg2':
+                self._copy_rows(rows)
+            else:
+                db.session.execute(insert(Fire), rows)
+            self._apply_rollup([(fire.date, fire.region, _rollup_delta(fire, 1)) for fire in fires])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return len(rows)
+
+    def update(self, fire: FireEntity) -> Tuple[FireEntity, Dict[str, Tuple]]:
+        """Сохранение изменённых полей пожара с проверкой версии (compare-and-swap).
+
+        fire.version — версия, с которой началось редактирование. UPDATE затрагивает только
+        изменившиеся колонки и выполняется с условием version = fire.version; если запись уже
+        изменена другим пользователем, выбрасывается ConcurrentUpdateError.
+        Возвращает обновлённую сущность и изменения {поле: (старое, новое)} для журнала аудита.
+        """
+        current = self.get_by_id(fire.id)
+        if not current:
             raise ValueError(f"Пожар с ID {fire.id} не найден")
-        
-        for key, value in vars(fire).items():
-            if key != 'id':
-                setattr(db_fire, key, value)
-        
-        db.session.commit()
-        return self._to_entity(db_fire)
-
-    def delete(self, fire_id: int) -> None:
-        db_fire = db.session.query(Fire).get(fire_id)
-        if db_fire:
-            db.session.delete(db_fire)
+        if current.version != fire.version:
+            raise ConcurrentUpdateError(
+                f"Пожар с ID {fire.id} изменён другим пользователем (версия {current.version}, ожидалась {fire.version})"
+            )
+        changes = {
+            column: (getattr(current, column), getattr(fire, column))
+            for column in UPDATE_COLUMNS
+            if getattr(current, column) != getattr(fire, column)
+        }
+        if not changes:
+            return current, {}
+
+        old_values = (current.date, current.region, _rollup_delta(current, -1))
+        try:
+            result = db.session.execute(
+                update(Fire)
+                .where(Fire.id == fire.id, Fire.version == fire.version)
+                .values({**{column: new for column, (old, new) in changes.items()}, 'version': Fire.version + 1})
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount != 1:
+                raise ConcurrentUpdateError(f"Пожар с ID {fire.id} изменён другим пользователем")
+            self._apply_rollup([old_values, (fire.date, fire.region, _rollup_delta(fire, 1))])
             db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return self.get_by_id(fire.id), changes
+
+    def delete(self, fire_id: int) -> bool:
+        """Удаление пожара по ID; False, если пожар не найден."""
+        return bool(self.delete_many([fire_id]))
 
+    def delete_many(self, fire_ids: List[int]) -> List[int]:
+        """Удаление пожаров одним DELETE ... WHERE id IN (...) RETURNING на каждые DELETE_CHUNK_SIZE id.
+
+        RETURNING возвращает и колонки дневной сводки, поэтому она уменьшается без
+        предварительного SELECT. Все пачки удаляются в одной транзакции.
+        Возвращает id фактически удалённых пожаров.
+        """
+        fire_ids = sorted(set(fire_ids))
+        returning = [Fire.id, Fire.date, Fire.region, *(getattr(Fire, column) for column in ROLLUP_SUMS.values())]
+        deleted_rows = []
+        try:
+            for i in range(0, len(fire_ids), DELETE_CHUNK_SIZE):
+                chunk = fire_ids[i:i + DELETE_CHUNK_SIZE]
+                statement = delete(Fire).where(Fire.id.in_(chunk)).execution_options(synchronize_session=False)
+                if db.session.get_bind().dialect.delete_returning:
+                    rows = db.session.execute(statement.returning(*returning)).all()
+                else:
+                    rows = db.session.execute(select(*returning).where(Fire.id.in_(chunk))).all()
+                    db.session.execute(statement)
+                deleted_rows.extend(rows)
+            self._apply_rollup([(row.date, row.region, _rollup_delta(row, -1)) for row in deleted_rows])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return sorted(row.id for row in deleted_rows)
+
+    @read_only
+    def project(self, columns: Sequence[str], filters: Optional[Dict] = None) -> List[Tuple]:
+        """Кортежи значений колонок fires (в порядке columns) без создания сущностей.
+
+        Для агрегирующих вызывающих: колонки Numeric возвращаются как float.
+        filters: необязательные start_date, end_date и regions.
+        """
+        columns = tuple(columns)
+        query = self._filter(select(*_projection(columns)), **(filters or {}))
+        return _row_mapper(columns, False)(db.session.execute(query))
+
+    @read_only
     def get_all_regions(self) -> List[str]:
         regions = db.session.query(Fire.region).distinct().all()
         return [region[0] for region in regions]
 
-    def _to_entity(self, fire: Fire) -> FireEntity:
-        """Преобразование модели Fire в сущность FireEntity."""
-        if not fire:
-            return None
-        return FireEntity(
-            id=fire.id,
-            date=fire.date,
-            region=fire.region,
-            location=fire.location,
-            branch=fire.branch,
-            forestry=fire.forestry,
-            quarter=fire.quarter,
-            allotment=fire.allotment,
-            damage_area=float(fire.damage_area) if fire.damage_area else None,
-            damage_les=float(fire.damage_les) if fire.damage_les else None,
-            damage_les_lesopokryt=float(fire.damage_les_lesopokryt) if fire.damage_les_lesopokryt else None,
-            damage_les_verh=float(fire.damage_les_verh) if fire.damage_les_verh else None,
-            damage_not_les=float(fire.damage_not_les) if fire.damage_not_les else None,
-            lo_flag=fire.lo_flag,
-            lo_people_count=fire.lo_people_count,
-            lo_technic_count=fire.lo_technic_count,
-            aps_flag=fire.aps_flag,
-            aps_people_count=fire.aps_people_count,
-            aps_technic_count=fire.aps_technic_count,
-            aps_aircraft_count=fire.aps_aircraft_count,
-            kps_flag=fire.kps_flag,
-            kps_people_count=fire.kps_people_count,
-            kps_technic_count=fire.kps_technic_count,
-            kps_aircraft_count=fire.kps_aircraft_count,
-            mio_flag=fire.mio_flag,
-            mio_people_count=fire.mio_people_count,
-            mio_technic_count=fire.mio_technic_count,
-            mio_aircraft_count=fire.mio_aircraft_count,
-            other_org_flag=fire.other_org_flag,
-            other_org_people_count=fire.other_org_people_count,
-            other_org_technic_count=fire.other_org_technic_count,
-            other_org_aircraft_count=fire.other_org_aircraft_count,
-            description=fire.description,
-            damage_tenge=fire.damage_tenge,
-            firefighting_costs=fire.firefighting_costs,
-            kpo=fire.kpo,
-            file_path=fire.file_path,
-            edited_by_engineer=fire.edited_by_engineer
-        )
\ No newline at end of file
+    @read_only
+    def aggregate(self, by: Sequence[str], start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                  regions: Optional[List[str]] = None) -> List[Dict]:
+        """Строки сводки (core.fire_metrics.summary_row), сгруппированные в SQL по измерениям by.
+
+        by — непустой список из GROUP_DIMENSIONS; month выводится как 'ГГГГ-ММ', year — числом.
+        Если все измерения есть в дневной сводке, читается fire_daily_region_rollup
+        (не более дней × регионов строк), иначе — таблица fires. Строки упорядочены по измерениям.
+        """
+        by = tuple(dict.fromkeys(by))
+        unknown = [dimension for dimension in by if dimension not in GROUP_DIMENSIONS]
+        if not by or unknown:
+            raise ValueError(f"Недопустимые измерения группировки: {', '.join(unknown) or '(не заданы)'}")
+
+        if ROLLUP_DIMENSIONS.issuperset(by):
+            model = FireDailyRegionRollup
+            fire_count = func.sum(model.fire_count)
+            sums = [func.coalesce(func.sum(getattr(model, name)), 0).label(name) for name in ROLLUP_SUMS]
+        else:
+            model = Fire
+            fire_count = func.count(model.id)
+            sums = [func.coalesce(func.sum(getattr(model, column)), 0).label(name) for name, column in ROLLUP_SUMS.items()]
+        keys = []
+        for dimension in by:
+            if dimension == 'month':
+                keys.append((extract('year', model.date) * 100 + extract('month', model.date)).label('month'))
+            elif dimension == 'year':
+                keys.append(extract('year', model.date).label('year'))
+            else:
+                keys.append(getattr(model, dimension).label(dimension))
+
+        query = select(*keys, fire_count.label('fire_count'), func.max(model.date).label('date'), *sums)
+        query = self._filter(query, start_date, end_date, regions, model=model)
+        rows = db.session.execute(query.group_by(*keys).order_by(*keys)).all()
+
+        result = []
+        for row in rows:
+            values = row._mapping
+            dimensions = {dimension: values[dimension] for dimension in by}
+            # EXTRACT возвращает numeric на PostgreSQL и целое на SQLite
+            if 'month' in dimensions:
+                month = int(dimensions['month'])
+                dimensions['month'] = f"{month // 100:04d}-{month % 100:02d}"
+            if 'year' in dimensions:
+                dimensions['year'] = int(dimensions['year'])
+            result.append(summary_row(dimensions, values['fire_count'], values['date'], values))
+        return result
+
+    @read_only
+    def timeseries(self, bucket: str, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                   regions: Optional[List[str]] = None) -> List[Tuple[date, str, int, float]]:
+        """Кортежи (начало интервала, регион, пожаров, площадь) по интервалам bucket из дневной сводки.
+
+        Дата усекается в SQL: date_trunc на PostgreSQL, date()/strftime() на SQLite; на других
+        СУБД строки сводки по дням суммируются по интервалам в Python. Пустые интервалы не возвращаются.
+        """
+        if bucket not in BUCKETS:
+            raise ValueError(f"Недопустимый интервал: {bucket}")
+        rollup = FireDailyRegionRollup
+        key = _bucket_expression(rollup.date, bucket, db.session.get_bind().dialect.name)
+        query = select(
+            (rollup.date if key is None else key).label('bucket'),
+            rollup.region,
+            func.sum(rollup.fire_count),
+            func.coalesce(func.sum(rollup.damage_area), 0),
+        )
+        query = self._filter(query, start_date, end_date, regions, model=rollup)
+        rows = db.session.execute(query.group_by('bucket', rollup.region).order_by('bucket', rollup.region)).all()
+        if key is not None:
+            return [(_as_date(start), region, int(count), float(area)) for start, region, count, area in rows]
+
+        merged = {}
+        for day, region, count, area in rows:
+            total = merged.setdefault((truncate(_as_date(day), bucket), region), [0, 0.0])
+            total[0] += int(count)
+            total[1] += float(area)
+        return [(start, region, count, area) for (start, region), (count, area) in sorted(merged.items())]
+
+    def aggregate_by_region(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                            regions: Optional[List[str]] = None) -> Dict:
+        """Сводка по регионам (summary_data и totals) из дневной сводки fire_daily_region_rollup.
+
+        Регионы из get_all_regions() без пожаров за период (в пределах regions) входят в сводку
+        нулевыми строками, чтобы таблицы и карта показывали все регионы.
+        """
+        summary_data = self.aggregate(('region',), start_date, end_date, regions)
+        present = {row['region'] for row in summary_data}
+        missing = [region for region in self.get_all_regions()
+                   if region not in present and (not regions or region in regions)]
+        if missing:
+            zeros = dict.fromkeys(ROLLUP_SUMS, 0)
+            summary_data = sorted(summary_data + [summary_row({'region': region}, 0, None, zeros) for region in missing],
+                                  key=lambda row: row['region'])
+        return {'summary_data': summary_data, 'totals': summary_totals(summary_data)}
+
+    def rebuild_rollup(self) -> int:
+        """Полный пересчёт fire_daily_region_rollup из таблицы fires; возвращает число строк сводки."""
+        table = FireDailyRegionRollup.__table__
+        source = select(
+            Fire.date,
+            Fire.region,
+            func.count(Fire.id),
+            *(func.coalesce(func.sum(getattr(Fire, column)), 0) for column in ROLLUP_SUMS.values())
+        ).group_by(Fire.date, Fire.region)
+        try:
+            db.session.execute(delete(table))
+            db.session.execute(insert(table).from_select(['date', 'region', *ROLLUP_COLUMNS], source))
+            count = db.session.query(func.count()).select_from(table).scalar()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return count
+
+    @read_only
+    def data_stamp(self) -> Tuple[int, int, int, Optional[datetime]]:
+        """Дешёвая метка состояния пожаров без агрегации: (число пожаров, наибольший id,
+        id и время последней записи аудита по пожарам).
+
+        Добавление и удаление меняют первые два значения, изменение записи — запись аудита.
+        """
+        count, max_id = db.session.query(func.count(Fire.id), func.max(Fire.id)).one()
+        audit = db.session.query(AuditLog.id, AuditLog.timestamp).filter(AuditLog.table_name == 'Fire') \
+            .order_by(AuditLog.id.desc()).first()
+        audit_id, audit_time = audit if audit is not None else (0, None)
+        return count, max_id or 0, audit_id, audit_time
+
+    @staticmethod
+    def _apply_rollup(changes: List[Tuple[date, str, Dict]]) -> None:
+        """Применение дельт (дата, регион, изменения колонок) к дневной сводке в текущей транзакции.
+
+        Дельты по одному ключу суммируются; строки, в которых не осталось пожаров, удаляются.
+        """
+        merged = {}
+        for fire_date, region, delta in changes:
+            total = merged.setdefault((_as_date(fire_date), region), dict.fromkeys(ROLLUP_COLUMNS, 0))
+            for column, value in delta.items():
+                total[column] += value
+        rows = [{'date': key[0], 'region': key[1], **delta} for key, delta in merged.items() if any(delta.values())]
+        if not rows:
+            return
+
+        table = FireDailyRegionRollup.__table__
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert as upsert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as upsert
+            statement = upsert(table)
+            statement = statement.on_conflict_do_update(
+                index_elements=['date', 'region'],
+                set_={column: table.c[column] + statement.excluded[column] for column in ROLLUP_COLUMNS}
+            )
+            db.session.execute(statement, rows)
+        else:
+            for row in rows:
+                key = and_(table.c.date == row['date'], table.c.region == row['region'])
+                result = db.session.execute(
+                    update(table).where(key).values({column: table.c[column] + row[column] for column in ROLLUP_COLUMNS})
+                )
+                if result.rowcount == 0:
+                    db.session.execute(insert(table).values(row))
+
+        emptied = [(row['date'], row['region']) for row in rows if row['fire_count'] < 0]
+        for i in range(0, len(emptied), ROLLUP_KEYS_CHUNK_SIZE):
+            keys = emptied[i:i + ROLLUP_KEYS_CHUNK_SIZE]
+            db.session.execute(delete(table).where(table.c.fire_count <= 0, tuple_(table.c.date, table.c.region).in_(keys)))
+
+    @staticmethod
+    def _to_row(fire: FireEntity) -> Dict:
+        """Преобразование сущности в словарь колонок для вставки."""
+        row = {column: getattr(fire, column) for column in INSERT_COLUMNS}
+        row['edited_by_engineer'] = False
+        return row
+
+    @staticmethod
+    def _copy_rows(rows: List[Dict]) -> None:
+        """Загрузка строк в fires через COPY FROM STDIN (PostgreSQL)."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(['' if row[column] is None else row[column] for column in INSERT_COLUMNS])
+        buffer.seek(0)
+        cursor = db.session.connection().connection.cursor()
+        cursor.copy_expert(f"COPY fires ({', '.join(INSERT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+    @staticmethod
+    def _filter(query, start_date=None, end_date=None, regions=None, model=Fire):
+        """Применение фильтров по датам и регионам к запросу (по колонкам date и region модели)."""
+        if start_date:
+            query = query.filter(model.date >= _as_date(start_date))
+        if end_date:
+            query = query.filter(model.date <= _as_date(end_date))
+        if regions:
+            query = query.filter(model.region.in_(regions))
+        return query
+
+def _projection(columns: Sequence[str]) -> List:
+    """Колонки таблицы fires для select(); Numeric приводится к Float на уровне типа результата."""
+    table = Fire.__table__
+    return [type_coerce(table.c[name], Float()).label(name) if name in FLOAT_COLUMNS else table.c[name]
+            for name in columns]
+
+def _select_entities():
+    """select() всех колонок FireEntity без ORM-объектов Fire."""
+    return select(*_projection(FIRE_ENTITY_FIELDS))
+
+def _fetch_entities(query) -> List[FireEntity]:
+    return _row_mapper(FIRE_ENTITY_FIELDS, True)(db.session.execute(query))
+
+@lru_cache(maxsize=None)
+def _row_mapper(columns: Tuple[str, ...], to_entity: bool):
+    """Сгенерированная функция, преобразующая строки результата в список FireEntity или кортежей.
+
+    Строка распаковывается в локальные переменные одной операцией. Площади округляются до
+    масштаба колонки Numeric (как при чтении через Decimal); для сущностей нулевые площади
+    заменяются на None, как это всегда делал репозиторий, и сущность создаётся через
+    FireEntity.from_trusted без повторной проверки.
+    """
+    table = Fire.__table__
+    names = [f'c{i}' for i in range(len(columns))]
+    values = ', '.join(
+        (f'(round(float({name}), {table.c[column].type.scale}) if {name} else None)' if to_entity else
+         f'(round(float({name}), {table.c[column].type.scale}) if {name} is not None else None)')
+        if column in FLOAT_COLUMNS else name
+        for name, column in zip(names, columns)
+    )
+    item = f'new(({values},))' if to_entity else f'({values},)'
+    source = f"def map_rows(rows):\n    return [{item} for {', '.join(names)}, in rows]\n"
+    namespace = {'new': FireEntity.from_trusted}
+    exec(source, namespace)
+    return namespace['map_rows']
+
+def _bucket_expression(column, bucket: str, dialect: str):
+    """SQL-выражение начала интервала bucket для колонки даты или None, если СУБД не поддержана."""
+    if dialect == 'postgresql':
+        return cast(func.date_trunc(bucket, column), Date)
+    if dialect == 'sqlite':
+        if bucket == 'week':
+            # Ближайшее воскресенье не раньше даты минус 6 дней — понедельник той же недели
+            return type_coerce(func.date(column, 'weekday 0', '-6 days'), Date)
+        if bucket == 'month':
+            return type_coerce(func.strftime('%Y-%m-01', column), Date)
+        return column
+    return None
+
+def _as_date(value):
+    """Приведение datetime к date для сравнения с колонкой Fire.date."""
+    return value.date() if isinstance(value, datetime) else value
+
+def _rollup_delta(fire, sign: int) -> Dict:
+    """Вклад пожара (Fire или FireEntity) в строку дневной сводки со знаком sign (+1 или -1)."""
+    delta = {'fire_count': sign}
+    for column, source in ROLLUP_SUMS.items():
+        value = getattr(fire, source) or 0
+        if isinstance(value, float):
+            value = Decimal(str(value))
+        delta[column] = sign * value
+    return delta
@@ -0,0 +1,108 @@
+import gzip
+import os
+from typing import Dict, Iterable, Optional, Sequence
+from werkzeug.datastructures import Accept
+
+# Сжимаемые типы ответов: JSON, GeoJSON, текст, скрипты, стили и векторные тайлы
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/geo+json', 'application/javascript', 'text/javascript', 'text/css',
+    'text/html', 'text/plain', 'text/csv', 'image/svg+xml', 'application/vnd.mapbox-vector-tile',
+}
+# Статические файлы, для которых сборка пишет сжатые копии рядом с исходным файлом
+STATIC_EXTENSIONS = ('.js', '.css', '.json', '.geojson', '.svg', '.html')
+# Расширения сжатых копий по кодировке
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+def _brotli():
+    """Модуль brotli или None, если пакет не установлен (тогда используется только gzip)."""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+def available_encodings() -> Sequence[str]:
+    """Поддерживаемые кодировки в порядке предпочтения (brotli — только при установленном пакете)."""
+    return ('br', 'gzip') if _brotli() is not None else ('gzip',)
+
+def negotiate(accept: Accept, encodings: Optional[Iterable[str]] = None) -> Optional[str]:
+    """Кодировка из encodings с наибольшим весом в Accept-Encoding клиента; None — без сжатия.
+
+    При равных весах выбирается первая по порядку encodings (brotli перед gzip).
+    """
+    best, best_quality = None, 0
+    for encoding in encodings if encodings is not None else available_encodings():
+        quality = accept[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def compress(data: bytes, encoding: str, level: int = 6) -> bytes:
+    """Сжатие gzip (level 1..9) или brotli (level — quality 0..11)."""
+    if encoding == 'br':
+        return _brotli().compress(data, quality=level)
+    if encoding == 'gzip':
+        # mtime=0: одинаковое содержимое даёт одинаковые байты
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    raise ValueError(f"Неподдерживаемая кодировка: {encoding}")
+
+def compress_response(response, accept: Accept, min_size: int, gzip_level: int = 6, brotli_level: int = 5):
+    """Сжатие тела ответа по Accept-Encoding клиента (для after_request).
+
+    Сжимаются только полные ответы 200 сжимаемых типов размером от min_size байт; потоковые,
+    файловые и уже сжатые ответы не изменяются. Vary: Accept-Encoding добавляется ко всем
+    ответам сжимаемых типов, ETag сжатого ответа становится слабым (тот же ресурс в другой
+    кодировке), поэтому условные запросы по нему по-прежнему получают 304.
+    """
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers):
+        return response
+    data = response.get_data()
+    encoding = negotiate(accept) if len(data) >= min_size else None
+    if encoding is None:
+        return response
+    response.set_data(compress(data, encoding, brotli_level if encoding == 'br' else gzip_level))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+def precompressed_path(path: str, encoding: str) -> Optional[str]:
+    """Путь к сжатой копии файла, если она есть и не старше исходного файла."""
+    compressed = path + ENCODING_SUFFIXES[encoding]
+    try:
+        if os.path.getmtime(compressed) >= os.path.getmtime(path):
+            return compressed
+    except OSError:
+        pass
+    return None
+
+def write_precompressed(directory: str, min_size: int, encodings: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+    """Сжатые копии (.gz, .br) статических файлов STATIC_EXTENSIONS от min_size байт с наибольшим сжатием.
+
+    Возвращает {путь относительно directory: {'size': исходный размер, кодировка: размер копии}}.
+    """
+    encodings = tuple(encodings if encodings is not None else available_encodings())
+    levels = {'br': 11, 'gzip': 9}
+    report = {}
+    for root, _, names in os.walk(directory):
+        for name in sorted(names):
+            if not name.endswith(STATIC_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                data = f.read()
+            if len(data) < min_size:
+                continue
+            sizes = {'size': len(data)}
+            for encoding in encodings:
+                compressed = compress(data, encoding, levels[encoding])
+                with open(path + ENCODING_SUFFIXES[encoding], 'wb') as f:
+                    f.write(compressed)
+                sizes[encoding] = len(compressed)
+            report[os.path.relpath(path, directory)] = sizes
+    return report
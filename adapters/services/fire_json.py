@@ -0,0 +1,72 @@
+import json
+import math
+from datetime import date, datetime
+from decimal import Decimal
+from json.encoder import encode_basestring
+from operator import attrgetter
+from typing import Iterable, Iterator
+from core.entities import FIRE_ENTITY_FIELDS
+
+# Поля в порядке сортировки ключей (как у jsonify) и готовые префиксы "имя":
+_NAMES = tuple(sorted(FIRE_ENTITY_FIELDS))
+_KEYS = tuple(encode_basestring(name) + ':' for name in _NAMES)
+_values = attrgetter(*_NAMES)
+
+def _float(value: float) -> str:
+    # NaN и бесконечность недопустимы в JSON
+    return repr(value) if math.isfinite(value) else 'null'
+
+def _date(value) -> str:
+    return '"' + value.isoformat() + '"'
+
+def _decimal(value: Decimal) -> str:
+    return str(value) if value.is_finite() else 'null'
+
+# Кодирование значения по точному типу (bool проверяется отдельно от int)
+_ENCODERS = {
+    str: encode_basestring,
+    int: int.__repr__,
+    float: _float,
+    bool: lambda value: 'true' if value else 'false',
+    type(None): lambda value: 'null',
+    date: _date,
+    datetime: _date,
+    Decimal: _decimal,
+}
+
+def fire_to_json(fire) -> str:
+    """JSON-объект пожара (FireEntity или объект с теми же атрибутами) без промежуточного словаря.
+
+    Даты — в ISO 8601, Decimal — числом, строки — в UTF-8 без экранирования кириллицы.
+    """
+    encoders = _ENCODERS
+    return '{' + ','.join([
+        key + encoders[type(value)](value) for key, value in zip(_KEYS, _values(fire))
+    ]) + '}'
+
+def fires_to_json(fires: Iterable) -> str:
+    """JSON-массив пожаров одной строкой."""
+    return '[' + ','.join(map(fire_to_json, fires)) + ']'
+
+def json_with_fires(fields: dict, key: str, fires: Iterable) -> str:
+    """JSON-объект из полей fields и массива пожаров под ключом key."""
+    head = json.dumps(fields, ensure_ascii=False, separators=(',', ':'))
+    return head[:-1] + (',' if fields else '') + encode_basestring(key) + ':' + fires_to_json(fires) + '}'
+
+def iter_json_array(batches: Iterable[Iterable]) -> Iterator[str]:
+    """Фрагменты JSON-массива по одному на пачку пожаров (для потокового ответа)."""
+    yield '['
+    separator = ''
+    for batch in batches:
+        chunk = ','.join(map(fire_to_json, batch))
+        if chunk:
+            yield separator + chunk
+            separator = ','
+    yield ']'
+
+def iter_ndjson(batches: Iterable[Iterable]) -> Iterator[str]:
+    """Фрагменты NDJSON: по объекту пожара на строку, по одному фрагменту на пачку."""
+    for batch in batches:
+        chunk = '\n'.join(map(fire_to_json, batch))
+        if chunk:
+            yield chunk + '\n'
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+import threading
+from functools import lru_cache
+from typing import Callable, Dict, Optional
+from adapters.services.compression import compress, precompressed_path
+from adapters.services.region_geometry import GEOMETRY_LEVELS, build_levels
+
+class GeometryAsset:
+    """Файл геометрии регионов как неизменяемый ресурс с отпечатком содержимого в имени.
+
+    Файл читается один раз на процесс и не изменяется приложением; имя вида
+    regions.<sha256[:12]>.geojson меняется вместе с содержимым, поэтому ответ
+    можно бессрочно кэшировать в браузере и на прокси. Если файла нет, а задан build,
+    содержимое строится им (один раз на процесс).
+    """
+
+    def __init__(self, path: str, name: str = 'regions', build: Optional[Callable[[], bytes]] = None):
+        self.path = path
+        self.name = name
+        self.build = build
+        self._lock = threading.Lock()
+        self._data = None
+        self._fingerprint = None
+        self._encoded = {}  # кодировка (gzip, br) -> сжатое содержимое
+
+    @property
+    def data(self) -> bytes:
+        if self._data is None:
+            self._load()
+        return self._data
+
+    @property
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._load()
+        return self._fingerprint
+
+    @property
+    def filename(self) -> str:
+        return f'{self.name}.{self.fingerprint}.geojson'
+
+    def encoded(self, encoding: str) -> bytes:
+        """Содержимое в кодировке encoding: сжатая копия, записанная compress-static, или сжатие в памяти
+        (один раз на процесс)."""
+        data = self._encoded.get(encoding)
+        if data is None:
+            path = precompressed_path(self.path, encoding)
+            if path is not None:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            else:
+                data = compress(self.data, encoding, 9)
+            self._encoded[encoding] = data
+        return data
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._data is None:
+                if self.build is not None and not os.path.exists(self.path):
+                    data = self.build()
+                else:
+                    with open(self.path, 'rb') as f:
+                        data = f.read()
+                self._fingerprint = hashlib.sha256(data).hexdigest()[:12]
+                self._data = data
+
+def level_path(directory: str, level: str) -> str:
+    """Путь к файлу уровня детализации, записываемому командой build-region-geometry."""
+    return os.path.join(directory, f'regions-{level}.geojson')
+
+@lru_cache(maxsize=4)
+def _built_levels(source_path: str) -> Dict[str, bytes]:
+    with open(source_path, 'r', encoding='utf-8') as f:
+        return build_levels(json.load(f))
+
+def level_assets(source_path: str, directory: str) -> Dict[str, GeometryAsset]:
+    """Ресурсы уровней детализации (GEOMETRY_LEVELS): собранные файлы или построение из исходного GeoJSON."""
+    return {
+        level: GeometryAsset(level_path(directory, level), f'regions-{level}',
+                             build=lambda level=level: _built_levels(source_path)[level])
+        for level in GEOMETRY_LEVELS
+    }
+
+def write_levels(source_path: str, directory: str) -> Dict[str, int]:
+    """Сборка файлов всех уровней детализации; возвращает их размеры в байтах."""
+    with open(source_path, 'r', encoding='utf-8') as f:
+        levels = build_levels(json.load(f))
+    os.makedirs(directory, exist_ok=True)
+    for level, data in levels.items():
+        with open(level_path(directory, level), 'wb') as f:
+            f.write(data)
+    return {level: len(data) for level, data in levels.items()}
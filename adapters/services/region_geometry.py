@@ -0,0 +1,163 @@
+import json
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+# Уровни детализации карты: допуск упрощения (градусы), знаков координат после запятой
+# и наибольший масштаб Leaflet, для которого уровень достаточен (None — без ограничения)
+GEOMETRY_LEVELS = {
+    'low': {'tolerance': 0.01, 'precision': 3, 'max_zoom': 5},
+    'medium': {'tolerance': 0.002, 'precision': 4, 'max_zoom': 7},
+    'high': {'tolerance': 0.0003, 'precision': 5, 'max_zoom': None},
+}
+
+Point = Tuple[float, float]
+
+def _keep_mask(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """Маска точек, оставляемых алгоритмом Дугласа — Пекера (концы сохраняются всегда)."""
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        inner = points[first + 1:last] - points[first]
+        chord = points[last] - points[first]
+        length = np.hypot(*chord)
+        if length:
+            distances = np.abs(chord[0] * inner[:, 1] - chord[1] * inner[:, 0]) / length
+        else:
+            # Замкнутая дуга: расстояние до общей начальной и конечной точки
+            distances = np.hypot(inner[:, 0], inner[:, 1])
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            index = first + 1 + farthest
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return keep
+
+class RegionTopology:
+    """Полигоны регионов, разбитые на общие дуги между узлами (точками смены соседей).
+
+    Общая граница двух регионов — одна дуга, поэтому при упрощении она изменяется
+    одинаково для обоих и между регионами не появляется щелей и наложений.
+    """
+
+    def __init__(self, features: List[Dict], rings: List[List[Point]], arcs: List[List[Point]],
+                 ring_arcs: List[List[Tuple[int, bool]]]):
+        self.features = features  # {'region', 'polygons': [[номер кольца, ...], ...]}
+        self.rings = rings
+        self.arcs = arcs
+        self.ring_arcs = ring_arcs  # номер дуги и признак обратного направления
+
+    @classmethod
+    def from_geojson(cls, data: Dict) -> 'RegionTopology':
+        features, rings = [], []
+        for feature in data['features']:
+            geometry = feature['geometry']
+            polygons = geometry['coordinates'] if geometry['type'] == 'MultiPolygon' else [geometry['coordinates']]
+            numbers = []
+            for polygon in polygons:
+                ring_numbers = []
+                for ring in polygon:
+                    points = [(float(x), float(y)) for x, y in ring]
+                    if points[0] != points[-1]:
+                        points.append(points[0])
+                    ring_numbers.append(len(rings))
+                    rings.append(points)
+                numbers.append(ring_numbers)
+            features.append({'region': feature['properties'].get('region'), 'polygons': numbers})
+
+        owners = defaultdict(set)
+        for number, ring in enumerate(rings):
+            for point in ring[:-1]:
+                owners[point].add(number)
+        junctions = set()
+        for ring in rings:
+            points = ring[:-1]
+            for i, point in enumerate(points):
+                here = owners[point]
+                if len(here) > 1 and (owners[points[i - 1]] != here or owners[points[(i + 1) % len(points)]] != here):
+                    junctions.add(point)
+
+        arcs, arc_numbers, ring_arcs = [], {}, []
+        for ring in rings:
+            points = ring[:-1]
+            cuts = [i for i, point in enumerate(points) if point in junctions]
+            if cuts:
+                points = points[cuts[0]:] + points[:cuts[0]] + [points[cuts[0]]]
+                cuts = [i for i, point in enumerate(points) if point in junctions]
+                pieces = [points[start:end + 1] for start, end in zip(cuts, cuts[1:])]
+            else:
+                # Кольцо без узлов — одна замкнутая дуга с началом в наименьшей точке
+                start = points.index(min(points))
+                pieces = [points[start:] + points[:start] + [points[start]]]
+            refs = []
+            for piece in pieces:
+                key, reverse = tuple(piece), False
+                backward = tuple(reversed(piece))
+                if backward < key:
+                    key, reverse = backward, True
+                number = arc_numbers.get(key)
+                if number is None:
+                    number = arc_numbers[key] = len(arcs)
+                    arcs.append(list(key))
+                refs.append((number, reverse))
+            ring_arcs.append(refs)
+        return cls(features, rings, arcs, ring_arcs)
+
+    def simplify(self, tolerance: float, precision: int) -> Dict:
+        """GeoJSON с упрощёнными дугами и координатами, округлёнными до precision знаков.
+
+        Кольца, выродившиеся после упрощения, пропускаются (внутренние) или сохраняются
+        без упрощения (внешние); в свойствах остаётся только region.
+        """
+        simplified = []
+        for arc in self.arcs:
+            points = np.array(arc)
+            simplified.append(points[_keep_mask(points, tolerance)])
+
+        features = []
+        for feature in self.features:
+            polygons = []
+            for ring_numbers in feature['polygons']:
+                polygon = []
+                for position, number in enumerate(ring_numbers):
+                    ring = self._ring(number, simplified, precision)
+                    if ring is None:
+                        if position:
+                            continue
+                        ring = _rounded(np.array(self.rings[number]), precision)
+                    polygon.append(ring)
+                polygons.append(polygon)
+            geometry = {'type': 'Polygon', 'coordinates': polygons[0]} if len(polygons) == 1 else \
+                {'type': 'MultiPolygon', 'coordinates': polygons}
+            features.append({'type': 'Feature', 'properties': {'region': feature['region']}, 'geometry': geometry})
+        return {'type': 'FeatureCollection', 'features': features}
+
+    def _ring(self, number: int, simplified: Sequence[np.ndarray], precision: int) -> Optional[List[List[float]]]:
+        parts = []
+        for arc_number, reverse in self.ring_arcs[number]:
+            points = simplified[arc_number]
+            points = points[::-1] if reverse else points
+            parts.append(points if not parts else points[1:])
+        ring = _rounded(np.concatenate(parts), precision)
+        return ring if len(ring) >= 4 else None
+
+def _rounded(points: np.ndarray, precision: int) -> List[List[float]]:
+    """Координаты, округлённые до сетки precision знаков, без подряд идущих повторов."""
+    points = np.round(points, precision)
+    distinct = np.ones(len(points), dtype=bool)
+    distinct[1:] = np.any(points[1:] != points[:-1], axis=1)
+    return points[distinct].tolist()
+
+def build_levels(source: Dict, levels: Optional[Dict[str, Dict]] = None) -> Dict[str, bytes]:
+    """Компактный GeoJSON (UTF-8) каждого уровня детализации из исходного GeoJSON регионов."""
+    topology = RegionTopology.from_geojson(source)
+    return {
+        name: json.dumps(topology.simplify(level['tolerance'], level['precision']),
+                         ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        for name, level in (levels or GEOMETRY_LEVELS).items()
+    }
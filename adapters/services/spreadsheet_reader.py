@@ -0,0 +1,51 @@
+import csv
+import io
+from typing import Dict, Iterator, Tuple
+
+# Размер фрагмента для определения разделителя CSV
+SNIFF_SIZE = 4096
+
+def read_rows(stream, filename: str) -> Iterator[Tuple[int, Dict[str, object]]]:
+    """Потоковое чтение строк CSV/XLSX: пары (номер строки в файле, {заголовок: значение})."""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension == 'csv':
+        return _read_csv(stream)
+    if extension == 'xlsx':
+        return _read_xlsx(stream)
+    raise ValueError(f"Неподдерживаемый формат файла: {filename}")
+
+def _read_csv(stream) -> Iterator[Tuple[int, Dict[str, object]]]:
+    """Чтение CSV (UTF-8, разделитель «,», «;» или табуляция)."""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    sample = text.read(SNIFF_SIZE)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(text, dialect)
+    header = next(reader, None)
+    if header is None:
+        return
+    for row_number, values in enumerate(reader, start=2):
+        if any(value.strip() for value in values):
+            yield row_number, dict(zip(header, values))
+
+def _read_xlsx(stream) -> Iterator[Tuple[int, Dict[str, object]]]:
+    """Чтение первого листа XLSX в режиме read_only."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError as e:
+        raise RuntimeError("Для импорта XLSX необходим пакет openpyxl") from e
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [str(cell).strip() if cell is not None else '' for cell in header]
+        for row_number, values in enumerate(rows, start=2):
+            if any(value not in (None, '') for value in values):
+                yield row_number, dict(zip(header, values))
+    finally:
+        workbook.close()
@@ -0,0 +1,251 @@
+import hashlib
+import json
+import math
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from adapters.services.region_geometry import RegionTopology
+
+# Размер тайла в координатах MVT и запас за краем тайла (чтобы не было видно швов при отрисовке)
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+TILE_LAYER = 'regions'
+
+# Типы геометрии и команды MVT 2.1
+_POLYGON = 3
+_MOVE_TO, _LINE_TO, _CLOSE_PATH = 1, 2, 7
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+def _field(number: int, payload: bytes) -> bytes:
+    """Поле protobuf с типом length-delimited."""
+    return _varint(number << 3 | 2) + _varint(len(payload)) + payload
+
+def _packed(number: int, values: Sequence[int]) -> bytes:
+    return _field(number, b''.join(_varint(value) for value in values))
+
+def _value(value) -> bytes:
+    """Сообщение Value: строки, целые (sint64) и дробные (double) значения свойств."""
+    if isinstance(value, str):
+        return _field(1, value.encode('utf-8'))
+    if isinstance(value, float):
+        return _varint(3 << 3 | 1) + struct.pack('<d', value)
+    return _varint(6 << 3) + _varint(_zigzag(int(value)))
+
+def _command(command: int, count: int) -> int:
+    return (command & 0x7) | (count << 3)
+
+def encode_geometry(rings: Sequence[np.ndarray]) -> List[int]:
+    """Команды геометрии полигона MVT по кольцам целых координат тайла (без замыкающей точки)."""
+    commands, cursor = [], (0, 0)
+    for ring in rings:
+        x0, y0 = int(ring[0][0]), int(ring[0][1])
+        commands += [_command(_MOVE_TO, 1), _zigzag(x0 - cursor[0]), _zigzag(y0 - cursor[1])]
+        commands.append(_command(_LINE_TO, len(ring) - 1))
+        previous = (x0, y0)
+        for x, y in ring[1:]:
+            x, y = int(x), int(y)
+            commands += [_zigzag(x - previous[0]), _zigzag(y - previous[1])]
+            previous = (x, y)
+        commands.append(_command(_CLOSE_PATH, 1))
+        cursor = previous
+    return commands
+
+def encode_tile(features: Sequence[Tuple[Dict, Sequence[np.ndarray]]], layer: str = TILE_LAYER) -> bytes:
+    """Тайл MVT из одного слоя: features — пары (свойства, кольца полигона в координатах тайла)."""
+    if not features:
+        return b''
+    keys, values, body = {}, {}, b''
+    for number, (properties, rings) in enumerate(features, start=1):
+        tags = []
+        for key, value in properties.items():
+            tags.append(keys.setdefault(key, len(keys)))
+            tags.append(values.setdefault((type(value).__name__, value), len(values)))
+        feature = _varint(1 << 3) + _varint(number) + _packed(2, tags) + _varint(3 << 3) + _varint(_POLYGON) \
+            + _packed(4, encode_geometry(rings))
+        body += _field(2, feature)
+    message = _varint(15 << 3) + _varint(2) + _field(1, layer.encode('utf-8')) + body \
+        + b''.join(_field(3, key.encode('utf-8')) for key in keys) \
+        + b''.join(_field(4, _value(value)) for _, value in values) \
+        + _varint(5 << 3) + _varint(TILE_EXTENT)
+    return _field(3, message)
+
+def _project(points: np.ndarray, zoom: int) -> np.ndarray:
+    """Долгота/широта -> координаты Web Mercator в единицах TILE_EXTENT на тайл масштаба zoom."""
+    scale = TILE_EXTENT * 2 ** zoom
+    lon, lat = points[:, 0], np.radians(np.clip(points[:, 1], -85.0511, 85.0511))
+    x = (lon + 180.0) / 360.0 * scale
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / math.pi) / 2.0 * scale
+    return np.column_stack([x, y])
+
+def _clip(ring: np.ndarray, low: float, high: float) -> np.ndarray:
+    """Отсечение кольца квадратом [low, high]² (Сазерленд — Ходжман), кольцо без замыкающей точки."""
+    for axis, bound, inside in ((0, low, np.greater_equal), (0, high, np.less_equal),
+                                (1, low, np.greater_equal), (1, high, np.less_equal)):
+        if not len(ring):
+            break
+        following = np.roll(ring, -1, axis=0)
+        here, there = inside(ring[:, axis], bound), inside(following[:, axis], bound)
+        output = []
+        for point, after, point_in, after_in in zip(ring, following, here, there):
+            if point_in:
+                output.append(point)
+            if point_in != after_in:
+                t = (bound - point[axis]) / (after[axis] - point[axis])
+                output.append(point + t * (after - point))
+        ring = np.array(output).reshape(-1, 2)
+    return ring
+
+def _tile_ring(ring: np.ndarray, exterior: bool) -> Optional[np.ndarray]:
+    """Целочисленное кольцо тайла без повторов; внешнее — с положительной площадью, внутреннее — с отрицательной."""
+    ring = np.rint(ring).astype(np.int64)
+    distinct = np.ones(len(ring), dtype=bool)
+    distinct[1:] = np.any(ring[1:] != ring[:-1], axis=1)
+    ring = ring[distinct]
+    if len(ring) > 1 and (ring[0] == ring[-1]).all():
+        ring = ring[:-1]
+    if len(ring) < 3:
+        return None
+    x, y = ring[:, 0], ring[:, 1]
+    area = np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y)
+    if area == 0:
+        return None
+    return ring if (area > 0) == exterior else ring[::-1]
+
+class RegionTiles:
+    """Векторные тайлы границ регионов с показателями пожаров и кэшем на диске.
+
+    Геометрия упрощается для каждого масштаба (допуск — около пикселя экрана) по общим
+    дугам RegionTopology и отсекается по тайлу с запасом TILE_BUFFER. Тайлы кэшируются
+    в <cache_dir>/<версия>/<z>/<x>/<y>.pbf; версия зависит от геометрии и показателей,
+    поэтому после изменения пожаров старые тайлы не используются. Каталоги прежних версий
+    удаляются не при запросах, а командой prune-tile-cache (prune).
+    """
+
+    def __init__(self, source_path: str, cache_dir: str, max_zoom: int = 12):
+        self.source_path = source_path
+        self.cache_dir = cache_dir
+        self.max_zoom = max_zoom
+        self._lock = threading.Lock()
+        self._topology = None
+        self._fingerprint = None
+        self._zooms = {}  # масштаб -> [(регион, [[внешнее кольцо, отверстия...], ...], рамка)]
+
+    def version(self, metrics: Dict[str, Dict]) -> str:
+        """Версия данных тайлов: отпечаток исходной геометрии и показателей регионов."""
+        self._load()
+        payload = json.dumps(metrics, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        return hashlib.sha256(self._fingerprint.encode('ascii') + payload).hexdigest()[:16]
+
+    def tile(self, z: int, x: int, y: int, metrics: Dict[str, Dict], version: Optional[str] = None) -> bytes:
+        """Тайл z/x/y из кэша на диске или построенный и сохранённый в кэш."""
+        if not 0 <= z <= self.max_zoom or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            raise ValueError(f"Тайл вне допустимого диапазона: {z}/{x}/{y}")
+        version = version or self.version(metrics)
+        path = os.path.join(self.cache_dir, version, str(z), str(x), f'{y}.pbf')
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            pass
+        data = self.render(z, x, y, metrics)
+        self._store(path, data)
+        return data
+
+    def render(self, z: int, x: int, y: int, metrics: Dict[str, Dict]) -> bytes:
+        """Построение тайла без кэша."""
+        low, high = -TILE_BUFFER, TILE_EXTENT + TILE_BUFFER
+        offset = np.array([x * TILE_EXTENT, y * TILE_EXTENT], dtype=np.float64)
+        features = []
+        for region, polygons, (left, top, right, bottom) in self._zoom(z):
+            if right - offset[0] < low or left - offset[0] > high or bottom - offset[1] < low or top - offset[1] > high:
+                continue
+            tile_rings = []
+            for polygon in polygons:
+                exterior = _tile_ring(_clip(polygon[0] - offset, low, high), True)
+                if exterior is None:
+                    continue
+                tile_rings.append(exterior)
+                for hole in polygon[1:]:
+                    clipped = _tile_ring(_clip(hole - offset, low, high), False)
+                    if clipped is not None:
+                        tile_rings.append(clipped)
+            if tile_rings:
+                properties = {'region': region, **metrics.get(region, {'fire_count': 0, 'damage_area': 0.0,
+                                                                      'damage_tenge': 0})}
+                features.append((properties, tile_rings))
+        return encode_tile(features)
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._topology is None:
+                with open(self.source_path, 'rb') as f:
+                    data = f.read()
+                self._fingerprint = hashlib.sha256(data).hexdigest()[:12]
+                self._topology = RegionTopology.from_geojson(json.loads(data))
+
+    def _zoom(self, z: int) -> List:
+        projected = self._zooms.get(z)
+        if projected is None:
+            self._load()
+            tolerance = 360.0 / (256 * 2 ** z)
+            data = self._topology.simplify(tolerance, 7)
+            projected = []
+            for feature in data['features']:
+                geometry = feature['geometry']
+                polygons = geometry['coordinates'] if geometry['type'] == 'MultiPolygon' else [geometry['coordinates']]
+                polygons = [[_project(np.array(ring[:-1]), z) for ring in polygon] for polygon in polygons]
+                points = np.concatenate([polygon[0] for polygon in polygons])
+                projected.append((feature['properties']['region'], polygons,
+                                  (*points.min(axis=0), *points.max(axis=0))))
+            self._zooms[z] = projected
+        return projected
+
+    def prune(self, keep: Optional[str] = None, max_age: float = 3600) -> List[str]:
+        """Удаление каталогов версий, в которые не записывались тайлы дольше max_age секунд
+        (кроме keep); возвращает удалённые версии."""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        removed, deadline = [], time.time() - max_age
+        for name in sorted(os.listdir(self.cache_dir)):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stale = name != keep and os.path.getmtime(path) < deadline
+            except FileNotFoundError:
+                continue
+            if stale:
+                shutil.rmtree(path, ignore_errors=True)
+                removed.append(name)
+        return removed
+
+    def _store(self, path: str, data: bytes) -> None:
+        """Атомарная запись тайла; время изменения каталога версии отмечает последнюю запись (для prune).
+
+        Если каталог удалён во время записи (prune в другом процессе), тайл просто не кэшируется.
+        """
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(descriptor, 'wb') as f:
+                f.write(data)
+            os.replace(temporary, path)
+            os.utime(os.path.dirname(os.path.dirname(os.path.dirname(path))))
+        except FileNotFoundError:
+            pass
@@ -1,15 +1,26 @@
-from flask import Flask, jsonify, request, render_template
+import click
+from flask import Flask, Response, abort, jsonify, request, render_template, send_file, url_for
 from flask_login import LoginManager, current_user, login_required
-from infrastructure.database import db
-from adapters.controllers.fire_controller import FireController, fire_bp
-from adapters.controllers.dashboard_controller import dashboard_bp, DashboardController, init_dashboard
+from infrastructure.database import db, init_engine
+from adapters.controllers.fire_controller import FireController, conditional_json, fire_bp
+from adapters.controllers.dashboard_controller import dashboard_bp, DashboardController
 from adapters.repositories.fire_repository import SQLAlchemyFireRepository
 from adapters.repositories.region_repository import SQLAlchemyRegionRepository
-from core.models import User
+from adapters.services.compression import ENCODING_SUFFIXES, compress_response, negotiate, precompressed_path, \
+    write_precompressed
+from adapters.services.geometry_asset import GeometryAsset, level_assets, write_levels
+from adapters.services.region_geometry import GEOMETRY_LEVELS
+from adapters.services.vector_tiles import RegionTiles
+from adapters.services.spreadsheet_reader import read_rows
+from use_cases.result_cache import ResultCache
+from core.models import User, Fire, FireDailyRegionRollup
 from sqlalchemy.sql import text
+from werkzeug.security import safe_join
 from datetime import datetime
 import json
 import logging
+import mimetypes
+import os
 from adapters.controllers import user_controller
 
 # Настройка логирования
@@ -20,7 +31,7 @@ def create_app():
     app = Flask(__name__)
     app.config.from_object('config.Config')
 
-    db.init_app(app)
+    init_engine(app)
 
     login_manager = LoginManager()
     login_manager.init_app(app)
@@ -39,9 +50,14 @@ def create_app():
     fire_repository = SQLAlchemyFireRepository()
     region_repository = SQLAlchemyRegionRepository()
 
-    fire_controller = FireController(fire_repository, region_repository)
-    dashboard_controller = DashboardController(fire_repository)
-    init_dashboard(fire_repository)
+    # Общий кэш аналитики: запись через любой контроллер сбрасывает результаты всех представлений
+    result_cache = ResultCache(app.config['RESULT_CACHE_MAX_ENTRIES'], app.config['RESULT_CACHE_TTL'])
+    fire_controller = FireController(fire_repository, region_repository, result_cache)
+    dashboard_controller = DashboardController(fire_repository, result_cache)
+    fire_analysis = fire_controller.fire_analysis
+    region_geometry = GeometryAsset(app.config['REGION_GEOMETRY_PATH'])
+    geometry_levels = level_assets(app.config['REGION_GEOMETRY_PATH'], app.config['REGION_GEOMETRY_DIR'])
+    region_tiles = RegionTiles(app.config['REGION_GEOMETRY_PATH'], app.config['TILE_CACHE_DIR'], app.config['TILE_MAX_ZOOM'])
 
     fire_bp.add_url_rule('/', 'home', FireController.home)
     fire_bp.add_url_rule('/login', 'login', FireController.login, methods=['GET', 'POST'])
@@ -49,15 +65,89 @@ def create_app():
     fire_bp.add_url_rule('/form', 'add_fire', fire_controller.add_fire, methods=['GET', 'POST'])
     fire_bp.add_url_rule('/edit/<int:fire_id>', 'edit_fire', fire_controller.edit_fire, methods=['GET', 'POST'])
     fire_bp.add_url_rule('/delete/<int:fire_id>', 'delete_fire', fire_controller.delete_fire, methods=['POST'])
+    fire_bp.add_url_rule('/api/fires/delete', 'delete_fires', fire_controller.delete_fires, methods=['POST'])
     fire_bp.add_url_rule('/admin-dashboard', 'admin_dashboard', fire_controller.admin_dashboard)
+    fire_bp.add_url_rule('/api/fires/page', 'fires_page', fire_controller.fires_page)
+    fire_bp.add_url_rule('/api/fires/stream', 'stream_fires', fire_controller.stream_fires)
+    fire_bp.add_url_rule('/api/fires/aggregate', 'aggregate_fires', fire_controller.aggregate_fires)
+    fire_bp.add_url_rule('/api/fires/cube', 'cube_fires', fire_controller.cube_fires)
+    fire_bp.add_url_rule('/api/fires/import', 'import_fires', fire_controller.import_fires, methods=['POST'])
+    fire_bp.add_url_rule('/api/fires/datatable', 'fires_datatable', fire_controller.fires_datatable)
+    fire_bp.add_url_rule('/api/audit-logs/datatable', 'audit_logs_datatable', fire_controller.audit_logs_datatable)
     fire_bp.add_url_rule('/download/<filename>', 'download_file', FireController.download_file, methods=['GET'])
     fire_bp.add_url_rule('/export-audit', 'export_audit', fire_controller.export_audit)
+    fire_bp.add_url_rule('/api/cache/stats', 'cache_stats', fire_controller.cache_stats)
+    fire_bp.add_url_rule('/api/pool/stats', 'pool_stats', fire_controller.pool_stats)
 
     app.register_blueprint(fire_bp)
     app.register_blueprint(dashboard_bp)
     app.register_blueprint(user_controller.user_bp, url_prefix='/users')
 
 
+    @app.cli.command('import-fires')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--chunk-size', default=app.config['IMPORT_CHUNK_SIZE'], show_default=True,
+                  help='Строк в одной транзакции')
+    def import_fires_command(path, chunk_size):
+        """Массовый импорт пожаров из CSV/XLSX с отчётом об ошибках."""
+        with open(path, 'rb') as stream:
+            report = fire_controller.fire_import.import_rows(read_rows(stream, path), chunk_size=chunk_size)
+        click.echo(json.dumps(report, ensure_ascii=False, indent=2))
+
+    @app.cli.command('rebuild-fire-rollup')
+    def rebuild_fire_rollup_command():
+        """Полный пересчёт дневной сводки fire_daily_region_rollup из таблицы fires."""
+        count = fire_repository.rebuild_rollup()
+        result_cache.bump_version()
+        click.echo(f"Дневная сводка пересчитана: {count} строк")
+
+    @app.cli.command('build-region-geometry')
+    def build_region_geometry_command():
+        """Сборка упрощённой геометрии регионов по уровням детализации карты."""
+        sizes = write_levels(app.config['REGION_GEOMETRY_PATH'], app.config['REGION_GEOMETRY_DIR'])
+        for level, size in sizes.items():
+            click.echo(f"{level}: {size / 1024:.0f} КБ")
+
+    @app.cli.command('prune-tile-cache')
+    @click.option('--max-age', default=3600, show_default=True, help='Секунд без записи, после которых версия удаляется')
+    def prune_tile_cache_command(max_age):
+        """Удаление устаревших версий кэша векторных тайлов (кроме текущей)."""
+        metrics = _region_metrics(fire_analysis.get_region_aggregates()['summary_data'])
+        removed = region_tiles.prune(keep=region_tiles.version(metrics), max_age=max_age)
+        click.echo(f"Удалено версий кэша тайлов: {len(removed)}")
+
+    @app.cli.command('compress-static')
+    def compress_static_command():
+        """Сжатые копии (.gz, .br) статических файлов для отдачи без сжатия на лету."""
+        report = write_precompressed(app.static_folder, app.config['COMPRESS_MIN_SIZE'])
+        for name, sizes in report.items():
+            encoded = ', '.join(f"{encoding} {sizes[encoding] / 1024:.0f} КБ" for encoding in ENCODING_SUFFIXES
+                                if encoding in sizes)
+            click.echo(f"{name}: {sizes['size'] / 1024:.0f} КБ -> {encoded}")
+
+    def static_file(filename):
+        """Статический файл; сжатая копия (flask compress-static), если клиент принимает её кодировку."""
+        path = safe_join(app.static_folder, filename)
+        encoding = None
+        if path is not None and os.path.isfile(path):
+            encoding = negotiate(request.accept_encodings,
+                                 [encoding for encoding in ENCODING_SUFFIXES if precompressed_path(path, encoding)])
+        if encoding is None:
+            return app.send_static_file(filename)
+        response = send_file(precompressed_path(path, encoding), mimetype=mimetypes.guess_type(filename)[0],
+                             max_age=app.get_send_file_max_age(filename))
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        return response
+
+    app.view_functions['static'] = static_file
+
+    @app.after_request
+    def compress_dynamic_response(response):
+        # JSON и другие сжимаемые ответы от COMPRESS_MIN_SIZE байт — gzip или brotli по Accept-Encoding
+        return compress_response(response, request.accept_encodings, app.config['COMPRESS_MIN_SIZE'],
+                                 app.config['COMPRESS_GZIP_LEVEL'], app.config['COMPRESS_BROTLI_LEVEL'])
+
     @app.route('/api/fires', methods=['GET'])
     @login_required
     def get_fires_data():
@@ -68,145 +158,117 @@ def create_app():
 
             logger.debug(f"Получены параметры: start_date={start_date}, end_date={end_date}, regions={regions}")
 
-            fires = fire_repository.get_all()
-
             # Приведение типов дат к datetime.date
             if start_date:
                 start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-                fires = [f for f in fires if f.date and f.date >= start_date]
             if end_date:
                 end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-                fires = [f for f in fires if f.date and f.date <= end_date]
-            if regions and 'all' not in regions:
-                fires = [f for f in fires if f.region in regions]
-
-            logger.debug(f"API /api/fires: Найдено {len(fires)} пожаров после фильтрации")
-
-            region_data = {}
-            for fire in fires:
-                region = fire.region
-                if region not in region_data:
-                    region_data[region] = {
-                        'region': region,
-                        'fire_count': 0,
-                        'total_damage_area': 0,
-                        'total_damage_tenge': 0,
-                        'total_people': 0,
-                        'total_technic': 0,
-                        'total_aircraft': 0,
-                        'aps_people': 0,
-                        'aps_technic': 0,
-                        'aps_aircraft': 0,
-                        'date': fire.date.strftime('%Y-%m-%d') if fire.date else None
-                    }
-                region_data[region]['fire_count'] += 1
-                region_data[region]['total_damage_area'] += fire.damage_area or 0
-                region_data[region]['total_damage_tenge'] += fire.damage_tenge or 0
-                region_data[region]['total_people'] += (
-                    (fire.lo_people_count or 0) + (fire.aps_people_count or 0) +
-                    (fire.kps_people_count or 0) + (fire.mio_people_count or 0) +
-                    (fire.other_org_people_count or 0)
-                )
-                region_data[region]['total_technic'] += (
-                    (fire.lo_technic_count or 0) + (fire.aps_technic_count or 0) +
-                    (fire.kps_technic_count or 0) + (fire.mio_technic_count or 0) +
-                    (fire.other_org_technic_count or 0)
-                )
-                region_data[region]['total_aircraft'] += (
-                    (fire.aps_aircraft_count or 0) + (fire.kps_aircraft_count or 0) +
-                    (fire.mio_aircraft_count or 0) + (fire.other_org_aircraft_count or 0)
-                )
-                region_data[region]['aps_people'] += fire.aps_people_count or 0
-                region_data[region]['aps_technic'] += fire.aps_technic_count or 0
-                region_data[region]['aps_aircraft'] += fire.aps_aircraft_count or 0
-
-            summary_data = list(region_data.values())
-            totals = {
-                'fire_count': sum(row['fire_count'] for row in summary_data),
-                'damage_area': sum(row['total_damage_area'] for row in summary_data),
-                'damage_tenge': sum(row['total_damage_tenge'] for row in summary_data),
-                'people': sum(row['total_people'] for row in summary_data),
-                'technic': sum(row['total_technic'] for row in summary_data),
-                'aircraft': sum(row['total_aircraft'] for row in summary_data),
-                'aps_people': sum(row['aps_people'] for row in summary_data),
-                'aps_technic': sum(row['aps_technic'] for row in summary_data),
-                'aps_aircraft': sum(row['aps_aircraft'] for row in summary_data)
-            }
+            if 'all' in regions:
+                regions = []
 
-            try:
-                with open('static/regions.geojson', 'r', encoding='utf-8') as f:
-                    geojson_data = json.load(f)
-                region_damage = {row['region']: row['total_damage_area'] for row in summary_data}
-                for feature in geojson_data['features']:
-                    region = feature['properties']['region']
-                    feature['properties']['damage_area'] = region_damage.get(region, 0)
-                with open('static/regions.geojson', 'w', encoding='utf-8') as f:
-                    json.dump(geojson_data, f, ensure_ascii=False)
-                logger.debug("GeoJSON успешно обновлён")
-            except Exception as e:
-                logger.error(f"Ошибка при обновлении GeoJSON: {str(e)}")
-
-            return jsonify({'summary_data': summary_data, 'totals': totals})
+            def build():
+                result = fire_analysis.get_region_aggregates(start_date, end_date, regions)
+                logger.debug(f"API /api/fires: Найдено {result['totals']['fire_count']} пожаров после фильтрации")
+
+                # Показатели для карты: геометрия загружается отдельно (/geo/...), соединение по региону — в браузере
+                return jsonify({**result, 'region_metrics': _region_metrics(result['summary_data'])})
+
+            # Повторный запрос с If-None-Match при неизменных данных — 304 без агрегации
+            return conditional_json(fire_analysis, build)
         except Exception as e:
             logger.error(f"Ошибка в API /api/fires: {str(e)}")
             return jsonify({'error': 'Внутренняя ошибка сервера', 'details': str(e)}), 500
 
+    @app.route('/api/fires/timeseries', methods=['GET'])
+    @login_required
+    def get_fires_timeseries():
+        """Временной ряд пожаров для графиков: bucket=day|week|month, by_region=1, фильтры как у /api/fires."""
+        try:
+            start_date = request.args.get('start_date')
+            end_date = request.args.get('end_date')
+            regions = request.args.getlist('regions')
+            if start_date:
+                start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+            if end_date:
+                end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+            if 'all' in regions:
+                regions = []
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        def build():
+            try:
+                result = fire_analysis.get_timeseries(request.args.get('bucket', 'month'), start_date, end_date,
+                                                      regions, by_region=request.args.get('by_region') == '1')
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            return jsonify(result)
+        return conditional_json(fire_analysis, build)
+
+    def geometry_level_list():
+        return [
+            {'name': level, 'max_zoom': GEOMETRY_LEVELS[level]['max_zoom'],
+             'url': url_for('get_region_geometry', filename=asset.filename)}
+            for level, asset in geometry_levels.items()
+        ]
+
+    @app.route('/geo/levels')
+    def get_geometry_levels():
+        """Уровни детализации геометрии: наибольший масштаб карты и URL с отпечатком для каждого."""
+        response = jsonify({'levels': geometry_level_list()})
+        response.cache_control.public = True
+        response.cache_control.max_age = 300
+        return response
+
+    @app.route('/geo/<filename>')
+    def get_region_geometry(filename):
+        """Геометрия регионов по имени с отпечатком; другое имя (устаревший отпечаток) — 404."""
+        asset = next((asset for asset in (region_geometry, *geometry_levels.values()) if asset.filename == filename),
+                     None)
+        if asset is None:
+            abort(404)
+        # Сжатое содержимое готовится один раз на процесс, а не при каждом ответе
+        encoding = negotiate(request.accept_encodings)
+        response = Response(asset.encoded(encoding) if encoding else asset.data, mimetype='application/geo+json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.set_etag(asset.fingerprint, weak=bool(encoding))
+        response.cache_control.public = True
+        response.cache_control.max_age = app.config['GEOMETRY_CACHE_MAX_AGE']
+        response.cache_control.immutable = True
+        return response.make_conditional(request)
+
+    @app.context_processor
+    def inject_geometry_url():
+        # Функция, а не строка: файл геометрии читается при первом рендере карты, а не любой страницы
+        return {'geometry_url': lambda: url_for('get_region_geometry', filename=region_geometry.filename),
+                'geometry_levels': geometry_level_list}
+
+    @app.route('/tiles/<int:z>/<int:x>/<int:y>.pbf')
+    @login_required
+    def get_region_tile(z, x, y):
+        """Векторный тайл (MVT) границ регионов с показателями пожаров за всё время."""
+        metrics = _region_metrics(fire_analysis.get_region_aggregates()['summary_data'])
+        version = region_tiles.version(metrics)
+        try:
+            data = region_tiles.tile(z, x, y, metrics, version)
+        except ValueError:
+            abort(404)
+        response = Response(data, mimetype='application/vnd.mapbox-vector-tile')
+        response.set_etag(f'{version}-{z}-{x}-{y}')
+        response.cache_control.private = True
+        response.cache_control.max_age = 60
+        return response.make_conditional(request)
+
     @app.route('/dashboard')
     @login_required
     def dashboard():
-        fires = fire_repository.get_all()
-        region_data = {}
-        for fire in fires:
-            region = fire.region
-            if region not in region_data:
-                region_data[region] = {
-                    'region': region,
-                    'fire_count': 0,
-                    'total_damage_area': 0,
-                    'total_damage_tenge': 0,
-                    'total_people': 0,
-                    'total_technic': 0,
-                    'total_aircraft': 0,
-                    'aps_people': 0,
-                    'aps_technic': 0,
-                    'aps_aircraft': 0,
-                    'date': fire.date.strftime('%Y-%m-%d') if fire.date else None
-                }
-            region_data[region]['fire_count'] += 1
-            region_data[region]['total_damage_area'] += fire.damage_area or 0
-            region_data[region]['total_damage_tenge'] += fire.damage_tenge or 0
-            region_data[region]['total_people'] += (
-                (fire.lo_people_count or 0) + (fire.aps_people_count or 0) +
-                (fire.kps_people_count or 0) + (fire.mio_people_count or 0) +
-                (fire.other_org_people_count or 0)
-            )
-            region_data[region]['total_technic'] += (
-                (fire.lo_technic_count or 0) + (fire.aps_technic_count or 0) +
-                (fire.kps_technic_count or 0) + (fire.mio_technic_count or 0) +
-                (fire.other_org_technic_count or 0)
-            )
-            region_data[region]['total_aircraft'] += (
-                (fire.aps_aircraft_count or 0) + (fire.kps_aircraft_count or 0) +
-                (fire.mio_aircraft_count or 0) + (fire.other_org_aircraft_count or 0)
-            )
-            region_data[region]['aps_people'] += fire.aps_people_count or 0
-            region_data[region]['aps_technic'] += fire.aps_technic_count or 0
-            region_data[region]['aps_aircraft'] += fire.aps_aircraft_count or 0
-
-        summary_data = list(region_data.values())
-        totals = {
-            'fire_count': sum(row['fire_count'] for row in summary_data),
-            'damage_area': sum(row['total_damage_area'] for row in summary_data),
-            'damage_tenge': sum(row['total_damage_tenge'] for row in summary_data),
-            'people': sum(row['total_people'] for row in summary_data),
-            'technic': sum(row['total_technic'] for row in summary_data),
-            'aircraft': sum(row['total_aircraft'] for row in summary_data)
-        }
+        result = fire_analysis.get_region_aggregates()
 
         return render_template(
             'dashboard.html',
-            summary_data=summary_data,
-            totals=totals,
+            summary_data=result['summary_data'],
+            totals=result['totals'],
             start_date=None,
             end_date=None
         )
@@ -230,6 +292,11 @@ def create_app():
                 logger.info(f"Переименован столбец {old_name} в {new_name}")
         db.session.commit()
 
+        # Сводка появилась после того, как в fires уже были данные (база создана без миграций)
+        if db.session.query(FireDailyRegionRollup.date).first() is None and db.session.query(Fire.id).first() is not None:
+            count = fire_repository.rebuild_rollup()
+            logger.info(f"Дневная сводка fire_daily_region_rollup заполнена: {count} строк")
+
         admin_user = User.query.filter_by(username="admin").first()
         if not admin_user:
             admin = User(username="admin", roles="admin", region="default_region")
@@ -243,6 +310,17 @@ def create_app():
 
     return app
 
+def _region_metrics(summary_data):
+    """Показатели регионов для карты {регион: {fire_count, damage_area, damage_tenge}}."""
+    return {
+        row['region']: {
+            'fire_count': row['fire_count'],
+            'damage_area': row['total_damage_area'],
+            'damage_tenge': row['total_damage_tenge'],
+        }
+        for row in summary_data
+    }
+
 if __name__ == '__main__':
     app = create_app()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""Бенчмарк агрегатора сводок: pandas по сущностям против GROUP BY в SQL.
+
+Базовая линия — прежний путь сводки по регионам (список FireEntity, словари, DataFrame).
+Для измерений region, month и year агрегатор читает дневную сводку, для остальных — fires.
+Запуск: python -m benchmarks.bench_fire_aggregation --rows 100000
+"""
+import argparse
+import time
+import pandas as pd
+from adapters.repositories.fire_repository import SQLAlchemyFireRepository, GROUP_DIMENSIONS
+from benchmarks.common import make_app, seed_fires
+from core.fire_metrics import SOURCE_COLUMNS
+from infrastructure.database import db
+
+
+def dataframe_by_region(repo):
+    data = [{'region': fire.region, **{name: getattr(fire, column) or 0 for name, column in SOURCE_COLUMNS.items()}}
+            for fire in repo.get_all()]
+    return pd.DataFrame(data).groupby('region').sum().reset_index().to_dict(orient='records')
+
+
+def measure(label, func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        db.session.remove()
+        started = time.perf_counter()
+        groups = len(func())
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<32} groups={groups:<6} time={best * 1000:9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        seed_fires(args.rows)
+        repo = SQLAlchemyFireRepository()
+        repo.rebuild_rollup()
+        measure('pandas по сущностям (region)', lambda: dataframe_by_region(repo), 1)
+        for dimension in GROUP_DIMENSIONS:
+            measure(f'aggregate([{dimension}])', lambda: repo.aggregate([dimension]), args.repeat)
+        measure('aggregate([region, month])', lambda: repo.aggregate(['region', 'month']), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
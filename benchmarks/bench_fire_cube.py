@@ -0,0 +1,66 @@
+"""Бенчмарк куба ресурсов: срез из памяти против GROUP BY по таблице fires на каждый запрос.
+
+Срез — «авиация АПС в Алматинской области в июле по годам». Также измеряются полная
+сборка куба из дневной сводки и пересчёт ячеек после добавления пожара.
+Запуск: python -m benchmarks.bench_fire_cube --rows 100000
+"""
+import argparse
+import time
+from datetime import date
+from sqlalchemy import extract, func, select
+from adapters.repositories.fire_repository import SQLAlchemyFireRepository
+from benchmarks.common import make_app, seed_fires
+from core.entities import FireEntity
+from core.models import Fire
+from infrastructure.database import db
+from use_cases.fire_analysis import FireAnalysis
+
+REGION = 'Алматинская область'
+
+
+def scan_slice():
+    year = extract('year', Fire.date)
+    query = (select(year, func.sum(Fire.aps_aircraft_count))
+             .where(Fire.region == REGION, extract('month', Fire.date) == 7)
+             .group_by(year).order_by(year))
+    return db.session.execute(query).all()
+
+
+def cube_slice(analysis):
+    return analysis.slice_cube(keep=['month'], regions=[REGION], groups=['aps'], kinds=['aircraft'],
+                               months_of_year=[7])
+
+
+def measure(label, func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    unit, scale = ('us', 1e6) if best < 1e-3 else ('ms', 1e3)
+    print(f"{label:<36} time={best * scale:9.1f} {unit}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        seed_fires(args.rows)
+        repo = SQLAlchemyFireRepository()
+        repo.rebuild_rollup()
+        analysis = FireAnalysis(repo)
+        measure('полная сборка куба', lambda: (analysis._mark_cube_cells(None), cube_slice(analysis)), args.repeat)
+        print(f"размер куба: {analysis._cube.values.shape}, {analysis._cube.nbytes / 1024:.0f} КБ")
+        measure('GROUP BY по fires на запрос', scan_slice, args.repeat)
+        measure('срез куба из памяти', lambda: cube_slice(analysis), args.repeat * 100)
+        analysis.add_fire(FireEntity(id=0, date=date(2020, 7, 1), region=REGION, location='Локация',
+                                     aps_aircraft_count=1))
+        measure('пересчёт ячейки после изменения', lambda: cube_slice(analysis), 1)
+
+
+if __name__ == '__main__':
+    main()
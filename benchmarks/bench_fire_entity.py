@@ -0,0 +1,34 @@
+"""Бенчмарк создания FireEntity: обычный конструктор против from_trusted.
+
+Запуск: python -m benchmarks.bench_fire_entity --count 100000
+"""
+import argparse
+import time
+from dataclasses import fields
+from core.entities import FireEntity, FIRE_ENTITY_FIELDS
+from benchmarks.common import fake_fire_rows
+
+
+def measure(label, func, rows):
+    started = time.perf_counter()
+    for row in rows:
+        func(row)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<24} count={len(rows):<8} time={elapsed:6.3f}s per_entity={elapsed / len(rows) * 1e6:6.2f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=100000)
+    args = parser.parse_args()
+
+    rows = [{'id': number, **row} for number, row in enumerate(fake_fire_rows(args.count), start=1)]
+    # Кортежи в порядке полей, как их собирает репозиторий при чтении из базы
+    defaults = {field.name: field.default for field in fields(FireEntity)}
+    values = [tuple(row.get(name, defaults[name]) for name in FIRE_ENTITY_FIELDS) for row in rows]
+    measure('FireEntity(**row)', lambda row: FireEntity(**row), rows)
+    measure('FireEntity.from_trusted', FireEntity.from_trusted, values)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Бенчмарк чтения пожаров: ORM-объекты Fire против select() с проекцией колонок.
+
+Базовая линия повторяет прежний путь репозитория: ORM-объекты Fire и копирование
+их атрибутов в FireEntity. Запуск: python -m benchmarks.bench_fire_hydration --rows 100000
+"""
+import argparse
+import time
+from sqlalchemy import select
+from adapters.repositories.fire_repository import SQLAlchemyFireRepository, FLOAT_COLUMNS
+from benchmarks.common import make_app, seed_fires
+from core.entities import FireEntity, FIRE_ENTITY_FIELDS
+from core.models import Fire
+from infrastructure.database import db
+
+
+def orm_get_all():
+    fires = db.session.execute(select(Fire).order_by(Fire.date.desc())).scalars().all()
+    return [FireEntity.from_trusted(tuple(
+        (float(value) if value else None) if name in FLOAT_COLUMNS else value
+        for name, value in ((name, getattr(fire, name)) for name in FIRE_ENTITY_FIELDS)
+    )) for fire in fires]
+
+
+def measure(label, func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        db.session.remove()
+        started = time.perf_counter()
+        count = len(func())
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<28} rows={count:<8} time={best:6.2f}s throughput={count / best:10.0f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        seed_fires(args.rows)
+        repo = SQLAlchemyFireRepository()
+        measure('ORM Fire -> FireEntity', orm_get_all, args.repeat)
+        measure('get_all() (select + mapper)', repo.get_all, args.repeat)
+        measure('project(date, region, area)',
+                lambda: repo.project(('date', 'region', 'damage_area')), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Бенчмарк массового импорта: CSV из N строк через FireImport и add_many."""
+import argparse
+import csv
+import io
+import time
+from adapters.repositories.fire_repository import SQLAlchemyFireRepository
+from adapters.repositories.region_repository import SQLAlchemyRegionRepository
+from adapters.services.spreadsheet_reader import read_rows
+from benchmarks.common import make_app, fake_fire_rows
+from infrastructure.database import db
+from use_cases.fire_import import FireImport
+
+
+def build_csv(count: int) -> bytes:
+    rows = fake_fire_rows(count)
+    first = next(rows)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(first))
+    writer.writeheader()
+    writer.writerow(first)
+    writer.writerows(rows)
+    return buffer.getvalue().encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    data = build_csv(args.rows)
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        fire_import = FireImport(SQLAlchemyFireRepository(), SQLAlchemyRegionRepository())
+        started = time.perf_counter()
+        report = fire_import.import_rows(read_rows(io.BytesIO(data), 'bench.csv'), chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - started
+    print(f"rows={report['total']} imported={report['imported']} failed={report['failed']} "
+          f"time={elapsed:.2f}s ({report['imported'] / elapsed:,.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""Бенчмарк памяти: SQLAlchemyFireRepository.get_all() против stream().
+
+Пиковая память измеряется через tracemalloc на одном проходе по всем пожарам.
+"""
+import argparse
+import time
+import tracemalloc
+from adapters.repositories.fire_repository import SQLAlchemyFireRepository
+from benchmarks.common import make_app, seed_fires
+from infrastructure.database import db
+
+
+def measure(label, func):
+    db.session.expire_all()
+    tracemalloc.start()
+    started = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} rows={count:<8} time={elapsed:6.2f}s peak={peak / 2**20:8.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        seed_fires(args.rows)
+        repo = SQLAlchemyFireRepository()
+        measure('get_all()', lambda: len(repo.get_all()))
+        measure(f'stream(batch_size={args.batch_size})',
+                lambda: sum(len(batch) for batch in repo.stream(batch_size=args.batch_size)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Общие утилиты бенчмарков: приложение на SQLite и генерация тестовых пожаров.
+
+Запуск бенчмарков из корня проекта, например:
+    python -m benchmarks.bench_fire_stream --rows 200000
+"""
+import os
+import random
+import tempfile
+from datetime import date, timedelta
+from flask import Flask
+from sqlalchemy import insert
+from infrastructure.database import db
+from core.models import Fire
+from regions import REGIONS_AND_LOCATIONS
+
+
+def make_app(db_path: str = None) -> Flask:
+    """Flask-приложение с файловой базой SQLite (по умолчанию во временном каталоге)."""
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='fire-bench-'), 'bench.db')
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    db.init_app(app)
+    return app
+
+
+def fake_fire_rows(count: int, seed: int = 42, start: date = date(2015, 1, 1), days: int = 3650):
+    """Генерация словарей строк таблицы fires со случайными значениями."""
+    rnd = random.Random(seed)
+    regions = list(REGIONS_AND_LOCATIONS)
+    for _ in range(count):
+        region = rnd.choice(regions)
+        yield {
+            'date': start + timedelta(days=rnd.randrange(days)),
+            'region': region,
+            'location': rnd.choice(REGIONS_AND_LOCATIONS[region]),
+            'damage_area': round(rnd.uniform(0, 50), 4),
+            'damage_les': round(rnd.uniform(0, 30), 4),
+            'lo_flag': True,
+            'lo_people_count': rnd.randint(0, 20),
+            'lo_technic_count': rnd.randint(0, 5),
+            'aps_flag': rnd.random() < 0.3,
+            'aps_people_count': rnd.randint(0, 10),
+            'aps_technic_count': rnd.randint(0, 3),
+            'aps_aircraft_count': rnd.randint(0, 1),
+            'kps_people_count': rnd.randint(0, 10),
+            'kps_technic_count': rnd.randint(0, 3),
+            'kps_aircraft_count': rnd.randint(0, 1),
+            'mio_people_count': rnd.randint(0, 5),
+            'other_org_people_count': rnd.randint(0, 5),
+            'description': 'Тестовый пожар',
+            'damage_tenge': rnd.randint(0, 1_000_000),
+            'firefighting_costs': rnd.randint(0, 500_000),
+            'edited_by_engineer': False,
+        }
+
+
+def seed_fires(count: int, chunk: int = 10000) -> None:
+    """Создать таблицы и вставить count пожаров многострочными INSERT (нужен app_context)."""
+    db.create_all()
+    rows = []
+    for row in fake_fire_rows(count):
+        rows.append(row)
+        if len(rows) == chunk:
+            db.session.execute(insert(Fire), rows)
+            rows = []
+    if rows:
+        db.session.execute(insert(Fire), rows)
+    db.session.commit()
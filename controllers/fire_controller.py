@@ -11,6 +11,7 @@ from schemas.fire_schema import FireCreateSchema, FireUpdateSchema
 from forms import FireForm, LoginForm
 from utils.decorators import roles_required
 from config import Config
+from adapters.services.fire_json import fires_to_json
 import sys
 print(sys.path)
 
@@ -63,7 +64,7 @@ class FireController:
         """Получить список пожаров"""
         logger.debug("Fetching all fires")
         fires = self.fire_service.get_all_fires()
-        return jsonify([fire.to_dict() for fire in fires])
+        return Response(fires_to_json(fires), mimetype='application/json')
 
     @login_required
     def logout(self):
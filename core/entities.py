@@ -1,11 +1,15 @@
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, fields
 from datetime import datetime
 from typing import Optional
 import json
 
-@dataclass
+@dataclass(slots=True)
 class FireEntity:
-    """Сущность, представляющая данные о пожаре."""
+    """Сущность, представляющая данные о пожаре.
+
+    Для гидратации из базы используйте FireEntity.from_trusted(values): значения уже
+    нормализованы при записи, и повторная проверка __post_init__ не нужна.
+    """
     id: int
     date: datetime
     region: str
@@ -44,6 +48,7 @@ class FireEntity:
     kpo: Optional[int] = None
     file_path: Optional[str] = None
     edited_by_engineer: bool = False
+    version: int = 1  # Версия записи для оптимистической блокировки
 
     def __post_init__(self):
         """Валидация и обработка данных после инициализации."""
@@ -67,8 +72,8 @@ class FireEntity:
                 setattr(self, field, abs(value))  # Используем abs() для получения модуля
 
     def to_dict(self) -> dict:
-        """Преобразование сущности в словарь."""
-        data = asdict(self)
+        """Преобразование сущности в словарь (поля плоские, поэтому без глубокого копирования asdict)."""
+        data = {name: getattr(self, name) for name in FIRE_ENTITY_FIELDS}
         data['date'] = self.date.isoformat()  # Преобразование datetime в строку
         return data
 
@@ -79,6 +84,27 @@ class FireEntity:
         data['date'] = datetime.fromisoformat(data['date'])  # Преобразование строки в datetime
         return cls(**data)
 
+def _build_trusted_factory(cls):
+    """Сборка функции создания сущности без __init__ и __post_init__.
+
+    Слоты заполняются одной распаковкой кортежа значений в порядке полей
+    (код генерируется так же, как __init__ в модуле dataclasses).
+    """
+    targets = ', '.join(f'entity.{field.name}' for field in fields(cls))
+    source = (
+        "def from_trusted(values):\n"
+        "    entity = new(cls)\n"
+        f"    {targets}, = values\n"
+        "    return entity\n"
+    )
+    namespace = {'new': object.__new__, 'cls': cls}
+    exec(source, namespace)
+    return namespace['from_trusted']
+
+# Быстрое создание FireEntity из уже проверенных значений (кортеж в порядке полей)
+FireEntity.from_trusted = staticmethod(_build_trusted_factory(FireEntity))
+FIRE_ENTITY_FIELDS = tuple(field.name for field in fields(FireEntity))
+
 # Остальные классы (UserEntity, AuditLogEntity) остаются без изменений
 @dataclass
 class UserEntity:
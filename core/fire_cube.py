@@ -0,0 +1,137 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+from core.fire_metrics import RESOURCE_GROUPS, RESOURCE_KINDS
+
+# Оси куба: регион × месяц × группа организаций × вид ресурса
+CUBE_AXES = ('region', 'month', 'group', 'kind')
+CUBE_GROUPS = tuple(RESOURCE_GROUPS)
+# Заполняемые ячейки (группа, вид); у групп без вида ресурса (lo без авиации) ячейки остаются нулевыми
+CUBE_MEASURES = tuple((group, kind) for group, kinds in RESOURCE_GROUPS.items() for kind in kinds)
+
+def month_index(label: str) -> int:
+    """Номер месяца (год * 12 + месяц - 1) по метке 'ГГГГ-ММ'."""
+    try:
+        year, month = (int(part) for part in label.split('-'))
+    except ValueError:
+        raise ValueError(f"Недопустимый месяц: {label} (ожидается ГГГГ-ММ)")
+    if not 1 <= month <= 12:
+        raise ValueError(f"Недопустимый месяц: {label} (ожидается ГГГГ-ММ)")
+    return year * 12 + month - 1
+
+def month_label(index: int) -> str:
+    """Метка 'ГГГГ-ММ' по номеру месяца."""
+    year, month = divmod(int(index), 12)
+    return f'{year:04d}-{month + 1:02d}'
+
+def _positions(names: Optional[Sequence], axis: Sequence, what: str) -> List[int]:
+    if names is None:
+        return list(range(len(axis)))
+    unknown = [name for name in names if name not in axis]
+    if unknown:
+        raise ValueError(f"Недопустимые значения ({what}): {', '.join(map(str, unknown))}")
+    return [axis.index(name) for name in dict.fromkeys(names)]
+
+@dataclass
+class FireCube:
+    """Плотный куб ресурсов: регион × месяц × группа организаций × вид ресурса (массив NumPy int32).
+
+    Регионы — в заданном порядке (REGIONS_AND_LOCATIONS), затем встреченные в данных прочие;
+    месяцы — непрерывный диапазон от first_month. Срезы и свёртки выполняются над массивом
+    в памяти без обращения к базе.
+    """
+    regions: Tuple[str, ...]
+    first_month: int
+    values: np.ndarray  # int32 [регион, месяц, группа, вид]
+    _region_positions: Dict[str, int] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._region_positions = {region: position for position, region in enumerate(self.regions)}
+
+    @classmethod
+    def empty(cls, regions: Iterable[str]) -> 'FireCube':
+        regions = tuple(regions)
+        return cls(regions, 0, np.zeros((len(regions), 0, len(CUBE_GROUPS), len(RESOURCE_KINDS)), dtype=np.int32))
+
+    @classmethod
+    def build(cls, regions: Iterable[str], rows: Iterable[Mapping]) -> 'FireCube':
+        """Куб из строк сводки по (region, month) с показателями {org}_{kind}."""
+        cube = cls.empty(regions)
+        cube.replace_cells((), rows)
+        return cube
+
+    @property
+    def months(self) -> List[str]:
+        return [month_label(self.first_month + offset) for offset in range(self.values.shape[1])]
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
+
+    def replace_cells(self, cells: Iterable[Tuple[str, str]], rows: Iterable[Mapping]) -> None:
+        """Пересчёт ячеек: cells (регион, 'ГГГГ-ММ') обнуляются, затем записываются строки сводки rows.
+
+        Строки с новыми регионами или месяцами вне диапазона расширяют куб.
+        """
+        for region, month in cells:
+            position = self._region_positions.get(region)
+            offset = month_index(month) - self.first_month
+            if position is not None and 0 <= offset < self.values.shape[1]:
+                self.values[position, offset] = 0
+        for row in rows:
+            position, offset = self._cell(row['region'], month_index(row['month']))
+            cell = self.values[position, offset]
+            for group, kind in CUBE_MEASURES:
+                cell[CUBE_GROUPS.index(group), RESOURCE_KINDS.index(kind)] = row[f'{group}_{kind}']
+
+    def select(self, regions: Optional[Sequence[str]] = None, start: Optional[str] = None, end: Optional[str] = None,
+               months_of_year: Optional[Sequence[int]] = None, groups: Optional[Sequence[str]] = None,
+               kinds: Optional[Sequence[str]] = None) -> Tuple[Dict[str, List], np.ndarray]:
+        """Срез куба: метки осей и подмассив по выбранным значениям (None — вся ось).
+
+        start и end — границы 'ГГГГ-ММ' включительно, months_of_year — номера месяцев 1..12.
+        Регионы без данных в кубе пропускаются.
+        """
+        region_positions = [self._region_positions[region] for region in dict.fromkeys(regions)
+                            if region in self._region_positions] if regions is not None else list(range(len(self.regions)))
+        low = max(month_index(start) - self.first_month, 0) if start else 0
+        high = min(month_index(end) - self.first_month + 1, self.values.shape[1]) if end else self.values.shape[1]
+        month_offsets = [offset for offset in range(low, high)
+                         if months_of_year is None or (self.first_month + offset) % 12 + 1 in months_of_year]
+        group_positions = _positions(groups, CUBE_GROUPS, 'group')
+        kind_positions = _positions(kinds, RESOURCE_KINDS, 'kind')
+
+        labels = {
+            'region': [self.regions[position] for position in region_positions],
+            'month': [month_label(self.first_month + offset) for offset in month_offsets],
+            'group': [CUBE_GROUPS[position] for position in group_positions],
+            'kind': [RESOURCE_KINDS[position] for position in kind_positions],
+        }
+        return labels, self.values[np.ix_(region_positions, month_offsets, group_positions, kind_positions)]
+
+    def dice(self, keep: Sequence[str] = (), **filters) -> Dict:
+        """Свёртка среза: суммы по всем осям, кроме keep; оси результата — в порядке CUBE_AXES."""
+        unknown = [axis for axis in keep if axis not in CUBE_AXES]
+        if unknown:
+            raise ValueError(f"Недопустимые оси: {', '.join(unknown)}")
+        labels, values = self.select(**filters)
+        axes = [axis for axis in CUBE_AXES if axis in keep]
+        summed = values.sum(axis=tuple(i for i, axis in enumerate(CUBE_AXES) if axis not in keep), dtype=np.int64)
+        return {'axes': axes, 'labels': {axis: labels[axis] for axis in axes}, 'values': summed.tolist()}
+
+    def _cell(self, region: str, month: int) -> Tuple[int, int]:
+        """Позиция ячейки (регион, месяц) с расширением куба при необходимости."""
+        position = self._region_positions.get(region)
+        if position is None:
+            position = self._region_positions[region] = len(self.regions)
+            self.regions += (region,)
+            self.values = np.concatenate([self.values, np.zeros((1,) + self.values.shape[1:], dtype=np.int32)])
+        months = self.values.shape[1]
+        if not months:
+            self.first_month = month
+        if month < self.first_month:
+            self.values = np.pad(self.values, ((0, 0), (self.first_month - month, 0), (0, 0), (0, 0)))
+            self.first_month = month
+        elif month >= self.first_month + months:
+            self.values = np.pad(self.values, ((0, 0), (0, month - self.first_month - months + 1), (0, 0), (0, 0)))
+        return position, month - self.first_month
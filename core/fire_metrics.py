@@ -0,0 +1,59 @@
+from typing import Dict, Iterable, Mapping, Optional
+from datetime import date
+
+# Группы организаций и виды ресурсов, которые они задействуют при тушении
+RESOURCE_GROUPS = {
+    'lo': ('people', 'technic'),
+    'aps': ('people', 'technic', 'aircraft'),
+    'kps': ('people', 'technic', 'aircraft'),
+    'mio': ('people', 'technic', 'aircraft'),
+    'other_org': ('people', 'technic', 'aircraft'),
+}
+RESOURCE_KINDS = ('people', 'technic', 'aircraft')
+
+# Суммируемые показатели и исходные колонки таблицы fires
+SOURCE_COLUMNS = {
+    'damage_area': 'damage_area',
+    'damage_tenge': 'damage_tenge',
+    **{f'{org}_{kind}': f'{org}_{kind}_count' for org, kinds in RESOURCE_GROUPS.items() for kind in kinds},
+}
+RESOURCE_COLUMNS = tuple(name for name in SOURCE_COLUMNS if name not in ('damage_area', 'damage_tenge'))
+
+# Производные итоги по ресурсам: сумма показателей всех групп организаций
+RESOURCE_TOTALS = {
+    f'total_{kind}': tuple(f'{org}_{kind}' for org, kinds in RESOURCE_GROUPS.items() if kind in kinds)
+    for kind in RESOURCE_KINDS
+}
+
+# Итоги по всем строкам сводки: ключ итога -> ключ строки
+SUMMARY_TOTALS = {
+    'fire_count': 'fire_count',
+    'damage_area': 'total_damage_area',
+    'damage_tenge': 'total_damage_tenge',
+    **{kind: f'total_{kind}' for kind in RESOURCE_KINDS},
+    **{f'aps_{kind}': f'aps_{kind}' for kind in RESOURCE_KINDS},
+}
+
+def summary_row(keys: Mapping, fire_count, last_date: Optional[date], sums: Mapping) -> Dict:
+    """Строка сводки: значения измерений, число пожаров, суммы показателей и производные итоги.
+
+    sums — суммы по SOURCE_COLUMNS (любые числа, в том числе Decimal и скаляры NumPy).
+    """
+    row = dict(keys)
+    row['fire_count'] = int(fire_count)
+    row['total_damage_area'] = float(sums['damage_area'])
+    row['total_damage_tenge'] = int(sums['damage_tenge'])
+    for name, columns in RESOURCE_TOTALS.items():
+        row[name] = sum(int(sums[column]) for column in columns)
+    for column in RESOURCE_COLUMNS:
+        row[column] = int(sums[column])
+    row['date'] = last_date.strftime('%Y-%m-%d') if last_date else None
+    return row
+
+def summary_totals(rows: Iterable[Mapping]) -> Dict:
+    """Итоги по строкам сводки."""
+    totals = dict.fromkeys(SUMMARY_TOTALS, 0)
+    for row in rows:
+        for name, key in SUMMARY_TOTALS.items():
+            totals[name] += row[key]
+    return totals
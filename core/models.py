@@ -21,6 +21,10 @@ class User(UserMixin, db.Model):
 
 class Fire(db.Model):
     __tablename__ = 'fires'
+    __table_args__ = (
+        db.Index('ix_fires_region_date', 'region', 'date'),  # Фильтр по региону с сортировкой по дате
+        db.Index('ix_fires_date_id', 'date', 'id'),  # Фильтр по дате и keyset-пагинация по (date, id)
+    )
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.Date, nullable=False)
     region = db.Column(db.String(255), nullable=False)
@@ -59,9 +63,37 @@ class Fire(db.Model):
     kpo = db.Column(db.Integer, nullable=True)
     file_path = db.Column(db.String(255))
     edited_by_engineer = db.Column(db.Boolean, default=False)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # Увеличивается при каждом изменении
+
+class FireDailyRegionRollup(db.Model):
+    """Дневная сводка пожаров по региону, обновляется репозиторием вместе с таблицей fires."""
+    __tablename__ = 'fire_daily_region_rollup'
+    date = db.Column(db.Date, primary_key=True)
+    region = db.Column(db.String(255), primary_key=True)
+    fire_count = db.Column(db.Integer, nullable=False, default=0)
+    damage_area = db.Column(db.Numeric(14, 4), nullable=False, default=0)
+    damage_tenge = db.Column(db.BigInteger, nullable=False, default=0)
+    lo_people = db.Column(db.Integer, nullable=False, default=0)
+    lo_technic = db.Column(db.Integer, nullable=False, default=0)
+    aps_people = db.Column(db.Integer, nullable=False, default=0)
+    aps_technic = db.Column(db.Integer, nullable=False, default=0)
+    aps_aircraft = db.Column(db.Integer, nullable=False, default=0)
+    kps_people = db.Column(db.Integer, nullable=False, default=0)
+    kps_technic = db.Column(db.Integer, nullable=False, default=0)
+    kps_aircraft = db.Column(db.Integer, nullable=False, default=0)
+    mio_people = db.Column(db.Integer, nullable=False, default=0)
+    mio_technic = db.Column(db.Integer, nullable=False, default=0)
+    mio_aircraft = db.Column(db.Integer, nullable=False, default=0)
+    other_org_people = db.Column(db.Integer, nullable=False, default=0)
+    other_org_technic = db.Column(db.Integer, nullable=False, default=0)
+    other_org_aircraft = db.Column(db.Integer, nullable=False, default=0)
 
 class AuditLog(db.Model):
     __tablename__ = 'audit_logs'
+    __table_args__ = (
+        db.Index('ix_audit_logs_timestamp', 'timestamp'),
+        db.Index('ix_audit_logs_table_name_record_id', 'table_name', 'record_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     username = db.Column(db.String(100), nullable=False)
@@ -0,0 +1,39 @@
+from datetime import date, timedelta
+from typing import List
+
+# Интервалы временных рядов: день, неделя (с понедельника, как date_trunc) и календарный месяц
+BUCKETS = ('day', 'week', 'month')
+
+def truncate(value: date, bucket: str) -> date:
+    """Начало интервала bucket, которому принадлежит дата."""
+    if bucket == 'week':
+        return value - timedelta(days=value.weekday())
+    if bucket == 'month':
+        return value.replace(day=1)
+    return value
+
+def next_start(value: date, bucket: str) -> date:
+    """Начало следующего интервала после интервала, начинающегося с value."""
+    if bucket == 'week':
+        return value + timedelta(days=7)
+    if bucket == 'month':
+        return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return value + timedelta(days=1)
+
+def bucket_count(start: date, end: date, bucket: str) -> int:
+    """Число интервалов от интервала start до интервала end включительно (без их перечисления)."""
+    start, end = truncate(start, bucket), truncate(end, bucket)
+    if end < start:
+        return 0
+    if bucket == 'month':
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    return (end - start).days // (7 if bucket == 'week' else 1) + 1
+
+def bucket_starts(start: date, end: date, bucket: str) -> List[date]:
+    """Начала всех интервалов от интервала start до интервала end включительно."""
+    current, end = truncate(start, bucket), truncate(end, bucket)
+    starts = []
+    while current <= end:
+        starts.append(current)
+        current = next_start(current, bucket)
+    return starts
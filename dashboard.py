@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request
 from flask_login import login_required
 from use_cases.fire_analysis import FireAnalysis
+from use_cases.result_cache import ResultCache
 from adapters.repositories.fire_repository import SQLAlchemyFireRepository
 from datetime import datetime
 
@@ -9,14 +10,14 @@ dashboard_bp = Blueprint('dashboard', __name__)
 # Глобальная переменная для передачи зависимости (временное решение)
 fire_analysis = None
 
-def init_dashboard(fire_repo: SQLAlchemyFireRepository):
+def init_dashboard(fire_repo: SQLAlchemyFireRepository, result_cache: ResultCache = None):
     global fire_analysis
-    fire_analysis = FireAnalysis(fire_repo)
+    fire_analysis = FireAnalysis(fire_repo, result_cache)
 
 class DashboardController:
-    def __init__(self, fire_repository: SQLAlchemyFireRepository):
-        self.fire_analysis = FireAnalysis(fire_repository)
-        init_dashboard(fire_repository)  # Инициализируем глобальную переменную
+    def __init__(self, fire_repository: SQLAlchemyFireRepository, result_cache: ResultCache = None):
+        self.fire_analysis = FireAnalysis(fire_repository, result_cache)
+        init_dashboard(fire_repository, self.fire_analysis.cache)  # Инициализируем глобальную переменную
 
     @staticmethod
     @dashboard_bp.route('/dashboard', methods=['GET', 'POST'])
@@ -31,47 +32,9 @@ class DashboardController:
         if end_date:
             end_date = datetime.strptime(end_date, '%Y-%m-%d')
 
-        summary_data = []
-        regions = fire_analysis.fire_repository.get_all_regions()
-        for region in regions:
-            fires = fire_analysis.get_fires_by_region(region, start_date, end_date)
-            region_summary = {
-                'region': region,
-                'fire_count': len(fires),
-                'total_damage_area': sum(fire.damage_area or 0 for fire in fires),
-                'total_damage_tenge': sum(fire.damage_tenge or 0 for fire in fires),
-                'total_people': sum(
-                    (fire.lo_people_count or 0) + (fire.aps_people_count or 0) +
-                    (fire.kps_people_count or 0) + (fire.mio_people_count or 0) +
-                    (fire.other_org_people_count or 0) for fire in fires
-                ),
-                'total_technic': sum(
-                    (fire.lo_technic_count or 0) + (fire.aps_technic_count or 0) +
-                    (fire.kps_technic_count or 0) + (fire.mio_technic_count or 0) +
-                    (fire.other_org_technic_count or 0) for fire in fires
-                ),
-                'total_aircraft': sum(
-                    (fire.aps_aircraft_count or 0) + (fire.kps_aircraft_count or 0) +
-                    (fire.mio_aircraft_count or 0) + (fire.other_org_aircraft_count or 0)
-                    for fire in fires
-                ),
-                'aps_people': sum(fire.aps_people_count or 0 for fire in fires),
-                'aps_technic': sum(fire.aps_technic_count or 0 for fire in fires),
-                'aps_aircraft': sum(fire.aps_aircraft_count or 0 for fire in fires),
-            }
-            summary_data.append(region_summary)
-
-        totals = {
-            'fire_count': sum(row['fire_count'] for row in summary_data),
-            'damage_area': sum(row['total_damage_area'] for row in summary_data),
-            'damage_tenge': sum(row['total_damage_tenge'] for row in summary_data),
-            'people': sum(row['total_people'] for row in summary_data),
-            'technic': sum(row['total_technic'] for row in summary_data),
-            'aircraft': sum(row['total_aircraft'] for row in summary_data),
-            'aps_people': sum(row['aps_people'] for row in summary_data),
-            'aps_technic': sum(row['aps_technic'] for row in summary_data),
-            'aps_aircraft': sum(row['aps_aircraft'] for row in summary_data),
-        }
+        result = fire_analysis.get_region_aggregates(start_date, end_date)
+        summary_data = result['summary_data']
+        totals = result['totals']
 
         return render_template(
             'dashboard.html',
@@ -94,58 +57,9 @@ class DashboardController:
         if end_date:
             end_date = datetime.strptime(end_date, '%Y-%m-%d')
 
-        summary_data = []
-        regions = fire_analysis.fire_repository.get_all_regions()
-        for region in regions:
-            fires = fire_analysis.get_fires_by_region(region, start_date, end_date)
-            region_summary = {
-                'region': region,
-                'fire_count': len(fires),
-                'total_damage_area': sum(fire.damage_area or 0 for fire in fires),
-                'total_damage_tenge': sum(fire.damage_tenge or 0 for fire in fires),
-                'total_people': sum(
-                    (fire.lo_people_count or 0) + (fire.aps_people_count or 0) +
-                    (fire.kps_people_count or 0) + (fire.mio_people_count or 0) +
-                    (fire.other_org_people_count or 0) for fire in fires
-                ),
-                'total_technic': sum(
-                    (fire.lo_technic_count or 0) + (fire.aps_technic_count or 0) +
-                    (fire.kps_technic_count or 0) + (fire.mio_technic_count or 0) +
-                    (fire.other_org_technic_count or 0) for fire in fires
-                ),
-                'total_aircraft': sum(
-                    (fire.aps_aircraft_count or 0) + (fire.kps_aircraft_count or 0) +
-                    (fire.mio_aircraft_count or 0) + (fire.other_org_aircraft_count or 0)
-                    for fire in fires
-                ),
-                'lo_people': sum(fire.lo_people_count or 0 for fire in fires),
-                'lo_technic': sum(fire.lo_technic_count or 0 for fire in fires),
-                'aps_people': sum(fire.aps_people_count or 0 for fire in fires),
-                'aps_technic': sum(fire.aps_technic_count or 0 for fire in fires),
-                'aps_aircraft': sum(fire.aps_aircraft_count or 0 for fire in fires),
-                'kps_people': sum(fire.kps_people_count or 0 for fire in fires),
-                'kps_technic': sum(fire.kps_technic_count or 0 for fire in fires),
-                'kps_aircraft': sum(fire.kps_aircraft_count or 0 for fire in fires),
-                'mio_people': sum(fire.mio_people_count or 0 for fire in fires),
-                'mio_technic': sum(fire.mio_technic_count or 0 for fire in fires),
-                'mio_aircraft': sum(fire.mio_aircraft_count or 0 for fire in fires),
-                'other_org_people': sum(fire.other_org_people_count or 0 for fire in fires),
-                'other_org_technic': sum(fire.other_org_technic_count or 0 for fire in fires),
-                'other_org_aircraft': sum(fire.other_org_aircraft_count or 0 for fire in fires),
-            }
-            summary_data.append(region_summary)
-
-        totals = {
-            'fire_count': sum(row['fire_count'] for row in summary_data),
-            'damage_area': sum(row['total_damage_area'] for row in summary_data),
-            'damage_tenge': sum(row['total_damage_tenge'] for row in summary_data),
-            'people': sum(row['total_people'] for row in summary_data),
-            'technic': sum(row['total_technic'] for row in summary_data),
-            'aircraft': sum(row['total_aircraft'] for row in summary_data),
-            'aps_people': sum(row['aps_people'] for row in summary_data),
-            'aps_technic': sum(row['aps_technic'] for row in summary_data),
-            'aps_aircraft': sum(row['aps_aircraft'] for row in summary_data),
-        }
+        result = fire_analysis.get_region_aggregates(start_date, end_date)
+        summary_data = result['summary_data']
+        totals = result['totals']
 
         return render_template(
             'summary.html',
@@ -1,5 +1,5 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, DateField, FloatField, IntegerField, BooleanField, TextAreaField, SelectField, FileField
+from wtforms import StringField, PasswordField, DateField, FloatField, IntegerField, BooleanField, TextAreaField, SelectField, FileField, HiddenField
 from wtforms.validators import DataRequired, Length, Optional, ValidationError
 
 class LoginForm(FlaskForm):
@@ -46,6 +46,8 @@ class FireForm(FlaskForm):
     kpo = IntegerField('КПО', validators=[Optional()])
     file = FileField('Прикрепить файл', validators=[Optional()])
     edited_by_engineer = BooleanField('Отредактировано инженером', default=False)
+    # Версия записи, открытой на редактирование (проверяется при сохранении)
+    version = HiddenField(filters=[lambda value: int(value) if value not in (None, '') else None])
 
     def __init__(self, regions_and_locations=None, *args, **kwargs):
         """Инициализация формы с опциональным словарем регионов и локаций."""
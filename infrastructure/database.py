@@ -1,15 +1,256 @@
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app, g, has_app_context, has_request_context, request, session as http_session
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_migrate import Migrate
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+# Ключи Session.info: глубина блоков чтения с реплики и признак записи в текущей транзакции
+REPLICA_READS = 'replica_reads'
+PENDING_WRITE = 'pending_write'
+# Время последней записи пользователя в cookie-сессии Flask (для read-your-writes)
+LAST_WRITE_KEY = '_db_last_write'
+
+class RoutingSession(Session):
+    """Сессия, направляющая чтения из блоков replica_reads() на реплики.
+
+    Запись, flush и любые запросы после записи в той же транзакции идут на основную базу.
+    Пользователь, недавно изменявший данные, читает с основной базы в течение допустимого лага.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or (clause is not None and clause.is_dml):
+                self.info[PENDING_WRITE] = True
+            elif self.info.get(REPLICA_READS) and not self.info.get(PENDING_WRITE) \
+                    and (clause is None or clause.is_select) and has_app_context():
+                router = current_app.extensions.get('replica_router')
+                engine = router.pick() if router else None
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def commit(self):
+        super().commit()
+        # Признак записи снимается после commit: flush внутри него тоже отмечает запись
+        wrote = self.info.pop(PENDING_WRITE, False)
+        if wrote and has_request_context() and current_app.extensions.get('replica_router'):
+            http_session[LAST_WRITE_KEY] = time.time()
+
+    def rollback(self):
+        self.info.pop(PENDING_WRITE, None)
+        super().rollback()
 
 # Инициализация SQLAlchemy
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # Инициализация миграций
 migrate = Migrate()
 
+# Параметры пула, неприменимые к SQLite в памяти (Flask-SQLAlchemy использует для неё StaticPool)
+QUEUE_POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout', 'poolclass')
+
+class PoolMetrics:
+    """Накопительные метрики ожидания свободного соединения в пуле."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+
+    def observe(self, wait: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_total_ms': round(self.total_wait * 1000, 3),
+                'wait_avg_ms': round(self.total_wait * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                'wait_max_ms': round(self.max_wait * 1000, 3),
+            }
+
+pool_metrics = PoolMetrics()
+
+class TimedQueuePool(QueuePool):
+    """QueuePool, измеряющий время ожидания соединения (включая открытие нового)."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.observe(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.observe(time.perf_counter() - started)
+        return connection
+
+class ReplicaRouter:
+    """Выбор реплики для чтения: по кругу среди реплик с лагом не больше max_lag секунд."""
+
+    def __init__(self, engines: dict, max_lag: float, check_interval: float = 5):
+        self.engines = engines  # имя реплики -> Engine
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._next = itertools.cycle(list(engines))
+        self._lags = {}  # ключ реплики -> (время проверки, лаг)
+        self._lock = threading.Lock()
+        self._primary_until = 0.0  # time.monotonic(), до которого все чтения идут на основную базу
+
+    def hold_primary(self) -> None:
+        """Направить все чтения процесса на основную базу на max_lag секунд."""
+        with self._lock:
+            self._primary_until = max(self._primary_until, time.monotonic() + self.max_lag)
+
+    def pick(self):
+        """Движок реплики или None, если чтение должно идти на основную базу."""
+        if time.monotonic() < self._primary_until:
+            return None
+        if has_request_context() and time.time() - http_session.get(LAST_WRITE_KEY, 0) < self.max_lag:
+            return None
+        for _ in self.engines:
+            with self._lock:
+                key = next(self._next)
+            engine = self.engines[key]
+            if self.lag(key, engine) <= self.max_lag:
+                return engine
+        return None
+
+    def lag(self, key, engine) -> float:
+        """Лаг реплики в секундах с кэшированием на check_interval."""
+        now = time.monotonic()
+        checked = self._lags.get(key)
+        if checked is None or now - checked[0] > self.check_interval:
+            checked = (now, self.measure_lag(engine))
+            self._lags[key] = checked
+        return checked[1]
+
+    @staticmethod
+    def measure_lag(engine) -> float:
+        """Отставание реплики PostgreSQL по времени последней применённой транзакции.
+
+        Для других СУБД (например, файлов SQLite в тестах) лаг считается нулевым;
+        недоступная реплика считается бесконечно отстающей.
+        """
+        if engine.dialect.name != 'postgresql':
+            return 0.0
+        try:
+            with engine.connect() as connection:
+                return float(connection.exec_driver_sql(
+                    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+                ).scalar())
+        except exc.DBAPIError:
+            return float('inf')
+
+@contextmanager
+def replica_reads():
+    """Блок, запросы SELECT в котором могут выполняться на реплике."""
+    session = db.session()
+    session.info[REPLICA_READS] = session.info.get(REPLICA_READS, 0) + 1
+    try:
+        yield
+    finally:
+        session.info[REPLICA_READS] -= 1
+
+def hold_primary_reads() -> None:
+    """Чтения процесса идут на основную базу в течение допустимого лага (после сброса кэша результатов).
+
+    Иначе результат, заново вычисленный после изменения пожаров, мог бы быть получен на реплике,
+    ещё не применившей изменение, и храниться в кэше весь TTL. Без реплик ничего не делает.
+    """
+    router = current_app.extensions.get('replica_router') if has_app_context() else None
+    if router is not None:
+        router.hold_primary()
+
+def read_only(func):
+    """Декоратор метода репозитория, который только читает данные и допускает реплику."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return func(*args, **kwargs)
+    return wrapper
+
+def _engine_options(uri: str, options: dict) -> dict:
+    """Параметры движка для URI: пул с метриками, кроме SQLite в памяти."""
+    options = dict(options)
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        for key in QUEUE_POOL_OPTIONS:
+            options.pop(key, None)
+    else:
+        options.setdefault('poolclass', TimedQueuePool)
+    return options
+
+def init_engine(app):
+    """Подключение SQLAlchemy с параметрами пула из конфигурации, репликами и тайм-аутами запросов."""
+    options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = _engine_options(app.config['SQLALCHEMY_DATABASE_URI'], options)
+    db.init_app(app)
+    # Реплики не регистрируются в SQLALCHEMY_BINDS: у них нет своих моделей и create_all для них не нужен
+    replicas = {
+        f'replica_{i}': create_engine(uri, **_engine_options(uri, options))
+        for i, uri in enumerate(app.config.get('SQLALCHEMY_REPLICA_URIS') or [])
+    }
+    if replicas:
+        app.extensions['replica_router'] = ReplicaRouter(
+            replicas,
+            app.config.get('REPLICA_MAX_LAG_SECONDS', 5),
+            app.config.get('REPLICA_LAG_CHECK_INTERVAL', 5)
+        )
+
+    @app.before_request
+    def set_statement_timeout():
+        timeouts = app.config.get('STATEMENT_TIMEOUTS_MS') or {}
+        g.statement_timeout_ms = timeouts.get(request.endpoint, app.config.get('STATEMENT_TIMEOUT_MS'))
+
+    if not event.contains(db.session, 'after_begin', _apply_statement_timeout):
+        event.listen(db.session, 'after_begin', _apply_statement_timeout)
+    with app.app_context():
+        for engine in [db.engine, *replicas.values()]:
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'checkin', _clear_progress_handler)
+
+def _apply_statement_timeout(session, transaction, connection):
+    """Ограничение времени запросов транзакции по тайм-ауту текущего эндпоинта.
+
+    PostgreSQL: SET LOCAL statement_timeout. SQLite: обработчик прогресса прерывает
+    запрос после срока (ошибка OperationalError «interrupted»).
+    """
+    timeout_ms = g.get('statement_timeout_ms') if has_request_context() else None
+    if not timeout_ms:
+        return
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+    elif dialect == 'sqlite':
+        deadline = time.monotonic() + timeout_ms / 1000
+        connection.connection.dbapi_connection.set_progress_handler(lambda: time.monotonic() > deadline, 1000)
+
+def _clear_progress_handler(dbapi_connection, connection_record):
+    dbapi_connection.set_progress_handler(None, 0)
+
 def init_db(app):
     """Инициализация базы данных и миграций для приложения."""
-    db.init_app(app)
+    init_engine(app)
     migrate.init_app(app, db)
     with app.app_context():
-        db.create_all()
\ No newline at end of file
+        db.create_all()
@@ -7,10 +7,16 @@ import os
 # Добавляем корневую папку проекта в sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-# Импортируем Flask-приложение и базовые классы
-from app import app  # Flask-приложение в корне
+# Импортируем подключение к базе данных и модели
+from flask import Flask
 from infrastructure.database import db  # Подключение базы данных
-from infrastructure.models import Base  # Импорт моделей (или заменить на конкретный путь)
+import core.models  # noqa: F401  Регистрация моделей в метаданных db
+
+# Минимальное Flask-приложение: create_app() выполняет create_all и начальное заполнение,
+# что для миграций не нужно
+app = Flask(__name__)
+app.config.from_object('config.Config')
+db.init_app(app)
 
 # Настройки Alembic
 config = context.config
@@ -20,7 +26,7 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 # Метаданные для миграций
-target_metadata = Base.metadata  
+target_metadata = db.metadata
 
 # Функция для миграций в "offline" режиме
 def run_migrations_offline():
@@ -0,0 +1,90 @@
+"""Base schema: users, fires and audit_logs as created by db.create_all() before the indexes
+
+Revision ID: 7d1e3b5a9c04
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d1e3b5a9c04'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # if_not_exists: рабочие базы созданы db.create_all() без миграций; для них ревизия ничего не меняет
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('username', sa.String(150), nullable=False, unique=True),
+        sa.Column('password', sa.String(150), nullable=False),
+        sa.Column('roles', sa.String(50), nullable=False),
+        sa.Column('region', sa.String(255), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'fires',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('region', sa.String(255), nullable=False),
+        sa.Column('location', sa.String(255), nullable=False),
+        sa.Column('branch', sa.String(255), nullable=True),
+        sa.Column('forestry', sa.String(255), nullable=True),
+        sa.Column('quarter', sa.String(255), nullable=True),
+        sa.Column('allotment', sa.String(255), nullable=True),
+        sa.Column('damage_area', sa.Numeric(10, 4)),
+        sa.Column('damage_les', sa.Numeric(10, 4)),
+        sa.Column('damage_les_lesopokryt', sa.Numeric(10, 4)),
+        sa.Column('damage_les_verh', sa.Numeric(10, 4)),
+        sa.Column('damage_not_les', sa.Numeric(10, 4)),
+        sa.Column('lo_flag', sa.Boolean()),
+        sa.Column('lo_people_count', sa.Integer(), nullable=True),
+        sa.Column('lo_technic_count', sa.Integer(), nullable=True),
+        sa.Column('aps_flag', sa.Boolean()),
+        sa.Column('aps_people_count', sa.Integer(), nullable=True),
+        sa.Column('aps_technic_count', sa.Integer(), nullable=True),
+        sa.Column('aps_aircraft_count', sa.Integer(), nullable=True),
+        sa.Column('kps_flag', sa.Boolean()),
+        sa.Column('kps_people_count', sa.Integer(), nullable=True),
+        sa.Column('kps_technic_count', sa.Integer(), nullable=True),
+        sa.Column('kps_aircraft_count', sa.Integer(), nullable=True),
+        sa.Column('mio_flag', sa.Boolean()),
+        sa.Column('mio_people_count', sa.Integer(), nullable=True),
+        sa.Column('mio_technic_count', sa.Integer(), nullable=True),
+        sa.Column('mio_aircraft_count', sa.Integer(), nullable=True),
+        sa.Column('other_org_flag', sa.Boolean()),
+        sa.Column('other_org_people_count', sa.Integer(), nullable=True),
+        sa.Column('other_org_technic_count', sa.Integer(), nullable=True),
+        sa.Column('other_org_aircraft_count', sa.Integer(), nullable=True),
+        sa.Column('description', sa.Text()),
+        sa.Column('damage_tenge', sa.Integer(), nullable=True),
+        sa.Column('firefighting_costs', sa.Integer(), nullable=True),
+        sa.Column('kpo', sa.Integer(), nullable=True),
+        sa.Column('file_path', sa.String(255)),
+        sa.Column('edited_by_engineer', sa.Boolean()),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'audit_logs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('username', sa.String(100), nullable=False),
+        sa.Column('action', sa.String(50), nullable=False),
+        sa.Column('table_name', sa.String(50), nullable=False),
+        sa.Column('record_id', sa.Integer(), nullable=False),
+        sa.Column('changes', sa.Text(), nullable=True),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('audit_logs')
+    op.drop_table('fires')
+    op.drop_table('users')
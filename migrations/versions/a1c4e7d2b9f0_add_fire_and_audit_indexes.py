@@ -0,0 +1,33 @@
+"""Add indexes for fires and audit_logs read paths
+
+Revision ID: a1c4e7d2b9f0
+Revises: 7d1e3b5a9c04
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c4e7d2b9f0'
+down_revision: Union[str, None] = '7d1e3b5a9c04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # if_not_exists: таблицы могли быть созданы db.create_all() уже с индексами
+    op.create_index('ix_fires_region_date', 'fires', ['region', 'date'], if_not_exists=True)
+    op.create_index('ix_fires_date', 'fires', ['date'], if_not_exists=True)
+    op.create_index('ix_audit_logs_timestamp', 'audit_logs', ['timestamp'], if_not_exists=True)
+    op.create_index('ix_audit_logs_table_name_record_id', 'audit_logs', ['table_name', 'record_id'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_audit_logs_table_name_record_id', table_name='audit_logs', if_exists=True)
+    op.drop_index('ix_audit_logs_timestamp', table_name='audit_logs', if_exists=True)
+    op.drop_index('ix_fires_date', table_name='fires', if_exists=True)
+    op.drop_index('ix_fires_region_date', table_name='fires', if_exists=True)
@@ -0,0 +1,28 @@
+"""Replace fires(date) index with (date, id) for keyset pagination
+
+Revision ID: c5e8f1a3d6b2
+Revises: a1c4e7d2b9f0
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e8f1a3d6b2'
+down_revision: Union[str, None] = 'a1c4e7d2b9f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_fires_date_id', 'fires', ['date', 'id'], if_not_exists=True)
+    op.drop_index('ix_fires_date', table_name='fires', if_exists=True)
+
+
+def downgrade() -> None:
+    op.create_index('ix_fires_date', 'fires', ['date'], if_not_exists=True)
+    op.drop_index('ix_fires_date_id', table_name='fires', if_exists=True)
@@ -0,0 +1,51 @@
+"""Add fire_daily_region_rollup with per-day, per-region fire totals
+
+Revision ID: e2b7d4f9a1c3
+Revises: c5e8f1a3d6b2
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7d4f9a1c3'
+down_revision: Union[str, None] = 'c5e8f1a3d6b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RESOURCE_COLUMNS = (
+    'lo_people', 'lo_technic',
+    'aps_people', 'aps_technic', 'aps_aircraft',
+    'kps_people', 'kps_technic', 'kps_aircraft',
+    'mio_people', 'mio_technic', 'mio_aircraft',
+    'other_org_people', 'other_org_technic', 'other_org_aircraft',
+)
+
+
+def upgrade() -> None:
+    # if_not_exists: таблица могла быть создана db.create_all() и уже заполнена приложением
+    op.create_table(
+        'fire_daily_region_rollup',
+        sa.Column('date', sa.Date(), primary_key=True),
+        sa.Column('region', sa.String(length=255), primary_key=True),
+        sa.Column('fire_count', sa.Integer(), nullable=False),
+        sa.Column('damage_area', sa.Numeric(14, 4), nullable=False),
+        sa.Column('damage_tenge', sa.BigInteger(), nullable=False),
+        *(sa.Column(column, sa.Integer(), nullable=False) for column in RESOURCE_COLUMNS),
+        if_not_exists=True,
+    )
+    sums = ', '.join(f'COALESCE(SUM({column}_count), 0)' for column in RESOURCE_COLUMNS)
+    op.execute(
+        'INSERT INTO fire_daily_region_rollup '
+        f'(date, region, fire_count, damage_area, damage_tenge, {", ".join(RESOURCE_COLUMNS)}) '
+        'SELECT date, region, COUNT(id), COALESCE(SUM(damage_area), 0), COALESCE(SUM(damage_tenge), 0), '
+        f'{sums} FROM fires WHERE NOT EXISTS (SELECT 1 FROM fire_daily_region_rollup) GROUP BY date, region'
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('fire_daily_region_rollup')
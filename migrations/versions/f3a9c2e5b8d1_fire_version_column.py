@@ -0,0 +1,31 @@
+"""Add fires.version for optimistic locking of edits
+
+Revision ID: f3a9c2e5b8d1
+Revises: e2b7d4f9a1c3
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9c2e5b8d1'
+down_revision: Union[str, None] = 'e2b7d4f9a1c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Столбец уже есть, если таблица создана db.create_all() по текущей модели
+    if 'version' in {column['name'] for column in sa.inspect(op.get_bind()).get_columns('fires')}:
+        return
+    with op.batch_alter_table('fires') as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('fires') as batch_op:
+        batch_op.drop_column('version')
@@ -1,16 +1,15 @@
 // Конфигурация приложения
 const APP_CONFIG = {
-    CACHE: {
-      DATA_TTL: 5 * 60 * 1000, // 5 минут кэширования данных
-      GEOJSON_TTL: 24 * 60 * 60 * 1000 // 24 часа для GeoJSON
-    },
     MAP: {
       minZoom: 5,
       maxZoom: 10,
       bounds: [[40, 44], [56, 88]],
       center: [48.0196, 66.9237],
       tileLayer: 'https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png',
-      attribution: '© OpenStreetMap contributors'
+      attribution: '© OpenStreetMap contributors',
+      // Границы регионов векторными тайлами (только видимые тайлы); без Leaflet.VectorGrid — GeoJSON по уровням
+      vectorTiles: true,
+      regionTiles: '/tiles/{z}/{x}/{y}.pbf'
     },
     DEBOUNCE: {
       FILTERS: 300, // Задержка для фильтров
@@ -35,8 +34,11 @@ const APP_CONFIG = {
   const AppState = {
     data: {
       all: [],
+      allRegionMetrics: {},
       filtered: [],
-      regions: []
+      regions: [],
+      regionMetrics: {},
+      timeseries: null
     },
     components: {
       map: null,
@@ -44,12 +46,18 @@ const APP_CONFIG = {
       legend: null,
       dataTable: null,
       charts: {},
-      geoJsonData: null
+      geoJsonData: {},
+      geometryLevels: null,
+      geometryUrl: null,
+      regionTileLayer: null,
+      tileRegions: new Set()
     },
     ui: {
       isLoading: false,
       pendingRequests: new Set(),
-      regionDropdownInitialized: false
+      regionDropdownInitialized: false,
+      timeseriesBucket: 'month',
+      timeseriesFilters: { startDate: '', endDate: '', regions: ['all'] }
     }
   };
   
@@ -104,13 +112,8 @@ const APP_CONFIG = {
   
       if (!this.validateDates(startDate, endDate)) return;
   
-      const cacheKey = `fire_data_${startDate}_${endDate}_${regions.join(',')}`;
-      const cachedData = this.getCachedData(cacheKey);
-      
-      if (cachedData) {
-        this.processFireData(cachedData, regions);
-        return;
-      }
+      AppState.ui.timeseriesFilters = { startDate, endDate, regions };
+      this.loadTimeseries().catch(error => console.error('Ошибка загрузки временного ряда:', error));
   
       const requestId = Symbol();
       AppState.ui.pendingRequests.add(requestId);
@@ -125,6 +128,8 @@ const APP_CONFIG = {
           regions.forEach(r => params.append('regions', r));
         }
   
+        // Ответ кэширует браузер (ETag, no-cache): повторный запрос при неизменных данных
+        // получает 304 без тела и без агрегации на сервере
         const response = await fetch(`/api/fires?${params.toString()}`, {
           headers: { 'Accept': 'application/json' }
         });
@@ -135,7 +140,6 @@ const APP_CONFIG = {
         }
   
         const data = await response.json();
-        this.cacheData(cacheKey, data);
         this.processFireData(data, regions);
       } catch (error) {
         console.error('Ошибка загрузки данных:', error);
@@ -147,36 +151,47 @@ const APP_CONFIG = {
       }
     },
   
-    async loadGeoJSON() {
-      if (AppState.components.geoJsonData) return AppState.components.geoJsonData;
+    // Ряд по дням/неделям/месяцам: пустые интервалы сервер заполняет нулями,
+    // ответ — параллельные массивы labels, fire_count и damage_area
+    async loadTimeseries() {
+      const { startDate, endDate, regions } = AppState.ui.timeseriesFilters;
+      const params = new URLSearchParams({ bucket: AppState.ui.timeseriesBucket });
+      if (startDate) params.append('start_date', startDate);
+      if (endDate) params.append('end_date', endDate);
+      if (!regions.includes('all')) {
+        regions.forEach(r => params.append('regions', r));
+      }
   
-      const cached = localStorage.getItem('geojson_cache');
-      if (cached) {
-        const { data, timestamp } = JSON.parse(cached);
-        if (Date.now() - timestamp < APP_CONFIG.CACHE.GEOJSON_TTL) {
-          AppState.components.geoJsonData = data;
-          return data;
-        }
+      const response = await fetch(`/api/fires/timeseries?${params.toString()}`, {
+        headers: { 'Accept': 'application/json' }
+      });
+      if (!response.ok) {
+        const errorData = await response.json();
+        throw new Error(errorData.error || `HTTP error: ${response.status}`);
       }
   
+      AppState.data.timeseries = await response.json();
+      ChartService.updateTimeseries();
+    },
+  
+    // Геометрия не зависит от фильтров: URL с отпечатком содержимого кэшируется браузером бессрочно,
+    // показатели регионов приходят отдельно (region_metrics) и соединяются по названию региона
+    async loadGeoJSON(geometryUrl) {
+      if (AppState.components.geoJsonData[geometryUrl]) return AppState.components.geoJsonData[geometryUrl];
+  
       try {
-        const response = await fetch('/static/regions.geojson');
+        const response = await fetch(geometryUrl);
         if (!response.ok) throw new Error(`Ошибка загрузки GeoJSON: ${response.statusText}`);
         
         const data = await response.json();
         if (!data?.features?.length) throw new Error('GeoJSON пустой или некорректный');
   
-        localStorage.setItem('geojson_cache', JSON.stringify({
-          data,
-          timestamp: Date.now()
-        }));
-  
-        AppState.components.geoJsonData = data;
+        AppState.components.geoJsonData[geometryUrl] = data;
         return data;
       } catch (error) {
         console.error("Ошибка загрузки GeoJSON:", error);
         try {
-          const backupResponse = await fetch('/static/regions_backup.geojson');
+          const backupResponse = await fetch('/static/regions.geojson');
           const backupData = await backupResponse.json();
           console.warn("Используется резервный GeoJSON");
           return backupData;
@@ -209,6 +224,7 @@ const APP_CONFIG = {
       if (!data?.summary_data) throw new Error('Нет данных в summary_data');
   
       AppState.data.all = data.summary_data;
+      AppState.data.allRegionMetrics = data.region_metrics || {};
       AppState.data.regions = [...new Set(data.summary_data.map(item => item.region))].sort();
       this.updateFilteredData(regions);
       
@@ -221,29 +237,20 @@ const APP_CONFIG = {
     },
   
     updateFilteredData(regions) {
-      AppState.data.filtered = regions.includes('all') || regions.length === 0
+      const showAll = regions.includes('all') || regions.length === 0;
+      AppState.data.filtered = showAll
         ? [...AppState.data.all]
         : AppState.data.all.filter(d => regions.includes(d.region));
+      AppState.data.regionMetrics = Object.fromEntries(
+        Object.entries(AppState.data.allRegionMetrics || {}).filter(([region]) => showAll || regions.includes(region))
+      );
     },
   
-    getCachedData(key) {
-      const cached = localStorage.getItem(key);
-      if (!cached) return null;
-      
-      const { data, timestamp } = JSON.parse(cached);
-      if (Date.now() - timestamp > APP_CONFIG.CACHE.DATA_TTL) {
-        localStorage.removeItem(key);
-        return null;
-      }
-      
-      return data;
-    },
-  
-    cacheData(key, data) {
-      localStorage.setItem(key, JSON.stringify({
-        data,
-        timestamp: Date.now()
-      }));
+    // Копии ответов /api/fires в localStorage (прежний кэш с TTL) больше не используются
+    clearLegacyCache() {
+      Object.keys(localStorage)
+        .filter(key => key.startsWith('fire_data_'))
+        .forEach(key => localStorage.removeItem(key));
     }
   };
   
@@ -264,13 +271,70 @@ const APP_CONFIG = {
       }).addTo(AppState.components.map);
   
       AppState.components.map.fitBounds(APP_CONFIG.MAP.bounds);
+      AppState.components.map.on('zoomend', () => {
+        if (!this.useVectorTiles()) this.update();
+      });
+    },
+  
+    // Уровень детализации геометрии для масштаба: первый уровень, чей max_zoom не меньше масштаба
+    getGeometryUrl(zoom) {
+      const mapElement = document.getElementById('map');
+      if (!AppState.components.geometryLevels) {
+        AppState.components.geometryLevels = JSON.parse(mapElement?.dataset.geometryLevels || '[]');
+      }
+      const level = AppState.components.geometryLevels.find(l => l.max_zoom === null || zoom <= l.max_zoom);
+      return level ? level.url : (mapElement?.dataset.geometryUrl || '/static/regions.geojson');
+    },
+  
+    useVectorTiles() {
+      return APP_CONFIG.MAP.vectorTiles && typeof L.vectorGrid !== 'undefined';
+    },
+  
+    updateVectorTiles() {
+      if (AppState.components.regionTileLayer) {
+        // Новые показатели: перекраска регионов уже загруженных тайлов без их повторного запроса
+        AppState.components.tileRegions.forEach(region => {
+          AppState.components.regionTileLayer.setFeatureStyle(region, this.getRegionStyle({ properties: { region } }));
+        });
+        return;
+      }
+  
+      AppState.components.regionTileLayer = L.vectorGrid.protobuf(APP_CONFIG.MAP.regionTiles, {
+        vectorTileLayerStyles: {
+          regions: properties => {
+            AppState.components.tileRegions.add(properties.region);
+            return this.getRegionStyle({ properties });
+          }
+        },
+        interactive: true,
+        getFeatureId: feature => feature.properties.region
+      }).on('click', e => {
+        L.popup()
+          .setLatLng(e.latlng)
+          .setContent(this.getPopupContent(e.layer.properties.region))
+          .openOn(AppState.components.map);
+      }).addTo(AppState.components.map);
+      this.addLegend();
     },
   
     async update() {
       if (!AppState.components.map) this.init();
+      if (this.useVectorTiles()) {
+        this.updateVectorTiles();
+        return;
+      }
       
       try {
-        const geoJsonData = await DataService.loadGeoJSON();
+        const geometryUrl = this.getGeometryUrl(AppState.components.map.getZoom());
+        if (AppState.components.geoJsonLayer && AppState.components.geometryUrl === geometryUrl) {
+          // Геометрия этого уровня уже на карте: меняются только стили по новым показателям
+          AppState.components.geoJsonLayer.setStyle(this.getRegionStyle.bind(this));
+          return;
+        }
+        const geoJsonData = await DataService.loadGeoJSON(geometryUrl);
+        // Пока загружался уровень, масштаб мог снова измениться
+        if (geometryUrl !== this.getGeometryUrl(AppState.components.map.getZoom())) return;
+        AppState.components.geometryUrl = geometryUrl;
         this.renderGeoJSON(geoJsonData);
         this.addLegend();
         AppState.components.map.invalidateSize();
@@ -298,8 +362,11 @@ const APP_CONFIG = {
     },
   
     getRegionStyle(feature) {
-      const regionData = AppState.data.filtered.find(r => r.region === feature.properties.region);
-      const damageArea = regionData ? regionData.total_damage_area : 0;
+      // До загрузки /api/fires используются показатели из атрибутов векторного тайла
+      const metrics = AppState.data.all.length
+        ? AppState.data.regionMetrics[feature.properties.region]
+        : feature.properties;
+      const damageArea = metrics?.damage_area || 0;
       
       return {
         fillColor: Utils.getColorForValue(damageArea, APP_CONFIG.COLORS.damageScale),
@@ -311,12 +378,18 @@ const APP_CONFIG = {
     },
   
     bindPopupToFeature(feature, layer) {
-      const regionData = AppState.data.filtered.find(r => r.region === feature.properties.region);
-      layer.bindPopup(`
-        <b>Регион:</b> ${feature.properties.region || '—'}<br>
-        <b>Площадь пожаров:</b> ${Utils.formatNumber(regionData?.total_damage_area || 0)} га<br>
-        <b>Ущерб:</b> ${Utils.formatNumber(regionData?.total_damage_tenge || 0)} тг
-      `);
+      // Содержимое строится при открытии, чтобы показывать текущие показатели без перепривязки
+      layer.bindPopup(() => this.getPopupContent(feature.properties.region));
+    },
+  
+    getPopupContent(region) {
+      const metrics = AppState.data.regionMetrics[region];
+      return `
+        <b>Регион:</b> ${region || '—'}<br>
+        <b>Пожаров:</b> ${Utils.formatNumber(metrics?.fire_count || 0)}<br>
+        <b>Площадь пожаров:</b> ${Utils.formatNumber(metrics?.damage_area || 0)} га<br>
+        <b>Ущерб:</b> ${Utils.formatNumber(metrics?.damage_tenge || 0)} тг
+      `;
     },
   
     addLegend() {
@@ -356,6 +429,16 @@ const APP_CONFIG = {
       this.updateChart('bar-chart', this.getBarChartConfig(textColor, gridColor));
       this.updateChart('scatter-chart', this.getScatterChartConfig(textColor, gridColor));
       this.updateChart('doughnut-chart', this.getDoughnutChartConfig(textColor));
+      this.updateTimeseries();
+    },
+  
+    updateTimeseries() {
+      if (!AppState.data.timeseries) return;
+      const isDarkTheme = document.body.classList.contains('dark-theme');
+      const textColor = isDarkTheme ? '#E5E7EB' : '#111827';
+      const gridColor = isDarkTheme ? '#4B5563' : '#E5E7EB';
+  
+      this.updateChart('timeseries-chart', this.getTimeseriesChartConfig(textColor, gridColor));
     },
   
     updateChart(chartId, config) {
@@ -401,6 +484,59 @@ const APP_CONFIG = {
       };
     },
   
+    getTimeseriesChartConfig(textColor, gridColor) {
+      const { labels, fire_count, damage_area } = AppState.data.timeseries;
+      const options = this.getCommonChartOptions(textColor, gridColor);
+  
+      return {
+        type: 'line',
+        data: {
+          labels,
+          datasets: [
+            {
+              label: 'Пожары',
+              data: fire_count,
+              borderColor: '#FF6384',
+              backgroundColor: '#FF6384',
+              pointRadius: 0,
+              tension: 0.2,
+              yAxisID: 'y'
+            },
+            {
+              label: 'Площадь (га)',
+              data: damage_area,
+              borderColor: '#36A2EB',
+              backgroundColor: '#36A2EB',
+              pointRadius: 0,
+              tension: 0.2,
+              yAxisID: 'area'
+            }
+          ]
+        },
+        options: {
+          ...options,
+          scales: {
+            x: {
+              ticks: { color: textColor, font: { size: 10 }, autoSkip: true, maxTicksLimit: 24 },
+              grid: { color: gridColor }
+            },
+            y: {
+              title: { display: true, text: 'Пожары', color: textColor },
+              ticks: { color: textColor, font: { size: 10 } },
+              grid: { color: gridColor }
+            },
+            area: {
+              position: 'right',
+              title: { display: true, text: 'Площадь (га)', color: textColor },
+              ticks: { color: textColor, font: { size: 10 } },
+              grid: { drawOnChartArea: false }
+            }
+          }
+        },
+        plugins: [ChartZoom]
+      };
+    },
+  
     getScatterChartConfig(textColor, gridColor) {
       return {
         type: 'scatter',
@@ -881,18 +1017,27 @@ const APP_CONFIG = {
         startDateInput.addEventListener('change', handleDateChange);
         endDateInput.addEventListener('change', handleDateChange);
       }
+  
+      const bucketSelect = document.getElementById('timeseries-bucket');
+      if (bucketSelect) {
+        bucketSelect.value = AppState.ui.timeseriesBucket;
+        bucketSelect.addEventListener('change', () => {
+          AppState.ui.timeseriesBucket = bucketSelect.value;
+          DataService.loadTimeseries().catch(error => UI.showError(error.message));
+        });
+      }
     }
   };
   
   // Инициализация приложения
   document.addEventListener('DOMContentLoaded', () => {
     UI.init();
+    DataService.clearLegacyCache();
     
     const startDate = Utils.sanitizeDate(document.getElementById('start-date')?.value);
     const endDate = Utils.sanitizeDate(document.getElementById('end-date')?.value);
     
     DataService.loadFireData(startDate, endDate);
-    DataService.loadGeoJSON().catch(console.error);
   });
   
   // Оптимизация ресайза
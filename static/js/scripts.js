@@ -397,6 +397,21 @@ function initializeDataTable(table, customOptions = {}) {
             defaultOptions.pageLength = 10;
         }
 
+        // Серверная обработка: сортировка, поиск и подсчёт выполняются на сервере
+        if (table.dataset.source) {
+            defaultOptions.serverSide = true;
+            defaultOptions.processing = true;
+            defaultOptions.ajax = {
+                url: table.dataset.source,
+                data: params => Object.assign(params, table.serverFilters || {}),
+                dataSrc: json => table.id === 'fires-table'
+                    ? json.data.map(fire => buildFireRow(fire, table.dataset.currentRole || ''))
+                    : json.data.map(log => [
+                        log.timestamp, log.username, log.action, log.table_name, log.record_id, log.changes
+                    ].map(escapeHtml))
+            };
+        }
+
         const options = { ...defaultOptions, ...customOptions };
         const dataTable = $(table).DataTable(options);
 
@@ -529,7 +544,9 @@ function setupTableFilters(table, dataTable, filterContainer, loader) {
         if (table.id === 'fires-table') {
             const regionFilter = document.createElement('select');
             regionFilter.innerHTML = '<option value="">Все регионы</option>';
-            const regions = [...new Set(dataTable.column(2).data().toArray())].sort();
+            const regions = table.dataset.regions
+                ? JSON.parse(table.dataset.regions)
+                : [...new Set(dataTable.column(2).data().toArray())].sort();
             regions.forEach(region => {
                 const option = document.createElement('option');
                 option.value = region;
@@ -552,30 +569,26 @@ function setupTableFilters(table, dataTable, filterContainer, loader) {
             filterContainer.appendChild(createFilterLabel('Площадь:', areaFilter));
             filterContainer.appendChild(resetButton);
 
-            $.fn.dataTable.ext.search.push((settings, data, dataIndex) => {
-                const region = regionFilter.value;
-                const date = dateFilter.value;
-                const area = parseFloat(areaFilter.value) || 0;
-
-                const rowRegion = data[2] || '';
-                const rowDate = data[1] || '';
-                const rowArea = parseFloat(data[8]) || 0;
-
-                if (region && rowRegion !== region) return false;
-                if (date && rowDate !== date) return false;
-                if (area && rowArea < area) return false;
-                return true;
-            });
+            // Значения фильтров передаются на сервер вместе с параметрами DataTables
+            const applyServerFilters = () => {
+                table.serverFilters = {
+                    region: regionFilter.value,
+                    start_date: dateFilter.value,
+                    end_date: dateFilter.value,
+                    min_damage_area: areaFilter.value
+                };
+                applyFilters();
+            };
 
-            regionFilter.addEventListener('change', applyFilters);
-            dateFilter.addEventListener('change', applyFilters);
-            areaFilter.addEventListener('input', debounce(applyFilters, 500));
+            regionFilter.addEventListener('change', applyServerFilters);
+            dateFilter.addEventListener('change', applyServerFilters);
+            areaFilter.addEventListener('input', debounce(applyServerFilters, 500));
 
             resetButton.addEventListener('click', () => {
                 regionFilter.value = '';
                 dateFilter.value = '';
                 areaFilter.value = '';
-                applyFilters();
+                applyServerFilters();
             });
         } else if (table.id === 'summary-table') {
             const regionFilter = document.createElement('select');
@@ -612,6 +625,63 @@ function setupTableFilters(table, dataTable, filterContainer, loader) {
     }
 }
 
+/**
+ * Экранирует HTML-спецсимволы в строке.
+ * @param {*} value - Значение для вывода в ячейку.
+ * @returns {string} Безопасная строка.
+ */
+function escapeHtml(value) {
+    if (value === null || value === undefined) return '';
+    return String(value)
+        .replace(/&/g, '&amp;')
+        .replace(/</g, '&lt;')
+        .replace(/>/g, '&gt;')
+        .replace(/"/g, '&quot;')
+        .replace(/'/g, '&#39;');
+}
+
+/**
+ * Формирует ячейки строки таблицы пожаров в порядке столбцов admin_dashboard.html.
+ * @param {Object} fire - Пожар из ответа /api/fires/datatable.
+ * @param {string} role - Роли текущего пользователя.
+ * @returns {Array<string>} HTML ячеек.
+ */
+function buildFireRow(fire, role) {
+    const flag = value => value ? 'Да' : 'Нет';
+    const number = value => value === null || value === undefined ? '—' : formatNumber(value);
+    const cells = [
+        fire.id, fire.date, fire.region, fire.location, fire.branch, fire.forestry, fire.quarter, fire.allotment
+    ].map(escapeHtml);
+    cells.push(
+        number(fire.damage_area), number(fire.damage_les), number(fire.damage_les_lesopokryt),
+        number(fire.damage_les_verh), number(fire.damage_not_les),
+        flag(fire.lo_flag), escapeHtml(fire.lo_people_count), escapeHtml(fire.lo_technic_count)
+    );
+    ['aps', 'kps', 'mio', 'other_org'].forEach(org => {
+        cells.push(
+            flag(fire[`${org}_flag`]),
+            escapeHtml(fire[`${org}_people_count`]),
+            escapeHtml(fire[`${org}_technic_count`]),
+            escapeHtml(fire[`${org}_aircraft_count`])
+        );
+    });
+    cells.push(
+        escapeHtml(fire.description), number(fire.damage_tenge), number(fire.firefighting_costs), escapeHtml(fire.kpo),
+        fire.file_path
+            ? `<a href="/download/${encodeURIComponent(fire.file_path.split('/').pop())}" target="_blank">Скачать</a>`
+            : 'Нет файла'
+    );
+    if (role !== 'analyst') {
+        let actions = `<a href="/edit/${fire.id}">Редактировать</a>`;
+        if (role.split(',').includes('admin')) {
+            actions += ` <form action="/delete/${fire.id}" method="post" style="display:inline;">` +
+                `<button type="submit" class="btn" onclick="return confirm('Вы уверены, что хотите удалить эту запись?');">Удалить</button></form>`;
+        }
+        cells.push(actions);
+    }
+    return cells;
+}
+
 // ==========================================================================
 // Инициализация при загрузке страницы
 // ==========================================================================
@@ -0,0 +1,30 @@
+import unittest
+from flask import Flask
+from sqlalchemy import event
+from infrastructure.database import db
+
+class DatabaseTestCase(unittest.TestCase):
+    """Базовый тест: Flask-приложение с пустой SQLite в памяти на время каждого теста."""
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def capture_statements(self, with_parameters: bool = False) -> list:
+        """Список SQL-запросов, выполняемых до конца теста (с with_parameters — пары (запрос, параметры))."""
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters) if with_parameters else statement)
+        engine = db.engine
+        event.listen(engine, 'before_cursor_execute', capture)
+        self.addCleanup(event.remove, engine, 'before_cursor_execute', capture)
+        return statements
@@ -0,0 +1,82 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from flask import Flask, Response, jsonify
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+from adapters.services.compression import compress_response, negotiate, precompressed_path, write_precompressed
+
+def _accept(value):
+    return parse_accept_header(value, Accept)
+
+class TestCompression(unittest.TestCase):
+    """Проверка сжатия ответов по Accept-Encoding и сжатых копий статических файлов."""
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.ctx = self.app.test_request_context()
+        self.ctx.push()
+
+    def tearDown(self):
+        self.ctx.pop()
+
+    def test_negotiate_uses_client_weights(self):
+        """Тест: выбирается кодировка с наибольшим весом, при равных — первая по порядку."""
+        self.assertEqual(negotiate(_accept('gzip, deflate, br'), ('br', 'gzip')), 'br')
+        self.assertEqual(negotiate(_accept('gzip;q=1, br;q=0.5'), ('br', 'gzip')), 'gzip')
+        self.assertEqual(negotiate(_accept('*'), ('gzip',)), 'gzip')
+        self.assertIsNone(negotiate(_accept('identity'), ('br', 'gzip')))
+        self.assertIsNone(negotiate(_accept('gzip;q=0'), ('gzip',)))
+
+    def test_large_json_is_compressed_with_weak_etag(self):
+        """Тест: JSON от порога сжимается, ETag становится слабым, добавляется Vary."""
+        payload = {'summary_data': [{'region': f'Регион {i}', 'fire_count': i} for i in range(200)]}
+        response = jsonify(payload)
+        response.set_etag('abc')
+        response = compress_response(response, _accept('gzip'), min_size=1024)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.headers['ETag'], 'W/"abc"')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(response.get_data())), payload)
+
+    def test_small_streamed_and_binary_responses_are_left_as_is(self):
+        """Тест: ответы меньше порога, потоковые и несжимаемых типов не изменяются."""
+        small = compress_response(jsonify({'ok': True}), _accept('gzip'), min_size=1024)
+        self.assertNotIn('Content-Encoding', small.headers)
+        self.assertIn('Accept-Encoding', small.headers['Vary'])
+
+        streamed = compress_response(Response(iter([b'[' * 2048]), mimetype='application/json'),
+                                     _accept('gzip'), min_size=1024)
+        self.assertNotIn('Content-Encoding', streamed.headers)
+
+        image = compress_response(Response(b'\x89PNG' * 1024, mimetype='image/png'), _accept('gzip'), min_size=1024)
+        self.assertNotIn('Content-Encoding', image.headers)
+        self.assertNotIn('Vary', image.headers)
+
+    def test_precompressed_static_files(self):
+        """Тест: сжатые копии пишутся для крупных текстовых файлов и не используются, если исходный новее."""
+        with tempfile.TemporaryDirectory() as directory:
+            os.makedirs(os.path.join(directory, 'js'))
+            script = os.path.join(directory, 'js', 'app.js')
+            with open(script, 'w', encoding='utf-8') as f:
+                f.write('console.log("пожар");\n' * 200)
+            with open(os.path.join(directory, 'tiny.css'), 'w', encoding='utf-8') as f:
+                f.write('body{}')
+            with open(os.path.join(directory, 'logo.png'), 'wb') as f:
+                f.write(b'\x89PNG' * 1024)
+
+            report = write_precompressed(directory, min_size=1024, encodings=('gzip',))
+            self.assertEqual(list(report), [os.path.join('js', 'app.js')])
+            self.assertLess(report[os.path.join('js', 'app.js')]['gzip'], report[os.path.join('js', 'app.js')]['size'])
+            self.assertEqual(precompressed_path(script, 'gzip'), script + '.gz')
+            with open(script + '.gz', 'rb') as f, open(script, 'rb') as original:
+                self.assertEqual(gzip.decompress(f.read()), original.read())
+            self.assertIsNone(precompressed_path(script, 'br'))
+
+            stamp = os.path.getmtime(script + '.gz')
+            os.utime(script, (stamp + 10, stamp + 10))
+            self.assertIsNone(precompressed_path(script, 'gzip'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+import os
+import tempfile
+import time
+import unittest
+from datetime import date
+from unittest.mock import patch
+from flask import Flask, session as flask_session
+from sqlalchemy import exc, text
+from core.entities import FireEntity
+from core.models import AuditLog, Fire
+from adapters.repositories.fire_repository import SQLAlchemyFireRepository
+from use_cases.fire_analysis import FireAnalysis
+from infrastructure.database import db, init_engine, pool_metrics, TimedQueuePool, ReplicaRouter, LAST_WRITE_KEY
+
+# Рекурсивный запрос, выполняющийся заметное время (сотни миллисекунд)
+SLOW_QUERY = text(
+    "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 2000000) SELECT count(*) FROM n"
+)
+
+class TestStatementTimeouts(unittest.TestCase):
+    """Проверка тайм-аутов запросов по эндпоинтам (на SQLite через обработчик прогресса)."""
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(
+            TESTING=True,
+            SQLALCHEMY_DATABASE_URI='sqlite://',
+            SQLALCHEMY_ENGINE_OPTIONS={'pool_size': 5, 'max_overflow': 5, 'pool_pre_ping': True},
+            STATEMENT_TIMEOUT_MS=20,
+            STATEMENT_TIMEOUTS_MS={'export': 60000},
+        )
+        init_engine(self.app)
+
+        @self.app.route('/interactive')
+        def interactive():
+            return str(db.session.execute(SLOW_QUERY).scalar())
+
+        @self.app.route('/export')
+        def export():
+            return str(db.session.execute(SLOW_QUERY).scalar())
+
+        self.client = self.app.test_client()
+
+    def test_interactive_endpoint_is_interrupted(self):
+        """Тест: запрос интерактивной страницы прерывается по короткому тайм-ауту."""
+        with self.assertRaises(exc.OperationalError):
+            self.client.get('/interactive')
+
+    def test_export_endpoint_has_long_timeout(self):
+        """Тест: для эндпоинта экспорта действует собственный длинный тайм-аут."""
+        response = self.client.get('/export')
+        self.assertEqual(response.data, b'2000000')
+
+    def test_no_timeout_outside_request(self):
+        """Тест: вне запроса (CLI, миграции) тайм-аут не применяется."""
+        with self.app.app_context():
+            self.assertEqual(db.session.execute(SLOW_QUERY).scalar(), 2000000)
+            db.session.remove()
+
+class TestPoolMetrics(unittest.TestCase):
+    """Проверка параметров пула из конфигурации и метрик ожидания соединения."""
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config.update(
+            SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(self.tmpdir.name, 'pool.db')}",
+            SQLALCHEMY_ENGINE_OPTIONS={'pool_size': 1, 'max_overflow': 0, 'pool_timeout': 1,
+                                       'pool_recycle': 1800, 'pool_pre_ping': True},
+        )
+        init_engine(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        pool_metrics.reset()
+
+    def tearDown(self):
+        db.engine.dispose()
+        self.ctx.pop()
+        self.tmpdir.cleanup()
+
+    def test_engine_uses_configured_pool(self):
+        """Тест: параметры пула берутся из SQLALCHEMY_ENGINE_OPTIONS."""
+        pool = db.engine.pool
+        self.assertIsInstance(pool, TimedQueuePool)
+        self.assertEqual(pool.size(), 1)
+        self.assertEqual(pool._recycle, 1800)
+
+    def test_checkout_wait_and_timeouts_are_counted(self):
+        """Тест: учитываются выдачи соединений и тайм-ауты при исчерпании пула."""
+        with db.engine.connect():
+            with self.assertRaises(exc.TimeoutError):
+                db.engine.connect()
+        stats = pool_metrics.snapshot()
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertGreaterEqual(stats['wait_max_ms'], 900)
+
+class TestReplicaRouting(unittest.TestCase):
+    """Маршрутизация чтений на реплику: два файла SQLite вместо основной базы и реплики."""
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config.update(
+            SECRET_KEY='test',
+            SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(self.tmpdir.name, 'primary.db')}",
+            SQLALCHEMY_REPLICA_URIS=[f"sqlite:///{os.path.join(self.tmpdir.name, 'replica.db')}"],
+            REPLICA_MAX_LAG_SECONDS=5,
+        )
+        init_engine(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.replica = self.app.extensions['replica_router'].engines['replica_0']
+        db.create_all()
+        db.metadata.create_all(self.replica)
+        # Реплика «отстаёт»: на ней только один из двух пожаров основной базы.
+        # Данные пишутся мимо сессии, чтобы запись не переключила чтения на основную базу.
+        fires = [{'id': 1, 'date': date(2023, 5, 1), 'region': 'Акмолинская область', 'location': 'Акколь'},
+                 {'id': 2, 'date': date(2023, 5, 2), 'region': 'Акмолинская область', 'location': 'Барап'}]
+        with db.engine.begin() as connection:
+            connection.execute(Fire.__table__.insert(), fires)
+        with self.replica.begin() as connection:
+            connection.execute(Fire.__table__.insert(), fires[:1])
+        self.fire_repo = SQLAlchemyFireRepository()
+
+    def tearDown(self):
+        db.session.remove()
+        for engine in (db.engine, self.replica):
+            engine.dispose()
+        self.ctx.pop()
+        self.tmpdir.cleanup()
+
+    def test_read_only_methods_use_replica(self):
+        """Тест: чтения репозитория идут на реплику, get_by_id — на основную базу."""
+        self.assertEqual([fire.id for fire in self.fire_repo.get_all()], [1])
+        self.assertEqual(len(self.fire_repo.page_after(limit=10)), 1)
+        self.assertIsNotNone(self.fire_repo.get_by_id(2))
+
+    def test_writes_go_to_primary(self):
+        """Тест: запись выполняется на основной базе, реплика не изменяется."""
+        self.fire_repo.add(FireEntity(id=0, date=date(2023, 6, 1), region='Акмолинская область', location='Акколь'))
+        self.assertEqual(db.session.query(Fire).count(), 3)
+        with self.replica.connect() as connection:
+            self.assertEqual(connection.execute(text('SELECT count(*) FROM fires')).scalar(), 1)
+
+    def test_read_your_writes_after_commit(self):
+        """Тест: после своей записи пользователь читает с основной базы в пределах допустимого лага."""
+        with self.app.test_request_context('/'):
+            self.fire_repo.add(FireEntity(id=0, date=date(2023, 6, 1), region='Акмолинская область', location='Акколь'))
+            self.assertEqual(len(self.fire_repo.get_all()), 3)
+            self.assertIn(LAST_WRITE_KEY, flask_session)
+
+    def test_reads_after_fire_write_use_primary_for_lag_window(self):
+        """Тест: после записи пожара все чтения процесса (и заполнение кэша) идут на основную базу max_lag секунд."""
+        db.session.add(AuditLog(username='admin', action='LOGIN', table_name='users', record_id=1))
+        db.session.commit()
+        with self.app.test_request_context('/'):
+            self.assertEqual(len(self.fire_repo.get_all()), 1)
+        FireAnalysis(self.fire_repo).add_fire(FireEntity(id=0, date=date(2023, 6, 1), region='Акмолинская область',
+                                                         location='Акколь'))
+        with self.app.test_request_context('/'):
+            self.assertEqual(len(self.fire_repo.get_all()), 3)
+        later = time.monotonic() + 6
+        with patch('infrastructure.database.time.monotonic', return_value=later), \
+                self.app.test_request_context('/'):
+            self.assertEqual(len(self.fire_repo.get_all()), 1)
+
+    def test_uncommitted_write_is_read_from_primary(self):
+        """Тест: после записи в текущей транзакции чтения идут на основную базу."""
+        db.session.add(Fire(date=date(2023, 6, 1), region='Акмолинская область', location='Акколь'))
+        db.session.flush()
+        self.assertEqual(len(self.fire_repo.get_all()), 3)
+        db.session.rollback()
+        self.assertEqual(len(self.fire_repo.get_all()), 1)
+
+    def test_lagging_replica_is_skipped(self):
+        """Тест: реплика с лагом больше допустимого не используется."""
+        with patch.object(ReplicaRouter, 'measure_lag', return_value=30.0):
+            self.assertEqual(len(self.fire_repo.get_all()), 2)
+
+if __name__ == '__main__':
+    unittest.main()
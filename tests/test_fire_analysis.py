@@ -1,8 +1,15 @@
 import unittest
-from datetime import datetime
-from unittest.mock import Mock
+from datetime import datetime, date
+from unittest.mock import Mock, patch
+from flask import Flask
 from core.entities import FireEntity
-from use_cases.fire_analysis import FireAnalysis
+from core.fire_cube import CUBE_AXES
+from core.models import Fire
+from infrastructure.database import db
+from tests import DatabaseTestCase
+from adapters.repositories.fire_repository import SQLAlchemyFireRepository
+from use_cases.fire_analysis import FireAnalysis, STAMP_CHECK_INTERVAL
+from use_cases.result_cache import ResultCache
 
 class TestFireAnalysis(unittest.TestCase):
     def setUp(self):
@@ -93,5 +100,300 @@ class TestFireAnalysis(unittest.TestCase):
         self.fire_repository.add.assert_called_once_with(fire)
         self.assertEqual(result.id, 1)
 
+class TestFireAnalysisQueries(DatabaseTestCase):
+    """Проверка того, что фильтры по региону и датам выполняются в SQL."""
+    def setUp(self):
+        super().setUp()
+        self.regions = ['Акмолинская область', 'Алматинская область', 'Костанайская область']
+        for i in range(30):
+            db.session.add(Fire(date=date(2023, 1 + i % 12, 1), region=self.regions[i % 3], location='Локация'))
+        db.session.commit()
+        self.fire_analysis = FireAnalysis(SQLAlchemyFireRepository())
+        self.statements = self.capture_statements()
+
+    def test_one_filtered_query_per_region(self):
+        """Тест: один запрос с WHERE по региону на каждый регион, без чтения всей таблицы."""
+        for region in self.regions:
+            fires = self.fire_analysis.get_fires_by_region(region)
+            self.assertEqual(len(fires), 10)
+            self.assertTrue(all(fire.region == region for fire in fires))
+        self.assertEqual(len(self.statements), len(self.regions))
+        for statement in self.statements:
+            self.assertIn('WHERE fires.region', statement)
+
+    def test_open_ended_date_range(self):
+        """Тест фильтрации по открытым диапазонам дат."""
+        region = self.regions[0]
+        since = self.fire_analysis.get_fires_by_region(region, start_date=datetime(2023, 10, 1))
+        self.assertEqual({fire.date for fire in since}, {date(2023, 10, 1)})
+        until = self.fire_analysis.get_fires_by_region(region, end_date=datetime(2023, 4, 1))
+        self.assertEqual({fire.date for fire in until}, {date(2023, 1, 1), date(2023, 4, 1)})
+        self.assertEqual(len(self.statements), 2)
+        self.assertIn('fires.date >=', self.statements[0])
+        self.assertIn('fires.date <=', self.statements[1])
+
+class TestFireRegionSummary(DatabaseTestCase):
+    """Проверка сводки по регионам и агрегатора aggregate()."""
+    def setUp(self):
+        super().setUp()
+        db.session.add_all([
+            Fire(date=date(2023, 5, 1), region='Алматинская область', location='Локация', damage_area=2.5,
+                 damage_tenge=100, lo_people_count=3, aps_aircraft_count=1),
+            Fire(date=date(2023, 5, 2), region='Акмолинская область', location='Локация', damage_area=1.25,
+                 kps_technic_count=2),
+            Fire(date=date(2023, 6, 1), region='Алматинская область', location='Локация', damage_area=4.0,
+                 damage_tenge=50, aps_people_count=5, mio_aircraft_count=2),
+        ])
+        db.session.commit()
+        self.fire_repository = SQLAlchemyFireRepository()
+        self.fire_repository.rebuild_rollup()
+        self.fire_analysis = FireAnalysis(self.fire_repository)
+
+    def test_summary_by_region(self):
+        """Тест сводки по регионам и итогов с учётом периода."""
+        result = self.fire_analysis.get_summary_by_region()
+        self.assertEqual([row['region'] for row in result['summary_data']],
+                         ['Акмолинская область', 'Алматинская область'])
+        almaty = result['summary_data'][1]
+        self.assertEqual((almaty['fire_count'], almaty['total_damage_area'], almaty['total_damage_tenge'], almaty['date']),
+                         (2, 6.5, 150, '2023-06-01'))
+        self.assertEqual(result['totals'], {
+            'fire_count': 3, 'damage_area': 7.75, 'damage_tenge': 150,
+            'people': 8, 'technic': 2, 'aircraft': 3,
+            'aps_people': 5, 'aps_technic': 0, 'aps_aircraft': 1,
+        })
+        may = self.fire_analysis.get_summary_by_region(datetime(2023, 5, 1), datetime(2023, 5, 31))
+        self.assertEqual(may['totals']['fire_count'], 2)
+
+    def test_open_ended_period(self):
+        """Тест: задана только одна граница периода — фильтр по ней, а не сводка за всё время."""
+        self.assertEqual(self.fire_analysis.get_summary_by_region(start_date=date(2023, 6, 1))['totals']['fire_count'], 1)
+        self.assertEqual(self.fire_analysis.get_summary_by_region(end_date=date(2023, 5, 1))['totals']['fire_count'], 1)
+        self.assertEqual(len(self.fire_analysis.get_data_for_dash(start_date=date(2023, 5, 2))), 2)
+        self.assertEqual(len(self.fire_analysis.get_data_for_dash(end_date=date(2023, 5, 2))), 2)
+
+    def test_data_for_dash_reads_projected_columns(self):
+        """Тест: данные для Dash — только нужные колонки, пустые суммы становятся нулём."""
+        frame = self.fire_analysis.get_data_for_dash(start_date=date(2023, 5, 2))
+        self.assertEqual(list(frame.columns), ['id', 'date', 'region', 'damage_area', 'damage_tenge'])
+        self.assertEqual(sorted(frame['damage_tenge'].tolist()), [0, 50])
+        self.assertEqual(sorted(frame['damage_area'].tolist()), [1.25, 4.0])
+
+    def test_aggregate_by_region_and_forestry(self):
+        """Тест: суммы aggregate() по регионам и группировка по полю без значения."""
+        rows = {row['region']: row for row in self.fire_analysis.aggregate(['region'])['summary_data']}
+        self.assertEqual({region: row['fire_count'] for region, row in rows.items() if row['fire_count']},
+                         {'Алматинская область': 2, 'Акмолинская область': 1})
+        self.assertAlmostEqual(rows['Акмолинская область']['total_damage_area'], 1.25)
+        by_forestry = self.fire_analysis.aggregate(['forestry'], scope={'regions': ['Акмолинская область']})
+        self.assertEqual(by_forestry['summary_data'][0]['forestry'], None)
+        self.assertEqual(by_forestry['totals']['fire_count'], 1)
+
+class TestFireTimeseries(DatabaseTestCase):
+    """Проверка временных рядов по дням, неделям и месяцам из дневной сводки."""
+    def setUp(self):
+        super().setUp()
+        # 2023-05-01 — понедельник, 2023-05-07 — воскресенье той же недели
+        db.session.add_all([
+            Fire(date=date(2023, 5, 1), region='Алматинская область', location='Локация', damage_area=2.5),
+            Fire(date=date(2023, 5, 7), region='Акмолинская область', location='Локация', damage_area=1.25),
+            Fire(date=date(2023, 6, 1), region='Алматинская область', location='Локация', damage_area=4.0),
+        ])
+        db.session.commit()
+        self.fire_repository = SQLAlchemyFireRepository()
+        self.fire_repository.rebuild_rollup()
+        self.fire_analysis = FireAnalysis(self.fire_repository)
+
+    def test_weeks_start_on_monday_and_gaps_are_zero(self):
+        """Тест: неделя начинается с понедельника, пустые недели заполнены нулями."""
+        result = self.fire_analysis.get_timeseries('week', by_region=True)
+        self.assertEqual(result['labels'], ['2023-05-01', '2023-05-08', '2023-05-15', '2023-05-22', '2023-05-29'])
+        self.assertEqual(result['fire_count'], [2, 0, 0, 0, 1])
+        self.assertEqual(result['damage_area'], [3.75, 0.0, 0.0, 0.0, 4.0])
+        self.assertEqual(result['regions']['Акмолинская область']['fire_count'], [1, 0, 0, 0, 0])
+
+    def test_months_cover_requested_range(self):
+        """Тест: интервалы покрывают весь запрошенный период, а не только даты с пожарами."""
+        result = self.fire_analysis.get_timeseries('month', date(2023, 4, 15), date(2023, 7, 1),
+                                                   regions=['Алматинская область'], by_region=True)
+        self.assertEqual(result['labels'], ['2023-04-01', '2023-05-01', '2023-06-01', '2023-07-01'])
+        self.assertEqual(result['fire_count'], [0, 1, 1, 0])
+        self.assertEqual(list(result['regions']), ['Алматинская область'])
+
+    def test_days_and_invalid_bucket(self):
+        """Тест: ряд по дням и отказ для неизвестного интервала или слишком длинного периода."""
+        result = self.fire_analysis.get_timeseries('day', date(2023, 5, 1), date(2023, 5, 7))
+        self.assertEqual(result['fire_count'], [1, 0, 0, 0, 0, 0, 1])
+        self.assertNotIn('regions', result)
+        with self.assertRaises(ValueError):
+            self.fire_analysis.get_timeseries('hour')
+        with self.assertRaises(ValueError):
+            self.fire_analysis.get_timeseries('day', date(2000, 1, 1), date(2023, 1, 1))
+
+class TestFireCube(DatabaseTestCase):
+    """Проверка куба ресурсов регион × месяц × группа × вид и его инкрементального пересчёта."""
+    def setUp(self):
+        super().setUp()
+        self.fire_analysis = FireAnalysis(SQLAlchemyFireRepository())
+        self.fire_analysis.add_fire(FireEntity(id=0, date=date(2022, 7, 3), region='Алматинская область',
+                                               location='Локация', aps_aircraft_count=2, lo_people_count=4))
+        self.fire_analysis.add_fire(FireEntity(id=0, date=date(2023, 7, 9), region='Алматинская область',
+                                               location='Локация', aps_aircraft_count=1))
+        self.fire_analysis.add_fire(FireEntity(id=0, date=date(2023, 8, 1), region='Акмолинская область',
+                                               location='Локация', aps_aircraft_count=5))
+
+    def _aps_aircraft_in_july(self):
+        return self.fire_analysis.slice_cube(keep=['month'], regions=['Алматинская область'], groups=['aps'],
+                                             kinds=['aircraft'], months_of_year=[7])
+
+    def test_slice_and_dice(self):
+        """Тест: срез по региону, группе, виду и месяцу года; регионы — в порядке REGIONS_AND_LOCATIONS."""
+        self.assertEqual(self._aps_aircraft_in_july(), {
+            'axes': ['month'], 'labels': {'month': ['2022-07', '2023-07']}, 'values': [2, 1]})
+        by_region = self.fire_analysis.slice_cube(keep=['region'], kinds=['aircraft'], start='2023-01')
+        self.assertEqual(by_region['labels']['region'][:3],
+                         ['Акмолинская область', 'Актюбинская область', 'Алматинская область'])
+        self.assertEqual(by_region['values'][:3], [5, 0, 1])
+        self.assertEqual(self.fire_analysis.slice_cube(groups=['lo'], kinds=['people'])['values'], 4)
+        with self.assertRaises(ValueError):
+            self.fire_analysis.slice_cube(groups=['fire_brigade'])
+
+    def test_incremental_update_matches_rebuild(self):
+        """Тест: после изменений пересчитываются только помеченные ячейки, результат совпадает с полной сборкой."""
+        self._aps_aircraft_in_july()
+        fire = self.fire_analysis.add_fire(FireEntity(id=0, date=date(2021, 7, 1), region='Алматинская область',
+                                                      location='Локация', aps_aircraft_count=3))
+        fire.date, fire.aps_aircraft_count = date(2021, 6, 30), 7
+        self.fire_analysis.update_fire(fire)
+        self.assertEqual(self.fire_analysis._cube_cells, {('Алматинская область', '2021-06'),
+                                                          ('Алматинская область', '2021-07')})
+        incremental = self.fire_analysis.slice_cube(keep=CUBE_AXES)
+        self.fire_analysis._mark_cube_cells(None)
+        self.assertEqual(incremental, self.fire_analysis.slice_cube(keep=CUBE_AXES))
+        self.assertEqual(self._aps_aircraft_in_july()['values'], [0, 2, 1])
+
+    def test_scope_limits_regions(self):
+        """Тест: инженер видит в кубе только свой регион."""
+        result = self.fire_analysis.slice_cube(keep=['region'], kinds=['aircraft'],
+                                               scope={'regions': ['Акмолинская область']})
+        self.assertEqual(result['labels']['region'], ['Акмолинская область'])
+        self.assertEqual(result['values'], [5])
+
+class TestFireAnalysisCache(unittest.TestCase):
+    """Проверка кэша результатов аналитики и его сброса при изменении данных."""
+    def setUp(self):
+        self.now = 0.0
+        self.cache = ResultCache(max_entries=2, ttl=60, clock=lambda: self.now)
+        self.fire_repository = Mock()
+        self.fire_repository.aggregate_by_region.side_effect = lambda *args: {'args': args}
+        self.fire_repository.data_stamp.return_value = (0, 0, 0, None)
+        self.fire_analysis = FireAnalysis(self.fire_repository, self.cache)
+
+    def test_repeated_request_is_served_from_cache(self):
+        """Тест: повторный запрос с тем же ключом не обращается к репозиторию."""
+        first = self.fire_analysis.get_region_aggregates(datetime(2023, 1, 1), date(2023, 12, 31), ['Б', 'А'])
+        second = self.fire_analysis.get_region_aggregates(date(2023, 1, 1), datetime(2023, 12, 31), ['А', 'Б'])
+        self.assertIs(first, second)
+        self.assertEqual(self.fire_repository.aggregate_by_region.call_count, 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_key_includes_date_range_regions_and_scope(self):
+        """Тест: разные даты, регионы и области видимости кэшируются раздельно."""
+        self.fire_analysis.get_region_aggregates()
+        self.fire_analysis.get_region_aggregates(start_date=date(2023, 1, 1))
+        self.fire_analysis.get_region_aggregates(regions=['А'])
+        result = self.fire_analysis.get_region_aggregates(regions=['А', 'Б'], scope={'regions': ['Б']})
+        self.assertEqual(result['args'][2], ['Б'])
+        self.assertEqual(self.cache.misses, 4)
+        self.assertEqual(self.cache.hits, 0)
+
+    def test_mutations_invalidate_cache(self):
+        """Тест: добавление, изменение и удаление пожара сбрасывают кэш."""
+        fire = Mock()
+        self.fire_repository.update.return_value = (fire, {'damage_area': (1.0, 2.0)})
+        for mutate in (lambda: self.fire_analysis.add_fire(fire),
+                       lambda: self.fire_analysis.update_fire(fire),
+                       lambda: self.fire_analysis.delete_fire(1)):
+            self.fire_analysis.get_region_aggregates()
+            mutate()
+            self.fire_analysis.get_region_aggregates()
+        self.assertEqual(self.fire_repository.aggregate_by_region.call_count, 4)
+        self.assertEqual(self.cache.version, 3)
+
+    def test_ttl_and_lru_eviction(self):
+        """Тест: запись истекает по TTL, а при переполнении вытесняется самая старая."""
+        self.fire_analysis.get_region_aggregates(regions=['А'])
+        self.now = 61
+        self.fire_analysis.get_region_aggregates(regions=['А'])
+        self.assertEqual(self.cache.misses, 2)
+
+        self.fire_analysis.get_region_aggregates(regions=['Б'])
+        self.fire_analysis.get_region_aggregates(regions=['А'])
+        self.fire_analysis.get_region_aggregates(regions=['В'])
+        self.assertEqual(self.cache.evictions, 1)
+        self.fire_analysis.get_region_aggregates(regions=['А'])
+        self.fire_analysis.get_region_aggregates(regions=['Б'])
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (2, 5, 2))
+
+    def test_result_not_stored_if_data_changed_during_computation(self):
+        """Тест: результат, вычисленный до изменения данных, не попадает в кэш."""
+        def compute():
+            self.cache.bump_version()
+            return 'устаревший'
+        self.cache.get_or_compute('key', compute)
+        self.assertEqual(self.cache.get_or_compute('key', lambda: 'новый'), 'новый')
+
+    def test_data_version_invalidates_cache_on_any_change(self):
+        """Тест: любое изменение метки (в том числе правка другим процессом — только запись аудита)
+        сбрасывает кэш и куб; неизменная метка кэш не трогает."""
+        self.fire_repository.data_stamp.return_value = (2, 2, 5, datetime(2023, 5, 1, 12))
+        self.assertEqual(self.fire_analysis.data_version(), ('2-2-5', datetime(2023, 5, 1, 12)))
+        self.fire_analysis.get_region_aggregates()
+        self.fire_analysis.data_version()
+        self.fire_analysis.get_region_aggregates()
+        self.assertEqual((self.cache.version, self.fire_repository.aggregate_by_region.call_count), (0, 1))
+
+        self.fire_analysis._cube = Mock()
+        self.fire_repository.data_stamp.return_value = (2, 2, 6, datetime(2023, 5, 1, 13))
+        self.assertEqual(self.fire_analysis.data_version()[0], '2-2-6')
+        self.assertEqual(self.cache.version, 1)
+        self.assertIsNone(self.fire_analysis._cube)
+        self.fire_analysis.get_region_aggregates()
+
+        self.fire_repository.data_stamp.return_value = (10, 10, 6, datetime(2023, 5, 1, 13))
+        self.assertEqual(self.fire_analysis.data_version()[0], '10-10-6')
+        self.fire_analysis.get_region_aggregates()
+        self.assertEqual((self.cache.version, self.fire_repository.aggregate_by_region.call_count), (2, 3))
+
+    def test_cached_reads_check_stamp_at_most_once_per_interval(self):
+        """Тест: чтения через кэш сами сверяют метку (запись другим процессом видна без ETag-запроса),
+        но не чаще раза в STAMP_CHECK_INTERVAL."""
+        with patch('use_cases.fire_analysis.time.monotonic', return_value=100.0):
+            self.fire_analysis.get_region_aggregates()
+            self.fire_repository.data_stamp.return_value = (1, 1, 0, None)
+            self.fire_analysis.get_region_aggregates()
+        self.assertEqual((self.fire_repository.data_stamp.call_count, self.cache.hits), (1, 1))
+        with patch('use_cases.fire_analysis.time.monotonic', return_value=100.0 + STAMP_CHECK_INTERVAL):
+            self.fire_analysis.get_region_aggregates()
+        self.assertEqual(self.fire_repository.data_stamp.call_count, 2)
+        self.assertEqual((self.cache.version, self.fire_repository.aggregate_by_region.call_count), (1, 2))
+
+    def test_conditional_json_skips_build_when_not_modified(self):
+        """Тест: запрос с совпадающим ETag получает 304 без построения ответа."""
+        from adapters.controllers.fire_controller import conditional_json
+        self.fire_repository.data_stamp.return_value = (2, 2, 5, datetime(2023, 5, 1, 12))
+        build = Mock(side_effect=lambda: {'ok': True})
+        app = Flask(__name__)
+        with app.test_request_context('/api/fires'):
+            response = conditional_json(self.fire_analysis, build, {'regions': ['А']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Cache-Control'], 'private, no-cache')
+        etag = response.headers['ETag']
+        with app.test_request_context('/api/fires', headers={'If-None-Match': etag}):
+            self.assertEqual(conditional_json(self.fire_analysis, build, {'regions': ['А']}).status_code, 304)
+            self.assertEqual(conditional_json(self.fire_analysis, build, {'regions': ['Б']}).status_code, 200)
+        self.assertEqual(build.call_count, 2)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,93 @@
+import io
+import unittest
+from datetime import date
+from core.models import Fire
+from infrastructure.database import db
+from tests import DatabaseTestCase
+from adapters.repositories.fire_repository import SQLAlchemyFireRepository
+from adapters.repositories.region_repository import SQLAlchemyRegionRepository
+from adapters.services.spreadsheet_reader import read_rows
+from use_cases.fire_analysis import FireAnalysis
+from use_cases.fire_import import FireImport
+
+CSV_DATA = (
+    "Дата;Регион;КГУ/ООПТ;Площадь пожара;Люди ЛО;АПС;ВС АПС;Описание\n"
+    "2023-05-01;Акмолинская область;Акколь;10,5;5;да;1;Первый\n"
+    "02.06.2023;Акмолинская область;Барап;-3;;нет;;\n"
+    "2023-07-01;Несуществующая область;Акколь;1;;;;\n"
+    "2023-07-02;Акмолинская область;Каскеленское;1;;;;\n"
+    "не дата;Акмолинская область;Акколь;abc;1.5;;;\n"
+    ";;;;;;;\n"
+    "2023-08-01;Алматинская область;Каскеленское;2;;;;\n"
+)
+
+class TestFireImport(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.fire_import = FireImport(SQLAlchemyFireRepository(), SQLAlchemyRegionRepository())
+
+    def _import(self, **kwargs):
+        stream = io.BytesIO(CSV_DATA.encode('utf-8'))
+        return self.fire_import.import_rows(read_rows(stream, 'fires.csv'), **kwargs)
+
+    def test_import_csv_with_row_errors(self):
+        """Тест импорта CSV: корректные строки записываются, ошибки — по номерам строк."""
+        report = self._import(chunk_size=2)
+        self.assertEqual(report['total'], 6)
+        self.assertEqual(report['imported'], 3)
+        self.assertEqual(report['failed'], 3)
+        self.assertEqual([error['row'] for error in report['errors']], [4, 5, 6])
+        self.assertEqual(len(report['errors'][2]['errors']), 4)  # формат даты, пустая дата, площадь, люди ЛО (не целое)
+
+        fires = {fire.location: fire for fire in db.session.query(Fire).all()}
+        self.assertEqual(fires['Акколь'].date, date(2023, 5, 1))
+        self.assertEqual(float(fires['Акколь'].damage_area), 10.5)
+        self.assertTrue(fires['Акколь'].aps_flag)
+        self.assertEqual(fires['Акколь'].aps_aircraft_count, 1)
+        self.assertEqual(float(fires['Барап'].damage_area), 3.0)  # Правило FireEntity: модуль значения
+        self.assertFalse(fires['Барап'].aps_flag)
+
+    def test_import_invalidates_analysis_cache_and_cube(self):
+        """Тест: после импорта срез куба и сводка по регионам учитывают новые строки."""
+        fire_analysis = FireAnalysis(SQLAlchemyFireRepository())
+        self.fire_import = FireImport(SQLAlchemyFireRepository(), SQLAlchemyRegionRepository(), fire_analysis)
+        self.assertEqual(fire_analysis.slice_cube(groups=['aps'], kinds=['aircraft'])['values'], 0)
+        self.assertEqual(fire_analysis.aggregate(['region'])['totals']['fire_count'], 0)
+        self._import()
+        self.assertEqual(fire_analysis.slice_cube(groups=['aps'], kinds=['aircraft'])['values'], 1)
+        self.assertEqual(fire_analysis.aggregate(['region'])['totals']['fire_count'], 3)
+
+    def test_non_finite_numbers_are_row_errors(self):
+        """Тест: «inf» и «nan» попадают в отчёт по строкам, а не прерывают импорт."""
+        data = ("Дата;Регион;КГУ/ООПТ;Площадь пожара;Люди ЛО\n"
+                "2023-05-01;Акмолинская область;Акколь;nan;inf\n"
+                "2023-05-02;Акмолинская область;Барап;1;2\n")
+        report = self.fire_import.import_rows(read_rows(io.BytesIO(data.encode('utf-8')), 'fires.csv'))
+        self.assertEqual((report['imported'], report['failed']), (1, 1))
+        self.assertEqual(len(report['errors'][0]['errors']), 2)
+        self.assertEqual(db.session.query(Fire).one().location, 'Барап')
+
+    def test_import_restricted_to_allowed_regions(self):
+        """Тест ограничения импорта регионом инженера."""
+        report = self._import(allowed_regions=['Алматинская область'])
+        self.assertEqual(report['imported'], 1)
+        self.assertEqual(db.session.query(Fire).one().region, 'Алматинская область')
+
+    def test_import_xlsx(self):
+        """Тест чтения XLSX."""
+        from openpyxl import Workbook
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(['date', 'region', 'location', 'damage_area', 'kps_flag'])
+        sheet.append([date(2023, 5, 1), 'Акмолинская область', 'Акколь', 4.25, True])
+        stream = io.BytesIO()
+        workbook.save(stream)
+        stream.seek(0)
+        report = self.fire_import.import_rows(read_rows(stream, 'fires.xlsx'))
+        self.assertEqual(report['imported'], 1)
+        fire = db.session.query(Fire).one()
+        self.assertEqual(float(fire.damage_area), 4.25)
+        self.assertTrue(fire.kps_flag)
+
+if __name__ == '__main__':
+    unittest.main()
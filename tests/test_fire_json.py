@@ -0,0 +1,46 @@
+import json
+import unittest
+from datetime import date
+from decimal import Decimal
+from core.entities import FireEntity
+from adapters.services.fire_json import fire_to_json, fires_to_json, json_with_fires, iter_json_array, iter_ndjson
+
+class TestFireJson(unittest.TestCase):
+    def setUp(self):
+        self.fires = [
+            FireEntity(id=1, date=date(2023, 5, 1), region='Акмолинская область', location='Акколь',
+                       damage_area=1.5, lo_flag=True, lo_people_count=3, description='Пожар "у реки"\n'),
+            FireEntity(id=2, date=date(2023, 5, 2), region='Алматинская область', location='Каскеленское'),
+        ]
+
+    def test_fire_matches_to_dict(self):
+        """Тест: JSON сущности совпадает с to_dict, ключи отсортированы как у jsonify."""
+        for fire in self.fires:
+            text = fire_to_json(fire)
+            self.assertEqual(json.loads(text), fire.to_dict())
+            self.assertEqual(list(json.loads(text)), sorted(fire.to_dict()))
+        self.assertIn('"region":"Акмолинская область"', fire_to_json(self.fires[0]))
+
+    def test_decimal_and_non_finite_values(self):
+        """Тест: Decimal пишется числом, NaN — как null."""
+        fire = FireEntity(id=3, date=date(2023, 5, 3), region='Акмолинская область', location='Акколь',
+                          damage_area=Decimal('2.5000'), damage_les=float('nan'))
+        data = json.loads(fire_to_json(fire))
+        self.assertEqual((data['damage_area'], data['damage_les']), (2.5, None))
+
+    def test_array_object_and_streams(self):
+        """Тест: массив, объект с массивом и потоковые форматы дают корректный JSON."""
+        expected = [fire.to_dict() for fire in self.fires]
+        self.assertEqual(json.loads(fires_to_json(self.fires)), expected)
+        self.assertEqual(json.loads(json_with_fires({'next_cursor': None}, 'fires', self.fires)),
+                         {'next_cursor': None, 'fires': expected})
+        batches = [self.fires[:1], [], self.fires[1:]]
+        chunks = list(iter_json_array(batches))
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(json.loads(''.join(chunks)), expected)
+        self.assertEqual(''.join(iter_json_array([])), '[]')
+        lines = ''.join(iter_ndjson(batches)).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import json
+from adapters.services.geometry_asset import GeometryAsset, level_assets, write_levels
+from adapters.services.region_geometry import GEOMETRY_LEVELS, RegionTopology
+
+class TestGeometryAsset(unittest.TestCase):
+    """Проверка файла геометрии с отпечатком содержимого в имени."""
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'regions.geojson')
+        self._write(b'{"type": "FeatureCollection", "features": []}')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _write(self, data):
+        with open(self.path, 'wb') as f:
+            f.write(data)
+
+    def test_file_is_read_once(self):
+        """Тест: файл читается один раз, имя содержит отпечаток содержимого."""
+        asset = GeometryAsset(self.path)
+        with patch('builtins.open', wraps=open) as opened:
+            self.assertEqual(asset.data, b'{"type": "FeatureCollection", "features": []}')
+            self.assertRegex(asset.filename, r'^regions\.[0-9a-f]{12}\.geojson$')
+            asset.data
+        self.assertEqual(opened.call_count, 1)
+
+    def test_fingerprint_follows_content(self):
+        """Тест: другое содержимое файла даёт другое имя."""
+        first = GeometryAsset(self.path).filename
+        self.assertEqual(GeometryAsset(self.path).filename, first)
+        self._write(b'{"type": "FeatureCollection", "features": [{}]}')
+        self.assertNotEqual(GeometryAsset(self.path).filename, first)
+
+def _square(x0, x1, border, region):
+    """Квадрат [x0, x1] × [0, 1]; border — точки общей границы x = 1 снизу вверх."""
+    if x0 < 1:
+        ring = [[x0, 0], [1, 0], *border, [1, 1], [x0, 1], [x0, 0]]
+    else:
+        ring = [[1, 0], [x1, 0], [x1, 1], [1, 1], *reversed(border), [1, 0]]
+    return {'type': 'Feature', 'properties': {'region': region, 'OBJECTID': 1},
+            'geometry': {'type': 'Polygon', 'coordinates': [ring]}}
+
+class TestRegionGeometry(unittest.TestCase):
+    """Проверка упрощения геометрии с сохранением общих границ."""
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'regions.geojson')
+        # Извилистая общая граница двух регионов: отклонения 0.001 и одно 0.2
+        border = [[1 + (0.2 if i == 5 else 0.001 * (-1) ** i), i / 10] for i in range(1, 10)]
+        self.source = {'type': 'FeatureCollection',
+                       'features': [_square(0, 1, border, 'Запад'), _square(1, 2, border, 'Восток')]}
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _ring(self, data, region):
+        feature = next(f for f in data['features'] if f['properties']['region'] == region)
+        self.assertEqual(feature['properties'], {'region': region})
+        return feature['geometry']['coordinates'][0]
+
+    def test_shared_border_is_simplified_once(self):
+        """Тест: общая граница упрощается одинаково для обоих регионов, кольца замкнуты."""
+        data = RegionTopology.from_geojson(self.source).simplify(0.01, 3)
+        west, east = self._ring(data, 'Запад'), self._ring(data, 'Восток')
+        self.assertEqual((west[0], east[0]), (west[-1], east[-1]))
+        west_border = [point for point in west if point[0] > 0.5 and 0 < point[1] < 1]
+        east_border = [point for point in east if point[0] < 1.5 and 0 < point[1] < 1]
+        self.assertEqual(west_border, [[1.001, 0.4], [1.2, 0.5], [1.001, 0.6]])
+        self.assertEqual(east_border[::-1], west_border)
+
+    def test_levels_are_built_when_files_missing(self):
+        """Тест: без собранных файлов уровни строятся из исходника, команда сборки пишет те же данные."""
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.source, f)
+        directory = os.path.join(self.tmpdir.name, 'geometry')
+        assets = level_assets(self.path, directory)
+        self.assertEqual(list(assets), list(GEOMETRY_LEVELS))
+        built = {level: asset.data for level, asset in assets.items()}
+        sizes = write_levels(self.path, directory)
+        self.assertEqual(sizes, {level: len(data) for level, data in built.items()})
+        self.assertEqual(level_assets(self.path, directory)['low'].filename, assets['low'].filename)
+
+if __name__ == '__main__':
+    unittest.main()
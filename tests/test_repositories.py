@@ -1,9 +1,13 @@
 import unittest
 from unittest.mock import Mock, patch
 from core.entities import FireEntity
-from adapters.repositories.fire_repository import SQLAlchemyFireRepository
+from core.models import Fire, AuditLog, FireDailyRegionRollup
+from infrastructure.database import db
+from tests import DatabaseTestCase
+from adapters.repositories.fire_repository import SQLAlchemyFireRepository, ConcurrentUpdateError
 from adapters.repositories.region_repository import SQLAlchemyRegionRepository
-from datetime import datetime
+from adapters.repositories.audit_repository import AuditLogRepository
+from datetime import datetime, date
 
 class TestRepositories(unittest.TestCase):
     def setUp(self):
@@ -31,5 +35,354 @@ class TestRepositories(unittest.TestCase):
         self.assertTrue(len(result) > 0)
         self.assertIn('Акколь', result)
 
+class TestFireRepositoryAggregation(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        db.session.add_all([
+            Fire(date=date(2023, 5, 1), region='Акмолинская область', location='Акколь', damage_area=10.5,
+                 damage_tenge=1000, lo_people_count=5, aps_people_count=2, aps_technic_count=1),
+            Fire(date=date(2023, 7, 1), region='Акмолинская область', location='Барап', damage_area=4.5,
+                 kps_aircraft_count=1, other_org_technic_count=3),
+            Fire(date=date(2024, 6, 1), region='Алматинская область', location='Каскеленское', damage_area=20,
+                 damage_tenge=2000, mio_people_count=3, aps_aircraft_count=2),
+        ])
+        db.session.commit()
+        self.fire_repo = SQLAlchemyFireRepository()
+        # Пожары добавлены в обход репозитория, поэтому сводка пересчитывается целиком
+        self.fire_repo.rebuild_rollup()
+
+    def test_aggregate_by_region(self):
+        """Тест сводки по регионам без фильтров."""
+        result = self.fire_repo.aggregate_by_region()
+        rows = {row['region']: row for row in result['summary_data']}
+        akmola = rows['Акмолинская область']
+        self.assertEqual(akmola['fire_count'], 2)
+        self.assertEqual(akmola['total_damage_area'], 15.0)
+        self.assertEqual(akmola['total_damage_tenge'], 1000)
+        self.assertEqual(akmola['total_people'], 7)
+        self.assertEqual(akmola['total_technic'], 4)
+        self.assertEqual(akmola['total_aircraft'], 1)
+        self.assertEqual(akmola['aps_people'], 2)
+        self.assertEqual(akmola['date'], '2023-07-01')
+        self.assertEqual(result['totals']['fire_count'], 3)
+        self.assertEqual(result['totals']['aircraft'], 3)
+        self.assertEqual(result['totals']['damage_tenge'], 3000)
+
+    def test_aggregate_by_region_with_filters(self):
+        """Тест сводки с фильтрами по датам и регионам."""
+        result = self.fire_repo.aggregate_by_region(start_date=datetime(2024, 1, 1))
+        self.assertEqual([row['region'] for row in result['summary_data'] if row['fire_count']], ['Алматинская область'])
+        result = self.fire_repo.aggregate_by_region(end_date=date(2023, 6, 30), regions=['Акмолинская область'])
+        self.assertEqual(result['totals']['fire_count'], 1)
+        self.assertEqual(result['totals']['people'], 7)
+
+    def test_regions_without_fires_get_zero_rows(self):
+        """Тест: регион без пожаров за период остаётся в сводке с нулями (в пределах фильтра регионов)."""
+        result = self.fire_repo.aggregate_by_region(start_date=date(2024, 1, 1))
+        self.assertEqual([row['region'] for row in result['summary_data']],
+                         ['Акмолинская область', 'Алматинская область'])
+        akmola = result['summary_data'][0]
+        self.assertEqual((akmola['fire_count'], akmola['total_damage_area'], akmola['total_people'], akmola['date']),
+                         (0, 0.0, 0, None))
+        self.assertEqual(result['totals']['fire_count'], 1)
+        only_almaty = self.fire_repo.aggregate_by_region(start_date=date(2024, 1, 1), regions=['Алматинская область'])
+        self.assertEqual([row['region'] for row in only_almaty['summary_data']], ['Алматинская область'])
+
+    def test_aggregate_by_other_dimensions(self):
+        """Тест группировки по территории (таблица fires) и по месяцу и году (дневная сводка)."""
+        by_location = self.fire_repo.aggregate(['region', 'location'], regions=['Акмолинская область'])
+        self.assertEqual([(row['location'], row['fire_count'], row['total_technic']) for row in by_location],
+                         [('Акколь', 1, 1), ('Барап', 1, 3)])
+        by_month = self.fire_repo.aggregate(['year', 'month'])
+        self.assertEqual([(row['year'], row['month'], row['total_aircraft']) for row in by_month],
+                         [(2023, '2023-05', 0), (2023, '2023-07', 1), (2024, '2024-06', 2)])
+        with self.assertRaises(ValueError):
+            self.fire_repo.aggregate(['description'])
+
+class TestFireDailyRollup(DatabaseTestCase):
+    """Проверка инкрементального обновления fire_daily_region_rollup."""
+    def setUp(self):
+        super().setUp()
+        self.fire_repo = SQLAlchemyFireRepository()
+
+    def _fire(self, **values):
+        data = {'id': 0, 'date': date(2023, 5, 1), 'region': 'Акмолинская область', 'location': 'Акколь',
+                'damage_area': 1.5, 'damage_tenge': 100, 'aps_people_count': 2}
+        data.update(values)
+        return FireEntity(**data)
+
+    def _rollup(self):
+        rows = db.session.query(FireDailyRegionRollup).order_by(
+            FireDailyRegionRollup.date, FireDailyRegionRollup.region).all()
+        return [(row.date, row.region, row.fire_count, float(row.damage_area), row.damage_tenge, row.aps_people)
+                for row in rows]
+
+    def _assert_matches_rebuild(self):
+        incremental = self._rollup()
+        self.fire_repo.rebuild_rollup()
+        self.assertEqual(incremental, self._rollup())
+
+    def test_add_update_delete_apply_deltas(self):
+        """Тест: добавление, изменение и удаление пожара изменяют только свою строку сводки."""
+        first = self.fire_repo.add(self._fire())
+        self.fire_repo.add(self._fire(damage_area=2.25, aps_people_count=None))
+        self.assertEqual(self._rollup(), [(date(2023, 5, 1), 'Акмолинская область', 2, 3.75, 200, 2)])
+
+        first.damage_tenge = 500
+        first, _ = self.fire_repo.update(first)
+        self.assertEqual(self._rollup()[0][4], 600)
+
+        # Перенос пожара на другую дату и регион: старая строка уменьшается, новая создаётся
+        first.date, first.region = date(2023, 5, 2), 'Алматинская область'
+        first, _ = self.fire_repo.update(first)
+        self.assertEqual(self._rollup(), [
+            (date(2023, 5, 1), 'Акмолинская область', 1, 2.25, 100, 0),
+            (date(2023, 5, 2), 'Алматинская область', 1, 1.5, 500, 2),
+        ])
+        self._assert_matches_rebuild()
+
+        self.fire_repo.delete(first.id)
+        self.assertEqual(self._rollup(), [(date(2023, 5, 1), 'Акмолинская область', 1, 2.25, 100, 0)])
+        self._assert_matches_rebuild()
+
+    def test_add_many_updates_rollup(self):
+        """Тест: пакетная вставка обновляет сводку в той же транзакции."""
+        self.fire_repo.add_many([self._fire(date=date(2023, 5, 1 + i % 3)) for i in range(9)])
+        self.assertEqual([row[2] for row in self._rollup()], [3, 3, 3])
+        self._assert_matches_rebuild()
+
+    def test_aggregate_reads_rollup(self):
+        """Тест: сводка по регионам читает дневную сводку, а не таблицу fires."""
+        self.fire_repo.add(self._fire())
+        self.fire_repo.add(self._fire(date=date(2023, 6, 1)))
+        statements = self.capture_statements()
+        result = self.fire_repo.aggregate_by_region(start_date=date(2023, 5, 15))
+        self.assertEqual(result['totals']['fire_count'], 1)
+        self.assertEqual(result['summary_data'][0]['date'], '2023-06-01')
+        self.assertIn('FROM fire_daily_region_rollup', statements[0])
+        self.assertNotIn('FROM fires', statements[0])
+
+class TestFireRepositoryUpdate(DatabaseTestCase):
+    """Проверка обновления только изменённых колонок и оптимистической блокировки."""
+    def setUp(self):
+        super().setUp()
+        self.fire_repo = SQLAlchemyFireRepository()
+        self.fire = self.fire_repo.add(FireEntity(id=0, date=date(2023, 5, 1), region='Акмолинская область',
+                                                  location='Акколь', damage_area=1.5, description='Пожар'))
+        self.statements = self.capture_statements()
+
+    def test_update_writes_only_changed_columns(self):
+        """Тест: UPDATE содержит только изменённые поля и увеличивает версию."""
+        self.fire.damage_area = 2.5
+        self.fire.description = 'Уточнено'
+        updated, changes = self.fire_repo.update(self.fire)
+        self.assertEqual(changes, {'damage_area': (1.5, 2.5), 'description': ('Пожар', 'Уточнено')})
+        self.assertEqual(updated.version, 2)
+        self.assertEqual(updated.damage_area, 2.5)
+        update_sql = [statement for statement in self.statements if statement.startswith('UPDATE fires')]
+        self.assertEqual(len(update_sql), 1)
+        self.assertIn('SET damage_area=?, description=?, version=(fires.version + ?)', update_sql[0])
+        self.assertIn('WHERE fires.id = ? AND fires.version = ?', update_sql[0])
+
+    def test_unchanged_update_is_noop(self):
+        """Тест: сохранение без изменений не выполняет UPDATE и не меняет версию."""
+        updated, changes = self.fire_repo.update(self.fire)
+        self.assertEqual(changes, {})
+        self.assertEqual(updated.version, 1)
+        self.assertFalse([statement for statement in self.statements if statement.startswith('UPDATE')])
+
+    def test_concurrent_edit_is_rejected(self):
+        """Тест: второй редактор с устаревшей версией получает ConcurrentUpdateError."""
+        first_editor = self.fire_repo.get_by_id(self.fire.id)
+        second_editor = self.fire_repo.get_by_id(self.fire.id)
+        first_editor.damage_area = 3.0
+        self.fire_repo.update(first_editor)
+
+        second_editor.description = 'Правка поверх'
+        with self.assertRaises(ConcurrentUpdateError):
+            self.fire_repo.update(second_editor)
+        stored = self.fire_repo.get_by_id(self.fire.id)
+        self.assertEqual((stored.damage_area, stored.description, stored.version), (3.0, 'Пожар', 2))
+
+    def test_hydration_matches_validating_constructor(self):
+        """Тест: сущность из from_trusted совпадает с созданной обычным конструктором."""
+        stored = self.fire_repo.get_by_id(self.fire.id)
+        expected = FireEntity(id=self.fire.id, date=date(2023, 5, 1), region='Акмолинская область',
+                              location='Акколь', damage_area=1.5, description='Пожар')
+        self.assertEqual(stored, expected)
+        self.assertFalse(hasattr(stored, '__dict__'))
+
+class TestFireRepositoryDelete(DatabaseTestCase):
+    """Проверка удаления пожаров одним запросом DELETE ... RETURNING."""
+    def setUp(self):
+        super().setUp()
+        self.fire_repo = SQLAlchemyFireRepository()
+        self.fire_repo.add_many([
+            FireEntity(id=0, date=date(2023, 5, 1 + i % 2), region='Акмолинская область', location='Акколь',
+                       damage_area=1.0, aps_people_count=1)
+            for i in range(6)
+        ])
+        self.statements = self.capture_statements()
+
+    def test_delete_many_single_statement(self):
+        """Тест: удаление нескольких пожаров одним DELETE с RETURNING, без предварительного SELECT."""
+        deleted = self.fire_repo.delete_many([5, 1, 3, 99, 3])
+        self.assertEqual(deleted, [1, 3, 5])
+        fire_statements = [statement for statement in self.statements if 'fire_daily_region_rollup' not in statement]
+        self.assertEqual(len(fire_statements), 1)
+        self.assertTrue(fire_statements[0].startswith('DELETE FROM fires WHERE fires.id IN'))
+        self.assertIn('RETURNING', fire_statements[0])
+        self.assertEqual(sorted(fire.id for fire in self.fire_repo.get_all()), [2, 4, 6])
+
+    def test_delete_many_updates_rollup(self):
+        """Тест: дневная сводка уменьшается на удалённые пожары, опустевшие дни удаляются."""
+        self.fire_repo.delete_many([1, 3, 5])
+        rows = db.session.query(FireDailyRegionRollup).all()
+        self.assertEqual([(row.date, row.fire_count, row.aps_people) for row in rows], [(date(2023, 5, 2), 3, 3)])
+
+    def test_delete_single(self):
+        """Тест: delete возвращает признак удаления."""
+        self.assertTrue(self.fire_repo.delete(2))
+        self.assertFalse(self.fire_repo.delete(2))
+
+class TestFireRepositoryPagination(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        # Несколько пожаров на одну дату, чтобы проверить разрешение равенства по id
+        for i in range(25):
+            region = 'Акмолинская область' if i % 2 else 'Алматинская область'
+            db.session.add(Fire(date=date(2023, 1 + i // 5, 1), region=region, location='Локация'))
+        db.session.commit()
+        self.fire_repo = SQLAlchemyFireRepository()
+
+    def _walk(self, limit, filters=None):
+        pages, cursor = [], None
+        while True:
+            page = self.fire_repo.page_after(cursor, limit, filters)
+            if not page:
+                return pages
+            pages.append(page)
+            cursor = (page[-1].date, page[-1].id)
+
+    def test_page_after_walks_all_rows_once(self):
+        """Тест: обход по курсору возвращает все записи ровно один раз в порядке (date desc, id desc)."""
+        pages = self._walk(limit=7)
+        self.assertEqual([len(page) for page in pages], [7, 7, 7, 4])
+        fires = [fire for page in pages for fire in page]
+        keys = [(fire.date, fire.id) for fire in fires]
+        self.assertEqual(keys, sorted(keys, reverse=True))
+        self.assertEqual(len(set(keys)), 25)
+
+    def test_page_after_with_filters(self):
+        """Тест постраничной выборки с фильтрами по региону и дате."""
+        fires = [fire for page in self._walk(4, {'regions': ['Акмолинская область'], 'start_date': date(2023, 3, 1)})
+                 for fire in page]
+        self.assertEqual(len(fires), 7)
+        self.assertTrue(all(fire.region == 'Акмолинская область' and fire.date >= date(2023, 3, 1) for fire in fires))
+
+    def test_stream_yields_batches(self):
+        """Тест потокового чтения пачками с фильтром по региону."""
+        batches = list(self.fire_repo.stream(batch_size=10))
+        self.assertEqual([len(batch) for batch in batches], [10, 10, 5])
+        keys = [(fire.date, fire.id) for batch in batches for fire in batch]
+        self.assertEqual(keys, sorted(keys, reverse=True))
+        streamed = [fire for batch in self.fire_repo.stream({'regions': ['Акмолинская область']}, 4) for fire in batch]
+        self.assertEqual(len(streamed), 12)
+
+    def test_project_returns_tuples_without_orm_objects(self):
+        """Тест: project возвращает кортежи выбранных колонок, не загружая объекты Fire в сессию."""
+        rows = self.fire_repo.project(('region', 'damage_area'), {'start_date': date(2023, 5, 1)})
+        self.assertEqual(sorted(rows), [('Акмолинская область', None)] * 2 + [('Алматинская область', None)] * 3)
+        self.fire_repo.get_all()
+        self.assertEqual(len(db.session.identity_map), 0)
+
+class TestDatatablePages(DatabaseTestCase):
+    """Серверная обработка DataTables: сортировка, поиск и подсчёт в SQL."""
+    def setUp(self):
+        super().setUp()
+        for i in range(12):
+            region = 'Акмолинская область' if i < 8 else 'Алматинская область'
+            db.session.add(Fire(date=date(2023, 1 + i, 1), region=region, location='Акколь' if i % 2 else 'Барап',
+                                damage_area=i))
+            db.session.add(AuditLog(timestamp=datetime(2023, 1, 1, i), username='admin' if i % 3 else 'engineer1',
+                                    action='Создание', table_name='Fire', record_id=i))
+        db.session.commit()
+        self.fire_repo = SQLAlchemyFireRepository()
+
+    def test_fire_datatable_page_scope_and_search(self):
+        """Тест: scope ограничивает total, поиск и фильтры — только filtered."""
+        page = self.fire_repo.datatable_page(0, 3, search='Акколь', order=[('damage_area', False)],
+                                             scope={'regions': ['Акмолинская область']})
+        self.assertEqual(page['total'], 8)
+        self.assertEqual(page['filtered'], 4)
+        self.assertEqual([fire.damage_area for fire in page['fires']], [1.0, 3.0, 5.0])
+
+    def test_fire_datatable_page_filters_and_offset(self):
+        """Тест фильтра по площади и смещения страницы."""
+        page = self.fire_repo.datatable_page(2, 10, filters={'min_damage_area': 6})
+        self.assertEqual(page['total'], 12)
+        self.assertEqual(page['filtered'], 6)
+        self.assertEqual([fire.date.month for fire in page['fires']], [10, 9, 8, 7])
+
+    def test_audit_datatable_page(self):
+        """Тест страницы журнала аудита с поиском по пользователю."""
+        page = AuditLogRepository.datatable_page(0, 2, search='engineer')
+        self.assertEqual(page['total'], 12)
+        self.assertEqual(page['filtered'], 4)
+        self.assertEqual([log.record_id for log in page['logs']], [9, 6])
+
+class TestFireRepositoryIndexes(DatabaseTestCase):
+    """Проверка планов запросов репозитория через EXPLAIN QUERY PLAN."""
+    def setUp(self):
+        super().setUp()
+        self.fire_repo = SQLAlchemyFireRepository()
+        self.statements = self.capture_statements(with_parameters=True)
+
+    def _plans(self, call):
+        """Выполнить вызов и вернуть планы всех выполненных им запросов."""
+        self.statements.clear()
+        call()
+        statements = list(self.statements)
+        self.assertTrue(statements)
+        plans = []
+        for statement, parameters in statements:
+            rows = db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+            plans.append(' '.join(row[-1] for row in rows))
+        return plans
+
+    def _plan(self, call):
+        """Выполнить вызов и вернуть план последнего выполненного запроса."""
+        return self._plans(call)[-1]
+
+    def test_get_by_region_uses_region_date_index(self):
+        """Тест: выборка по региону и датам использует индекс (region, date)."""
+        plan = self._plan(lambda: self.fire_repo.get_by_region('Акмолинская область', start_date=date(2023, 1, 1)))
+        self.assertIn('ix_fires_region_date', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_get_all_by_date_uses_date_index(self):
+        """Тест: выборка по диапазону дат использует индекс по дате."""
+        plan = self._plan(lambda: self.fire_repo.get_all(start_date=date(2023, 1, 1), end_date=date(2023, 12, 31)))
+        self.assertIn('ix_fires_date_id', plan)
+
+    def test_page_after_uses_date_id_index(self):
+        """Тест: keyset-пагинация идёт по индексу (date, id) без сортировки."""
+        plan = self._plan(lambda: self.fire_repo.page_after((date(2023, 6, 1), 100), 50))
+        self.assertIn('ix_fires_date_id', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_audit_log_pages_use_timestamp_index(self):
+        """Тест: все запросы выгрузки и страницы журнала аудита (подсчёт и сортировка по времени) идут по индексу."""
+        for call in (AuditLogRepository.get_all, lambda: AuditLogRepository.datatable_page(20, 10)):
+            for plan in self._plans(call):
+                self.assertIn('ix_audit_logs_timestamp', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_audit_log_record_history_uses_table_record_index(self):
+        """Тест: история записи ищется по индексу (table_name, record_id) без сортировки."""
+        plan = self._plan(lambda: AuditLogRepository.get_for_record('Fire', 3))
+        self.assertIn('ix_audit_logs_table_name_record_id', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
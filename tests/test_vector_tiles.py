@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy as np
+from adapters.services.vector_tiles import RegionTiles, encode_geometry, TILE_EXTENT
+
+class TestVectorTiles(unittest.TestCase):
+    """Проверка векторных тайлов регионов и их кэша на диске."""
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'regions.geojson')
+        square = [[60, 45], [70, 45], [70, 50], [60, 50], [60, 45]]
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'type': 'FeatureCollection', 'features': [
+                {'type': 'Feature', 'properties': {'region': 'Регион'},
+                 'geometry': {'type': 'Polygon', 'coordinates': [square]}}]}, f)
+        self.cache_dir = os.path.join(self.tmpdir.name, 'tiles')
+        self.tiles = RegionTiles(self.path, self.cache_dir, max_zoom=6)
+        self.metrics = {'Регион': {'fire_count': 2, 'damage_area': 1.5, 'damage_tenge': 10}}
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_polygon_commands(self):
+        """Тест: кольцо кодируется командами MoveTo, LineTo и ClosePath с дельтами в zigzag."""
+        ring = np.array([[0, 0], [10, 0], [10, 10], [0, 10]])
+        self.assertEqual(encode_geometry([ring]), [9, 0, 0, 26, 20, 0, 0, 20, 19, 0, 15])
+
+    def test_tile_is_clipped_and_cached_by_version(self):
+        """Тест: тайл с регионом кэшируется по версии данных, смена показателей даёт новую версию."""
+        version = self.tiles.version(self.metrics)
+        data = self.tiles.tile(0, 0, 0, self.metrics, version)
+        self.assertIn('Регион'.encode('utf-8'), data)
+        self.assertTrue(os.path.exists(os.path.join(self.cache_dir, version, '0', '0', '0.pbf')))
+        self.assertEqual(self.tiles.tile(0, 0, 0, self.metrics, version), data)
+
+        changed = {'Регион': {**self.metrics['Регион'], 'fire_count': 3}}
+        new_version = self.tiles.version(changed)
+        self.assertNotEqual(new_version, version)
+        self.tiles.tile(0, 0, 0, changed)
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), sorted([version, new_version]))
+
+    def test_prune_removes_only_stale_versions(self):
+        """Тест: запросы не удаляют чужие версии; prune удаляет давно не записывавшиеся, кроме текущей."""
+        version = self.tiles.version(self.metrics)
+        self.tiles.tile(0, 0, 0, self.metrics, version)
+        self.tiles.tile(0, 0, 0, self.metrics, 'other')
+        self.assertEqual(self.tiles.prune(keep=version), [])
+        old = os.path.getmtime(os.path.join(self.cache_dir, 'other')) - 7200
+        for name in (version, 'other'):
+            os.utime(os.path.join(self.cache_dir, name), (old, old))
+        self.assertEqual(self.tiles.prune(keep=version), ['other'])
+        self.assertEqual(os.listdir(self.cache_dir), [version])
+
+    def test_store_survives_removed_cache_dir(self):
+        """Тест: если каталог кэша удалён во время записи, тайл отдаётся без кэширования."""
+        with patch('tempfile.mkstemp', side_effect=FileNotFoundError):
+            self.assertTrue(self.tiles.tile(0, 0, 0, self.metrics))
+        self.assertFalse(os.path.exists(os.path.join(self.cache_dir, self.tiles.version(self.metrics), '0', '0', '0.pbf')))
+
+    def test_empty_and_invalid_tiles(self):
+        """Тест: тайл без регионов пуст, координаты вне диапазона отклоняются."""
+        self.assertEqual(self.tiles.tile(2, 0, 0, self.metrics), b'')
+        with self.assertRaises(ValueError):
+            self.tiles.tile(7, 0, 0, self.metrics)
+        with self.assertRaises(ValueError):
+            self.tiles.tile(1, 2, 0, self.metrics)
+
+    def test_inner_tile_is_covered_by_region(self):
+        """Тест: тайл внутри региона содержит квадрат по границе тайла с запасом."""
+        tiles = self.tiles._zoom(6)
+        self.assertEqual(len(tiles), 1)
+        data = self.tiles.render(6, 43, 22, self.metrics)
+        self.assertTrue(data)
+        self.assertLess(len(data), 200)
+        self.assertEqual(TILE_EXTENT, 4096)
+
+if __name__ == '__main__':
+    unittest.main()
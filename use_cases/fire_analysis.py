@@ -1,12 +1,40 @@
-from typing import List, Dict, Optional
-from datetime import datetime
+import threading
+import time
+from typing import List, Dict, Optional, Sequence, Tuple
+from datetime import datetime, date, timedelta
 from core.entities import FireEntity
+from core.fire_cube import FireCube, month_index
+from core.fire_metrics import summary_totals
+from core.time_buckets import BUCKETS, bucket_count, bucket_starts, next_start
 from adapters.repositories.fire_repository import SQLAlchemyFireRepository
+from infrastructure.database import hold_primary_reads
+from use_cases.result_cache import ResultCache
+from regions import REGIONS_AND_LOCATIONS
 import pandas as pd
 
+# Предел числа интервалов временного ряда (десять лет по дням — около 3650)
+MAX_TIMESERIES_BUCKETS = 5000
+
+# Больше изменённых ячеек куба — полный пересчёт вместо запроса на каждую ячейку
+MAX_CUBE_DIRTY_CELLS = 64
+
+# Как часто (секунды) кэшируемые чтения сверяют метку данных: записи других процессов
+# (правка в другом воркере, импорт командой CLI) видны не позже этого срока, а не через TTL кэша
+STAMP_CHECK_INTERVAL = 1.0
+
 class FireAnalysis:
-    def __init__(self, fire_repository: SQLAlchemyFireRepository):
+    def __init__(self, fire_repository: SQLAlchemyFireRepository, cache: Optional[ResultCache] = None):
         self.fire_repository = fire_repository
+        # Кэш может быть общим для нескольких контроллеров одного приложения
+        self.cache = cache if cache is not None else ResultCache()
+        # Куб ресурсов строится при первом срезе; изменения пожаров помечают ячейки (регион, месяц)
+        self._cube = None
+        self._cube_cells = set()
+        self._cube_lock = threading.Lock()
+        # Последняя прочитанная метка данных (FireRepository.data_stamp без времени аудита)
+        self._stamp = None
+        self._stamp_checked = None  # time.monotonic() последнего чтения метки
+        self._stamp_lock = threading.Lock()
 
     def get_all_fires(self) -> List[FireEntity]:
         """Получить все пожары."""
@@ -17,107 +45,207 @@ class FireAnalysis:
         return self.fire_repository.get_all(start_date=start_date, end_date=end_date)
 
     def get_fires_by_region(self, region: str, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> List[FireEntity]:
-        """Получить пожары по региону с опциональным фильтром по датам."""
-        all_fires = self.fire_repository.get_all()
-        filtered_fires = [fire for fire in all_fires if fire.region == region]
-        
-        if start_date and end_date:
-            filtered_fires = [fire for fire in filtered_fires 
-                            if start_date <= fire.date <= end_date]
-        
-        return filtered_fires
+        """Получить пожары по региону с опциональным фильтром по датам (любая из границ может быть не задана)."""
+        return self.fire_repository.get_by_region(region, start_date=start_date, end_date=end_date)
 
     def add_fire(self, fire: FireEntity) -> FireEntity:
         """Добавить новый пожар."""
-        return self.fire_repository.add(fire)
+        saved_fire = self.fire_repository.add(fire)
+        self.invalidate([(saved_fire.region, saved_fire.date)])
+        return saved_fire
+
+    def update_fire(self, fire: FireEntity) -> Tuple[FireEntity, Dict[str, Tuple]]:
+        """Обновить существующий пожар; возвращает сущность и изменения {поле: (старое, новое)}."""
+        updated_fire, changes = self.fire_repository.update(fire)
+        if changes:
+            old_region = changes['region'][0] if 'region' in changes else updated_fire.region
+            old_date = changes['date'][0] if 'date' in changes else updated_fire.date
+            self.invalidate([(old_region, old_date), (updated_fire.region, updated_fire.date)])
+        return updated_fire, changes
+
+    def delete_fire(self, fire_id: int) -> bool:
+        """Удалить пожар по ID; False, если пожар не найден."""
+        deleted = self.fire_repository.delete(fire_id)
+        if deleted:
+            self.invalidate()
+        return deleted
+
+    def delete_many(self, fire_ids: List[int]) -> List[int]:
+        """Удалить пожары по списку ID одним запросом; возвращает id удалённых."""
+        deleted = self.fire_repository.delete_many(fire_ids)
+        if deleted:
+            self.invalidate()
+        return deleted
+
+    def invalidate(self, changes: Optional[List[Tuple[str, date]]] = None) -> None:
+        """Сброс кэша результатов и пометка ячеек куба после записи пожаров (в том числе в обход
+        FireAnalysis, например импортом): changes — (регион, дата) изменённых пожаров, None — все."""
+        self.cache.bump_version()
+        self._mark_cube_cells(changes)
+        hold_primary_reads()
+
+    def data_version(self) -> Tuple[str, Optional[datetime]]:
+        """Версия данных для условных запросов (ETag) и время последнего изменения пожаров.
+
+        Метка читается одним запросом без агрегации. При любом её изменении (в том числе после
+        записи другим процессом: правка, импорт командой CLI) кэш результатов и куб сбрасываются,
+        поэтому ответ с новой версией не собирается из результатов, вычисленных до изменения.
+        """
+        checked = time.monotonic()
+        count, max_id, audit_id, audit_time = self.fire_repository.data_stamp()
+        with self._stamp_lock:
+            self._stamp_checked = checked
+            stamp = (count, max_id, audit_id)
+            if self._stamp not in (None, stamp):
+                self.invalidate()
+            self._stamp = stamp
+        return f'{count}-{max_id}-{audit_id}', audit_time
+
+    def _check_stamp(self) -> None:
+        """Сверка метки данных перед чтением из кэша не чаще раза в STAMP_CHECK_INTERVAL секунд."""
+        checked = self._stamp_checked
+        if checked is None or time.monotonic() - checked >= STAMP_CHECK_INTERVAL:
+            self.data_version()
+
+    def get_region_aggregates(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                              regions: Optional[List[str]] = None, scope: Optional[Dict] = None) -> Dict:
+        """Сводка по регионам (summary_data и totals) через кэш результатов.
 
-    def update_fire(self, fire: FireEntity) -> FireEntity:
-        """Обновить существующий пожар."""
-        return self.fire_repository.update(fire)
+        scope — ограничение видимости по роли ({'regions': [...]}), пересекается с regions.
+        """
+        self._check_stamp()
+        regions, scope_regions = _scoped_regions(regions, scope)
+        key = ('region_aggregates', _cache_date(start_date), _cache_date(end_date), tuple(regions), tuple(scope_regions))
+        return self.cache.get_or_compute(
+            key, lambda: self.fire_repository.aggregate_by_region(start_date, end_date, regions)
+        )
 
-    def delete_fire(self, fire_id: int) -> None:
-        """Удалить пожар по ID."""
-        self.fire_repository.delete(fire_id)
+    def aggregate(self, by: List[str], start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                  regions: Optional[List[str]] = None, scope: Optional[Dict] = None) -> Dict:
+        """Сводка по измерениям by (region, location, branch, forestry, month, year) через кэш результатов.
+
+        Суммы считаются в SQL (GROUP BY); строки содержат производные итоги total_people,
+        total_technic и total_aircraft. scope пересекается с regions, как в get_region_aggregates.
+        """
+        self._check_stamp()
+        by = tuple(by)
+        regions, scope_regions = _scoped_regions(regions, scope)
+        key = ('aggregate', by, _cache_date(start_date), _cache_date(end_date), tuple(regions), tuple(scope_regions))
+
+        def compute():
+            summary_data = self.fire_repository.aggregate(by, start_date, end_date, regions)
+            return {'summary_data': summary_data, 'totals': summary_totals(summary_data)}
+        return self.cache.get_or_compute(key, compute)
+
+    def get_timeseries(self, bucket: str, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                       regions: Optional[List[str]] = None, scope: Optional[Dict] = None,
+                       by_region: bool = False) -> Dict:
+        """Число пожаров и площадь по интервалам bucket (day, week, month) через кэш результатов.
+
+        Интервалы без пожаров заполняются нулями; ряды — параллельные массивы к labels, итоговые
+        и при by_region — по каждому региону. Без дат период берётся от первого до последнего пожара.
+        """
+        if bucket not in BUCKETS:
+            raise ValueError(f"Недопустимый интервал: {bucket}")
+        start, end = _cache_date(start_date), _cache_date(end_date)
+        if start and end and bucket_count(start, end, bucket) > MAX_TIMESERIES_BUCKETS:
+            raise ValueError(f"Слишком много интервалов (больше {MAX_TIMESERIES_BUCKETS}), выберите крупнее")
+        self._check_stamp()
+        regions, scope_regions = _scoped_regions(regions, scope)
+        key = ('timeseries', bucket, by_region, start, end, tuple(regions), tuple(scope_regions))
+
+        def compute():
+            rows = self.fire_repository.timeseries(bucket, start_date, end_date, regions)
+            first = start or (rows[0][0] if rows else None)
+            last = end or (rows[-1][0] if rows else None)
+            labels = bucket_starts(first, last, bucket) if first and last else []
+            index = {label: position for position, label in enumerate(labels)}
+            fire_count, damage_area, region_series = [0] * len(labels), [0.0] * len(labels), {}
+            for label, region, count, area in rows:
+                position = index[label]
+                if by_region:
+                    series = region_series.get(region)
+                    if series is None:
+                        series = region_series[region] = {'fire_count': [0] * len(labels),
+                                                          'damage_area': [0.0] * len(labels)}
+                    series['fire_count'][position] = count
+                    series['damage_area'][position] = round(area, 4)
+                fire_count[position] += count
+                damage_area[position] += area
+            result = {
+                'bucket': bucket,
+                'labels': [label.isoformat() for label in labels],
+                'fire_count': fire_count,
+                'damage_area': [round(area, 4) for area in damage_area],
+            }
+            if by_region:
+                result['regions'] = region_series
+            return result
+        return self.cache.get_or_compute(key, compute)
+
+    def slice_cube(self, keep: Sequence[str] = (), regions: Optional[List[str]] = None, start: Optional[str] = None,
+                   end: Optional[str] = None, months_of_year: Optional[Sequence[int]] = None,
+                   groups: Optional[Sequence[str]] = None, kinds: Optional[Sequence[str]] = None,
+                   scope: Optional[Dict] = None) -> Dict:
+        """Срез куба ресурсов регион × месяц × группа × вид с суммированием по осям, не вошедшим в keep.
+
+        Например, авиация АПС в июле по годам: keep=['month'], groups=['aps'], kinds=['aircraft'],
+        months_of_year=[7]. Изменённые с прошлого среза ячейки пересчитываются из дневной сводки.
+        """
+        self._check_stamp()
+        regions, scope_regions = _scoped_regions(regions, scope)
+        with self._cube_lock:
+            cube = self._refresh_cube()
+            return cube.dice(keep, regions=regions or None, start=start, end=end, months_of_year=months_of_year,
+                             groups=groups, kinds=kinds)
 
     def get_summary_by_region(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> Dict:
-        """Получить сводку по регионам с учетом данных АПС."""
-        if start_date and end_date:
-            fires = self.get_fires_by_date_range(start_date, end_date)
-        else:
-            fires = self.get_all_fires()
-
-        # Преобразование списка пожаров в DataFrame для удобной агрегации
-        data = [{
-            'region': fire.region,
-            'damage_area': fire.damage_area or 0,
-            'damage_tenge': fire.damage_tenge or 0,
-            'lo_people': fire.lo_people_count or 0,
-            'lo_technic': fire.lo_technic_count or 0,  # Исправлено на lo_technic
-            'aps_people': fire.aps_people_count or 0,
-            'aps_technic': fire.aps_technic_count or 0,  # Исправлено на aps_technic
-            'aps_aircraft': fire.aps_aircraft_count or 0,
-            'kps_people': fire.kps_people_count or 0,
-            'kps_technic': fire.kps_technic_count or 0,  # Исправлено на kps_technic
-            'kps_aircraft': fire.kps_aircraft_count or 0,
-            'mio_people': fire.mio_people_count or 0,
-            'mio_technic': fire.mio_technic_count or 0,  # Исправлено на mio_technic
-            'mio_aircraft': fire.mio_aircraft_count or 0,
-            'other_org_people': fire.other_org_people_count or 0,
-            'other_org_technic': fire.other_org_technic_count or 0,  # Исправлено на other_org_technic
-            'other_org_aircraft': fire.other_org_aircraft_count or 0,
-        } for fire in fires]
-
-        df = pd.DataFrame(data)
-
-        # Группировка по регионам
-        summary = df.groupby('region').agg({
-            'region': 'count',  # Количество пожаров
-            'damage_area': 'sum',
-            'damage_tenge': 'sum',
-            'lo_people': 'sum',
-            'lo_technic': 'sum',  # Исправлено на lo_technic
-            'aps_people': 'sum',
-            'aps_technic': 'sum',  # Исправлено на aps_technic
-            'aps_aircraft': 'sum',
-            'kps_people': 'sum',
-            'kps_technic': 'sum',  # Исправлено на kps_technic
-            'mio_people': 'sum',
-            'mio_technic': 'sum',  # Исправлено на mio_technic
-            'mio_aircraft': 'sum',
-            'other_org_people': 'sum',
-            'other_org_technic': 'sum',  # Исправлено на other_org_technic
-            'other_org_aircraft': 'sum',
-        }).різ
-
-        # Переименование столбца 'region' в 'fire_count'
-        summary = summary.rename(columns={'region': 'fire_count'}).reset_index()
-
-        # Итоговые суммы
-        totals = {
-            'fire_count': len(fires),
-            'damage_area': df['damage_area'].sum(),
-            'damage_tenge': df['damage_tenge'].sum(),
-            'people': (df['lo_people'].sum() + df['aps_people'].sum() + df['kps_people'].sum() +
-                       df['mio_people'].sum() + df['other_org_people'].sum()),
-            'technic': (df['lo_technic'].sum() + df['aps_technic'].sum() + df['kps_technic'].sum() +  # Исправлено на technic
-                        df['mio_technic'].sum() + df['other_org_technic'].sum()),  # Исправлено на technic
-            'aircraft': (df['aps_aircraft'].sum() + df['kps_aircraft'].sum() +
-                         df['mio_aircraft'].sum() + df['other_org_aircraft'].sum()),
-            'aps_people': df['aps_people'].sum(),
-            'aps_technic': df['aps_technic'].sum(),  # Исправлено на aps_technic
-            'aps_aircraft': df['aps_aircraft'].sum(),
-        }
-
-        summary_data = summary.to_dict(orient='records')
-        return {'summary_data': summary_data, 'totals': totals}
+        """Получить сводку по регионам с учетом данных АПС (aggregate по region; любая из границ
+        периода может быть не задана)."""
+        return self.aggregate(('region',), start_date, end_date)
 
     def get_data_for_dash(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> pd.DataFrame:
-        """Получить данные для Dash."""
-        fires = self.get_fires_by_date_range(start_date, end_date) if start_date and end_date else self.get_all_fires()
-        return pd.DataFrame([{
-            'id': fire.id,
-            'date': fire.date,
-            'region': fire.region,
-            'damage_area': fire.damage_area or 0,
-            'damage_tenge': fire.damage_tenge or 0
-        } for fire in fires])
\ No newline at end of file
+        """Получить данные для Dash (только нужные колонки, без создания сущностей)."""
+        columns = ('id', 'date', 'region', 'damage_area', 'damage_tenge')
+        filters = {key: value for key, value in (('start_date', start_date), ('end_date', end_date)) if value}
+        frame = pd.DataFrame.from_records(self.fire_repository.project(columns, filters), columns=columns)
+        return frame.fillna({'damage_area': 0, 'damage_tenge': 0})
+
+    def _mark_cube_cells(self, changes: Optional[List[Tuple[str, date]]]) -> None:
+        """Пометить ячейки куба по (регион, дата) изменённых пожаров; None — пересчитать куб целиком."""
+        with self._cube_lock:
+            if changes is None:
+                self._cube = None
+                self._cube_cells.clear()
+            elif self._cube is not None:
+                self._cube_cells.update((region, f'{value.year:04d}-{value.month:02d}') for region, value in changes)
+
+    def _refresh_cube(self) -> FireCube:
+        """Актуальный куб: полная сборка или пересчёт помеченных ячеек (вызывается под _cube_lock)."""
+        if self._cube is None or len(self._cube_cells) > MAX_CUBE_DIRTY_CELLS:
+            self._cube = FireCube.build(REGIONS_AND_LOCATIONS, self.fire_repository.aggregate(('region', 'month')))
+        elif self._cube_cells:
+            rows = []
+            for region, month in sorted(self._cube_cells):
+                year, number = divmod(month_index(month), 12)
+                start = date(year, number + 1, 1)
+                end = next_start(start, 'month') - timedelta(days=1)
+                rows.extend(self.fire_repository.aggregate(('region', 'month'), start, end, [region]))
+            self._cube.replace_cells(self._cube_cells, rows)
+        self._cube_cells.clear()
+        return self._cube
+
+def _scoped_regions(regions: Optional[List[str]], scope: Optional[Dict]) -> Tuple[List, List[str]]:
+    """Регионы запроса, пересечённые с областью видимости, и сами регионы области (отсортированы)."""
+    regions = sorted(set(regions or []))
+    scope_regions = sorted(set((scope or {}).get('regions') or []))
+    if scope_regions:
+        regions = [region for region in regions if region in scope_regions] if regions else scope_regions
+        if not regions:
+            # Запрошенные регионы вне области видимости пользователя
+            regions = [None]
+    return regions, scope_regions
+
+def _cache_date(value) -> Optional[date]:
+    """Дата для ключа кэша: datetime и date одного дня дают одинаковый ключ."""
+    return value.date() if isinstance(value, datetime) else value
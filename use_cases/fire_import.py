@@ -0,0 +1,227 @@
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, date
+from core.entities import FireEntity
+from use_cases.fire_analysis import FireAnalysis
+
+# Заголовки столбцов (как в таблице пожаров и форме) и соответствующие поля FireEntity
+HEADER_ALIASES = {
+    'дата': 'date',
+    'регион': 'region',
+    'кгу/оопт': 'location',
+    'местоположение': 'location',
+    'филиал': 'branch',
+    'лесничество': 'forestry',
+    'квартал': 'quarter',
+    'выдел': 'allotment',
+    'площадь пожара': 'damage_area',
+    'площадь лесная': 'damage_les',
+    'площадь лесопокрытая': 'damage_les_lesopokryt',
+    'площадь верховой': 'damage_les_verh',
+    'площадь нелесная': 'damage_not_les',
+    'лесная охрана': 'lo_flag',
+    'люди ло': 'lo_people_count',
+    'техника ло': 'lo_technic_count',
+    'апс': 'aps_flag',
+    'люди апс': 'aps_people_count',
+    'техника апс': 'aps_technic_count',
+    'вс апс': 'aps_aircraft_count',
+    'мчс': 'kps_flag',
+    'люди мчс': 'kps_people_count',
+    'техника мчс': 'kps_technic_count',
+    'вс мчс': 'kps_aircraft_count',
+    'мио': 'mio_flag',
+    'люди мио': 'mio_people_count',
+    'техника мио': 'mio_technic_count',
+    'вс мио': 'mio_aircraft_count',
+    'др. организации': 'other_org_flag',
+    'люди др.': 'other_org_people_count',
+    'техника др.': 'other_org_technic_count',
+    'вс др.': 'other_org_aircraft_count',
+    'описание': 'description',
+    'ущерб (тенге)': 'damage_tenge',
+    'затраты': 'firefighting_costs',
+    'кпо': 'kpo',
+}
+
+FLOAT_FIELDS = ('damage_area', 'damage_les', 'damage_les_lesopokryt', 'damage_les_verh', 'damage_not_les')
+INT_FIELDS = (
+    'lo_people_count', 'lo_technic_count', 'aps_people_count', 'aps_technic_count', 'aps_aircraft_count',
+    'kps_people_count', 'kps_technic_count', 'kps_aircraft_count', 'mio_people_count', 'mio_technic_count',
+    'mio_aircraft_count', 'other_org_people_count', 'other_org_technic_count', 'other_org_aircraft_count',
+    'damage_tenge', 'firefighting_costs', 'kpo'
+)
+BOOL_FIELDS = ('lo_flag', 'aps_flag', 'kps_flag', 'mio_flag', 'other_org_flag')
+TEXT_FIELDS = ('region', 'location', 'branch', 'forestry', 'quarter', 'allotment', 'description')
+
+TRUE_VALUES = {'1', 'да', 'yes', 'true', 'x', '+'}
+DATE_FORMATS = ('%Y-%m-%d', '%d.%m.%Y', '%d/%m/%Y')
+
+# Ограничение на количество строк с ошибками в отчёте
+MAX_REPORTED_ERRORS = 1000
+
+class FireImport:
+    def __init__(self, fire_repository, region_repository, fire_analysis: Optional[FireAnalysis] = None):
+        self.fire_repository = fire_repository
+        self.region_repository = region_repository
+        # Аналитика, чьи кэш результатов и куб сбрасываются после записи каждого пакета
+        self.fire_analysis = fire_analysis
+
+    def import_rows(self, rows: Iterable[Tuple[int, Dict]], chunk_size: int = 5000,
+                    allowed_regions: Optional[List[str]] = None) -> Dict:
+        """Импорт строк (номер строки, {заголовок: значение}) пакетами по chunk_size.
+
+        Каждый пакет записывается одной транзакцией. Возвращает отчёт с количеством
+        импортированных строк и ошибками по номерам строк.
+        """
+        catalog = {region: set(locations) for region, locations in
+                   self.region_repository.get_region_location_mapping().items()}
+        report = {'total': 0, 'imported': 0, 'failed': 0, 'errors': []}
+        batch, batch_rows = [], []
+        plan, plan_headers = None, None
+
+        for row_number, row in rows:
+            report['total'] += 1
+            # Соответствие заголовков полям вычисляется один раз на набор заголовков файла
+            headers = tuple(row)
+            if headers != plan_headers:
+                plan, plan_headers = self._column_plan(headers), headers
+            fire, errors = self._parse_row(row, plan, catalog, allowed_regions)
+            if errors:
+                self._add_error(report, row_number, errors)
+                continue
+            batch.append(fire)
+            batch_rows.append(row_number)
+            if len(batch) >= chunk_size:
+                self._flush(batch, batch_rows, report)
+                batch, batch_rows = [], []
+        self._flush(batch, batch_rows, report)
+        return report
+
+    def _flush(self, batch: List[FireEntity], batch_rows: List[int], report: Dict) -> None:
+        """Запись пакета; при ошибке БД все строки пакета попадают в отчёт."""
+        if not batch:
+            return
+        try:
+            report['imported'] += self.fire_repository.add_many(batch)
+        except Exception as e:
+            for row_number in batch_rows:
+                self._add_error(report, row_number, [f"Ошибка записи в базу данных: {e}"])
+            return
+        if self.fire_analysis is not None:
+            self.fire_analysis.invalidate([(fire.region, fire.date) for fire in batch])
+
+    @staticmethod
+    def _add_error(report: Dict, row_number: int, errors: List[str]) -> None:
+        report['failed'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'row': row_number, 'errors': errors})
+
+    @staticmethod
+    def _column_plan(headers: Tuple) -> List[Tuple[str, str, object]]:
+        """Список (заголовок, поле FireEntity, функция разбора) для известных столбцов."""
+        plan = []
+        for header in headers:
+            name = str(header).strip()
+            field = HEADER_ALIASES.get(name.lower(), name)
+            if field in PARSERS:
+                plan.append((header, field, PARSERS[field]))
+        return plan
+
+    def _parse_row(self, row: Dict, plan: List[Tuple[str, str, object]], catalog: Dict[str, set],
+                   allowed_regions: Optional[List[str]]):
+        """Разбор и проверка строки: возвращает (FireEntity, []) или (None, [ошибки])."""
+        values, errors = {}, []
+        for header, field, parse in plan:
+            try:
+                values[field] = parse(row[header])
+            except ValueError as e:
+                errors.append(f"{header}: {e}")
+
+        if not values.get('date'):
+            errors.append("Не указана дата")
+        region, location = values.get('region'), values.get('location')
+        if region not in catalog:
+            errors.append(f"Неизвестный регион: {region}")
+        elif location not in catalog[region]:
+            errors.append(f"Территория «{location}» не относится к региону «{region}»")
+        elif allowed_regions is not None and region not in allowed_regions:
+            errors.append(f"Нет прав на импорт пожаров региона «{region}»")
+        if errors:
+            return None, errors
+
+        if values.get('damage_area') is None:
+            values['damage_area'] = 0.0
+        try:
+            return FireEntity(id=0, **values), []
+        except (TypeError, ValueError) as e:
+            return None, [str(e)]
+
+def _is_empty(raw) -> bool:
+    return raw is None or (isinstance(raw, str) and not raw.strip())
+
+def _parse_date(raw) -> Optional[date]:
+    if _is_empty(raw):
+        return None
+    if isinstance(raw, datetime):
+        return raw.date()
+    if isinstance(raw, date):
+        return raw
+    text = str(raw).strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f"некорректная дата «{text}»")
+
+def _parse_number(raw, kind):
+    if _is_empty(raw):
+        return None
+    if isinstance(raw, (int, float)) and not isinstance(raw, bool):
+        value = raw
+    else:
+        try:
+            value = float(raw)
+        except ValueError:
+            # Десятичная запятая и пробелы-разделители разрядов
+            text = str(raw).strip().replace('\xa0', '').replace(' ', '').replace(',', '.')
+            try:
+                value = float(text)
+            except ValueError:
+                raise ValueError(f"некорректное число «{raw}»") from None
+    # float() принимает «inf» и «nan»; такие значения не пишутся в площади и суммы сводки
+    if not math.isfinite(value):
+        raise ValueError(f"некорректное число «{raw}»")
+    if kind is int:
+        if value != int(value):
+            raise ValueError(f"ожидается целое число, получено «{raw}»")
+        return int(value)
+    return float(value)
+
+def _parse_bool(raw) -> bool:
+    if _is_empty(raw):
+        return False
+    if isinstance(raw, bool):
+        return raw
+    return str(raw).strip().lower() in TRUE_VALUES
+
+def _parse_text(raw) -> Optional[str]:
+    if _is_empty(raw):
+        return None
+    return str(raw).strip()
+
+def _parse_float(raw) -> Optional[float]:
+    return _parse_number(raw, float)
+
+def _parse_int(raw) -> Optional[int]:
+    return _parse_number(raw, int)
+
+# Функция разбора значения для каждого импортируемого поля
+PARSERS = {
+    'date': _parse_date,
+    **{field: _parse_float for field in FLOAT_FIELDS},
+    **{field: _parse_int for field in INT_FIELDS},
+    **{field: _parse_bool for field in BOOL_FIELDS},
+    **{field: _parse_text for field in TEXT_FIELDS},
+}
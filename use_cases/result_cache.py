@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+class ResultCache:
+    """Кэш результатов аналитики с вытеснением LRU/TTL и версией данных.
+
+    Каждая запись помнит версию данных, при которой была вычислена. Изменяющие
+    сценарии вызывают bump_version(), после чего все ранее сохранённые результаты
+    считаются устаревшими. Возвращаемые значения общие для всех запросов и не
+    должны изменяться вызывающим кодом.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # ключ -> (версия данных, срок жизни, результат)
+        self._lock = threading.Lock()
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Результат из кэша или вычисленный compute() с сохранением в кэш."""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == self.version and entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[2]
+                del self._entries[key]
+            self.misses += 1
+            version = self.version
+
+        value = compute()
+
+        with self._lock:
+            # Если данные изменились во время вычисления, результат не сохраняется
+            if version == self.version:
+                self._entries[key] = (version, now + self.ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def bump_version(self) -> int:
+        """Отметить изменение данных: все сохранённые результаты становятся недействительными."""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+            return self.version
+
+    def stats(self) -> Dict:
+        """Счётчики попаданий и промахов для мониторинга."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'version': self.version,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }